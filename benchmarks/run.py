@@ -0,0 +1,316 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from typing import Any, Callable
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.generator import generate
+from labyrinth_game.main import process_command
+from labyrinth_game.player_actions import move_player
+from labyrinth_game.render import encode_events
+from labyrinth_game.state import NO_SOLVED_ROOMS, GameState
+from labyrinth_game.utils import (
+    describe_current_room,
+    pseudo_random,
+    solve_puzzle,
+    trigger_trap,
+)
+from labyrinth_game.world import build_actions, create_game_state, list_items
+
+ITERATIONS = 5_000
+MIN_TIME = 0.05
+ROUNDS = 5
+THRESHOLD = 0.3
+# Сколько раз перемерить пути, которые показали регрессию, прежде чем
+# признать её: на общей машине одна серия замеров может попасть на чужую
+# нагрузку, а настоящая регрессия повторяется.
+RETRIES = 2
+SIZES = ("rooms", "grid_10k", "grid_100k")
+
+# Команды живой игры на исходной карте: осмотр, переходы, предметы, загадки.
+ROOMS_MIX = (
+    ("look", 10),
+    ("north", 12),
+    ("south", 12),
+    ("east", 12),
+    ("west", 12),
+    ("inventory", 6),
+    ("take torch", 4),
+    ("take rusty key", 4),
+    ("take sword", 3),
+    ("use torch", 3),
+    ("use bronze box", 2),
+    ("solve", 3),
+    ("solve 10", 2),
+    ("шаг шаг шаг", 2),
+    ("path library", 2),
+    ("help", 1),
+    ("xyzzy", 1),
+)
+
+Prepare = Callable[[int], Any]
+Call = Callable[[Any], Any]
+
+
+def make_world(size: str) -> dict[str, Any]:
+    """
+    Возвращает карту заданного размера: исходную или сгенерированную решётку.
+    """
+    if size == "rooms":
+        return ROOMS
+    side = {"grid_10k": 100, "grid_100k": 316, "grid_1m": 1000}[size]
+    return generate(side, side, seed=1).to_rooms()
+
+
+def measure(prepare: Prepare, call: Call, iterations: int) -> dict[str, float]:
+    """
+    Делает ROUNDS серий замеров с отключённой сборкой мусора и берёт лучшее
+    значение каждой метрики: так меньше влияют посторонние процессы.
+    """
+    rounds = []
+    for _ in range(ROUNDS):
+        gc.collect()
+        gc.disable()
+        try:
+            rounds.append(measure_round(prepare, call, iterations))
+        finally:
+            gc.enable()
+    return best_of(rounds)
+
+
+def best_of(rounds: list[dict[str, float]]) -> dict[str, float]:
+    """
+    Сводит несколько серий замеров одного пути: лучшее значение каждой
+    метрики и общее число вызовов.
+    """
+    return {
+        "calls": sum(result["calls"] for result in rounds),
+        "ops_per_sec": max(result["ops_per_sec"] for result in rounds),
+        "p50_us": min(result["p50_us"] for result in rounds),
+        "p99_us": min(result["p99_us"] for result in rounds),
+    }
+
+
+def measure_round(prepare: Prepare, call: Call, iterations: int) -> dict[str, float]:
+    """
+    Вызывает call iterations раз (но не меньше MIN_TIME секунд) и считает
+    пропускную способность и перцентили задержки одного вызова.
+    prepare готовит аргумент вызова и в замер не входит.
+    """
+    timings = []
+    clock = time.perf_counter_ns
+    total = 0
+    index = 0
+    while index < iterations or total < MIN_TIME * 1e9:
+        argument = prepare(index)
+        started = clock()
+        call(argument)
+        elapsed = clock() - started
+        timings.append(elapsed)
+        total += elapsed
+        index += 1
+
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "ops_per_sec": round(len(timings) / (total / 1e9), 1),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 3),
+        "p99_us": round(timings[int(len(timings) * 0.99)] / 1000, 3),
+    }
+
+
+def world_cases(world: dict[str, Any]) -> dict[str, tuple[Prepare, Call]]:
+    """
+    Составляет замеры горячих путей для одной карты.
+    """
+    rng = random.Random(0)
+    room_keys = list(world)
+    game_state = create_game_state(world)
+
+    if world is ROOMS:
+        commands = [command for command, weight in ROOMS_MIX for _ in range(weight)]
+    else:
+        commands = [command for command in build_actions(world) if command != "solve"]
+        commands = commands[:4] * 10 + commands + ["look"] * 10
+
+    session = [create_game_state(world)]
+
+    def next_command(index: int) -> str:
+        if session[0].game_over:
+            session[0] = create_game_state(world)
+        return rng.choice(commands)
+
+    def random_room(index: int) -> GameState:
+        game_state.current_room = rng.choice(room_keys)
+        game_state.steps_taken = index
+        return game_state
+
+    def random_exit(index: int) -> str:
+        game_state.game_over = False
+        while True:
+            exits = world[random_room(index).current_room]["exits"]
+            if exits:
+                return rng.choice(list(exits))
+
+    trap_items = [item for item in list_items(world) if item not in ("sword", "torch")]
+
+    def full_inventory(index: int) -> GameState:
+        random_room(index)
+        game_state.player_inventory = trap_items
+        game_state.game_over = False
+        return game_state
+
+    puzzle_rooms = [key for key in room_keys if world[key].get("puzzle")]
+
+    def puzzle_room(index: int) -> tuple[GameState, str]:
+        game_state.current_room = rng.choice(puzzle_rooms)
+        game_state.steps_taken = index
+        game_state.solved_rooms = NO_SOLVED_ROOMS
+        game_state.pending_prompt = None
+        game_state.game_over = False
+        answer = world[game_state.current_room]["puzzle"][1]
+        return game_state, answer if index % 2 else "неверно"
+
+    return {
+        "process_command": (
+            next_command,
+            lambda command: process_command(session[0], command),
+        ),
+        "describe_current_room": (random_room, describe_current_room),
+        "encode_room": (
+            random_room,
+            lambda state: encode_events(describe_current_room(state)),
+        ),
+        "move_player": (
+            random_exit,
+            lambda direction: move_player(game_state, direction),
+        ),
+        "trigger_trap": (full_inventory, trigger_trap),
+        "solve_puzzle": (puzzle_room, lambda case: solve_puzzle(*case)),
+    }
+
+
+def run(
+    sizes: tuple[str, ...], iterations: int, names: set[str] | None = None
+) -> dict[str, Any]:
+    """
+    Выполняет замеры (все или только перечисленные в names) и возвращает
+    результаты для сохранения в JSON.
+    """
+    results = {}
+    if names is None or "pseudo_random" in names:
+        results["pseudo_random"] = measure(
+            lambda index: index, lambda seed: pseudo_random(seed, 10), iterations
+        )
+    for size in sizes:
+        if names is not None and not any(name.endswith(f"/{size}") for name in names):
+            continue
+        world = make_world(size)
+        for name, (prepare, call) in world_cases(world).items():
+            key = f"{name}/{size}"
+            if names is not None and key not in names:
+                continue
+            results[key] = measure(prepare, call, iterations)
+            print(f"{key}: {results[key]}", file=sys.stderr)
+
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> dict[str, str]:
+    """
+    Сравнивает замеры с базовыми и возвращает найденные регрессии
+    (путь → описание): пути, у которых упала больше чем на threshold
+    и пропускная способность, и медиана задержки. Пропускная способность
+    учитывает все вызовы, поэтому её сбивают редкие долгие вызовы
+    из-за чужой нагрузки, а медиана к ним устойчива. Перцентиль p99
+    в единицы микросекунд слишком шумный для порога, он только
+    сохраняется в отчёте.
+    """
+    regressions = {}
+    for name, base in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            continue
+        slower = result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold)
+        # p50 в 1 + threshold раз больше — та же доля потерянных операций.
+        if slower and result["p50_us"] * (1 - threshold) > base["p50_us"]:
+            regressions[name] = (
+                f"{name}: {result['ops_per_sec']:.0f} оп/с "
+                f"(было {base['ops_per_sec']:.0f}, p50 {result['p50_us']} мкс, "
+                f"было {base['p50_us']})"
+            )
+    return regressions
+
+
+def confirm(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    sizes: tuple[str, ...],
+    iterations: int,
+) -> dict[str, str]:
+    """
+    Перемеряет пути с регрессией до RETRIES раз и оставляет только те,
+    что не уложились в порог ни разу. Лучшие значения повторных
+    замеров попадают в current.
+    """
+    regressions = compare(current, baseline, threshold)
+    for _ in range(RETRIES):
+        if not regressions:
+            break
+        print(f"Перемеряются: {', '.join(regressions)}", file=sys.stderr)
+        retry = run(sizes, iterations, set(regressions))
+        for name, result in retry["results"].items():
+            current["results"][name] = best_of([current["results"][name], result])
+        regressions = compare(current, baseline, threshold)
+    return regressions
+
+
+def main() -> None:
+    """
+    Точка входа: запускает замеры, сохраняет их и сравнивает с базовыми.
+    """
+    parser = argparse.ArgumentParser(description="Замеры горячих путей игры")
+    parser.add_argument("--sizes", nargs="+", default=SIZES)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--output", help="куда сохранить результаты (JSON)")
+    parser.add_argument("--compare", help="файл с базовыми результатами")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    sizes = tuple(args.sizes)
+    current = run(sizes, args.iterations)
+    regressions = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as source:
+            baseline = json.load(source)
+        regressions = confirm(current, baseline, args.threshold, sizes, args.iterations)
+
+    text = json.dumps(current, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+    if regressions:
+        print("Регрессии производительности:", file=sys.stderr)
+        for line in regressions.values():
+            print(f" - {line}", file=sys.stderr)
+        sys.exit(1)
+    if regressions is not None:
+        print("Регрессий нет.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
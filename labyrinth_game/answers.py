@@ -0,0 +1,121 @@
+from typing import Any
+
+_HUNDREDS = (
+    "сто",
+    "двести",
+    "триста",
+    "четыреста",
+    "пятьсот",
+    "шестьсот",
+    "семьсот",
+    "восемьсот",
+    "девятьсот",
+)
+_TENS = (
+    "двадцать",
+    "тридцать",
+    "сорок",
+    "пятьдесят",
+    "шестьдесят",
+    "семьдесят",
+    "восемьдесят",
+    "девяносто",
+)
+_TEENS = (
+    "десять",
+    "одиннадцать",
+    "двенадцать",
+    "тринадцать",
+    "четырнадцать",
+    "пятнадцать",
+    "шестнадцать",
+    "семнадцать",
+    "восемнадцать",
+    "девятнадцать",
+)
+_UNITS = {
+    "один": 1,
+    "одна": 1,
+    "одно": 1,
+    "два": 2,
+    "две": 2,
+    "три": 3,
+    "четыре": 4,
+    "пять": 5,
+    "шесть": 6,
+    "семь": 7,
+    "восемь": 8,
+    "девять": 9,
+}
+
+# Слово числительного: (значение, разряд, старший разряд, который может идти
+# после него в той же группе). Разряды: 3 — сотни, 2 — десятки
+# (и числа 10–19, которые занимают десятки и единицы), 1 — единицы.
+NUMERAL_WORDS: dict[str, tuple[int, int, int]] = {
+    **{word: (100 * (index + 1), 3, 2) for index, word in enumerate(_HUNDREDS)},
+    **{word: (10 * (index + 2), 2, 1) for index, word in enumerate(_TENS)},
+    **{word: (index + 10, 2, 0) for index, word in enumerate(_TEENS)},
+    **{word: (value, 1, 0) for word, value in _UNITS.items()},
+}
+
+MULTIPLIERS = {
+    **dict.fromkeys(("тысяча", "тысячи", "тысяч"), 10**3),
+    **dict.fromkeys(("миллион", "миллиона", "миллионов"), 10**6),
+    **dict.fromkeys(("миллиард", "миллиарда", "миллиардов"), 10**9),
+}
+
+
+def parse_numeral(text: str) -> int | None:
+    """
+    Разбирает количественное числительное, записанное словами
+    («триста шестьдесят шесть», «две тысячи двадцать пять»).
+    Возвращает число или None, если текст не является числительным.
+    """
+    words = text.split()
+    if words == ["ноль"]:
+        return 0
+    if not words:
+        return None
+
+    total = 0
+    group = 0
+    allowed = 3
+    multiplier = None
+    for word in words:
+        if word in MULTIPLIERS:
+            scale = MULTIPLIERS[word]
+            if multiplier is not None and scale >= multiplier:
+                return None
+            total += (group or 1) * scale
+            group = 0
+            allowed = 3
+            multiplier = scale
+            continue
+
+        entry = NUMERAL_WORDS.get(word)
+        if entry is None:
+            return None
+        value, rank, next_allowed = entry
+        if rank > allowed:
+            return None
+        group += value
+        allowed = next_allowed
+    return total + group
+
+
+def normalize_answer(text: str) -> str:
+    """
+    Приводит ответ к каноническому виду: нижний регистр, ё как е,
+    одиночные пробелы, числительные словами — цифрами.
+    """
+    folded = " ".join(text.casefold().replace("ё", "е").split())
+    number = parse_numeral(folded)
+    return folded if number is None else str(number)
+
+
+def compile_answers(puzzle: tuple[Any, ...]) -> frozenset[str]:
+    """
+    Возвращает множество принятых ответов загадки в каноническом виде.
+    Загадка — кортеж (вопрос, ответ, *другие допустимые ответы).
+    """
+    return frozenset(normalize_answer(str(answer)) for answer in puzzle[1:])
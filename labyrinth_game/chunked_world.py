@@ -0,0 +1,383 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterator
+
+from labyrinth_game.constants import EXTRA_ITEMS
+
+CHUNK_SIZE = 4096
+BUCKET_SIZE = 4096
+MEMORY_BUDGET = 64 << 20
+# Разобранный JSON занимает в памяти в несколько раз больше, чем файл.
+MEMORY_FACTOR = 4
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 2
+
+
+def _chunk_path(directory: str, chunk_id: int) -> str:
+    return os.path.join(directory, f"chunk_{chunk_id:06d}.json")
+
+
+def _bucket_path(directory: str, bucket: int) -> str:
+    return os.path.join(directory, f"keys_{bucket:06d}.json")
+
+
+def _bucket_of(key: str, buckets: int) -> int:
+    return zlib.crc32(key.encode("utf-8")) % buckets
+
+
+class ChunkWriter:
+    """
+    Записывает карту в каталог чанков: файлы чанков с комнатами,
+    справочник «комната → чанк», разбитый на корзины по хешу ключа,
+    и индекс с общими данными карты (предметы, запертые комнаты,
+    номер первой комнаты каждого чанка).
+    """
+
+    def __init__(self, directory: str, chunk_size: int = CHUNK_SIZE) -> None:
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.chunks = 0
+        self.offsets = [0]
+        self.locations: dict[str, int] = {}
+        self.items: dict[str, None] = {}
+        self.gates: dict[str, str] = {}
+        self._digest = hashlib.blake2b(digest_size=16)
+        os.makedirs(directory, exist_ok=True)
+
+    def add_chunk(self, rooms: dict[str, Any]) -> int:
+        """
+        Записывает очередной чанк и возвращает его номер.
+        """
+        if len(rooms) > self.chunk_size:
+            raise ValueError("Чанк больше заданного размера.")
+
+        chunk_id = self.chunks
+        self.chunks += 1
+        self.offsets.append(self.offsets[-1] + len(rooms))
+        records = {}
+        for key, room in rooms.items():
+            self.locations[key] = chunk_id
+            self.items.update(dict.fromkeys(room["items"]))
+            if room.get("gate"):
+                self.gates[key] = room["gate"]
+            records[key] = room
+
+        data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+        self._digest.update(data)
+        with open(_chunk_path(self.directory, chunk_id), "wb") as chunk_file:
+            chunk_file.write(data)
+        return chunk_id
+
+    def close(self) -> None:
+        """
+        Записывает справочник комнат и индекс карты.
+        """
+        buckets = max(1, -(-len(self.locations) // BUCKET_SIZE))
+        tables: list[dict[str, int]] = [{} for _ in range(buckets)]
+        for key, chunk_id in self.locations.items():
+            tables[_bucket_of(key, buckets)][key] = chunk_id
+        for bucket, table in enumerate(tables):
+            with open(_bucket_path(self.directory, bucket), "w") as bucket_file:
+                json.dump(table, bucket_file, ensure_ascii=False)
+
+        self.items.update(dict.fromkeys(EXTRA_ITEMS))
+        index = {
+            "format": FORMAT_VERSION,
+            "version": self._digest.hexdigest(),
+            "chunk_size": self.chunk_size,
+            "chunks": self.chunks,
+            "rooms": len(self.locations),
+            "offsets": self.offsets,
+            "buckets": buckets,
+            "items": list(self.items),
+            "gates": self.gates,
+        }
+        with open(os.path.join(self.directory, INDEX_FILE), "w") as index_file:
+            json.dump(index, index_file, ensure_ascii=False)
+
+
+def write_chunks(
+    world: dict[str, Any], directory: str, chunk_size: int = CHUNK_SIZE
+) -> None:
+    """
+    Раскладывает карту в формате ROOMS по чанкам в порядке обхода в ширину
+    от входа, чтобы соседние комнаты чаще попадали в один чанк.
+    """
+    order = dict.fromkeys(_bfs_order(world))
+    order.update(dict.fromkeys(world))
+
+    writer = ChunkWriter(directory, chunk_size)
+    keys = list(order)
+    for start in range(0, len(keys), chunk_size):
+        writer.add_chunk({key: world[key] for key in keys[start : start + chunk_size]})
+    writer.close()
+
+
+def _bfs_order(world: dict[str, Any]) -> Iterator[str]:
+    """
+    Обходит комнаты в ширину от входа.
+    """
+    if "entrance" not in world:
+        return
+    seen = {"entrance"}
+    queue = deque(["entrance"])
+    while queue:
+        key = queue.popleft()
+        yield key
+        for target in world[key]["exits"].values():
+            if target not in seen and target in world:
+                seen.add(target)
+                queue.append(target)
+
+
+class _Chunk:
+    """
+    Загруженный чанк: ключи комнат по порядку, их позиции и сами комнаты.
+    """
+
+    __slots__ = ("keys", "positions", "rooms", "cost")
+
+    def __init__(self, rooms: dict[str, Any], cost: int) -> None:
+        for room in rooms.values():
+            if room.get("puzzle"):
+                room["puzzle"] = tuple(room["puzzle"])
+        self.rooms = rooms
+        self.keys = tuple(rooms)
+        self.positions = {key: position for position, key in enumerate(self.keys)}
+        self.cost = cost
+
+
+class ChunkedWorld(Mapping):
+    """
+    Карта, которая читается с диска по чанкам при первом обращении к комнате.
+    Загруженные чанки хранятся в LRU-кеше в пределах memory_budget байт
+    (оценка по размеру файла чанка), чанки соседних комнат подгружаются
+    заранее в фоновом потоке. Номер комнаты — номер первой комнаты чанка
+    (из индекса) плюс позиция в чанке: номера идут подряд от 0 до числа
+    комнат, как у обычной карты, а справочник карты не читает все комнаты.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        memory_budget: int = MEMORY_BUDGET,
+        prefetch: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.memory_budget = memory_budget
+
+        with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as index:
+            meta = json.load(index)
+        if meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{directory}: неподдерживаемый формат чанков.")
+        self.version = bytes.fromhex(meta["version"])
+        self.chunk_size: int = meta["chunk_size"]
+        self.chunk_count: int = meta["chunks"]
+        self.room_count: int = meta["rooms"]
+        self.offsets: list[int] = meta["offsets"]
+        self.bucket_count: int = meta["buckets"]
+        self.items: list[str] = meta["items"]
+        self.gates: dict[str, str] = meta["gates"]
+
+        self.room_keys = _RoomKeys(self)
+        self.room_ids = _RoomIds(self)
+
+        self._lock = threading.Lock()
+        self._resident: OrderedDict[int, _Chunk] = OrderedDict()
+        self._loading: dict[int, Future] = {}
+        self._resident_cost = 0
+        self._locations: dict[str, int] = {}
+        self._buckets: OrderedDict[int, dict[str, int]] = OrderedDict()
+        self._max_buckets = max(1, memory_budget // (BUCKET_SIZE * 128))
+        self._last_room: str | None = None
+        self._prefetcher = ThreadPoolExecutor(1) if prefetch else None
+
+    def __getitem__(self, key: str) -> dict[str, Any]:
+        chunk_id = self._find_chunk(key)
+        if chunk_id is None:
+            raise KeyError(key)
+        room = self._chunk(chunk_id).rooms[key]
+
+        if self._prefetcher is not None and key != self._last_room:
+            self._last_room = key
+            for target in room["exits"].values():
+                if target not in self._locations:
+                    self._prefetcher.submit(self._prefetch, target)
+        return room
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk_id in range(self.chunk_count):
+            yield from self._chunk(chunk_id).keys
+
+    def __len__(self) -> int:
+        return self.room_count
+
+    @property
+    def resident_chunks(self) -> int:
+        return len(self._resident)
+
+    def room_id(self, key: str) -> int | None:
+        """
+        Возвращает номер комнаты или None, если такой комнаты нет.
+        """
+        chunk_id = self._find_chunk(key)
+        if chunk_id is None:
+            return None
+        return self.offsets[chunk_id] + self._chunk(chunk_id).positions[key]
+
+    def chunk_of(self, room_id: int) -> int:
+        """
+        Возвращает номер чанка, в котором лежит комната с номером room_id.
+        """
+        if not 0 <= room_id < self.room_count:
+            raise IndexError(room_id)
+        return bisect_right(self.offsets, room_id) - 1
+
+    def _find_chunk(self, key: str) -> int | None:
+        """
+        Возвращает номер чанка комнаты: сначала среди загруженных чанков,
+        затем по справочнику на диске.
+        """
+        chunk_id = self._locations.get(key)
+        if chunk_id is not None:
+            return chunk_id
+        return self._lookup(key)
+
+    def close(self) -> None:
+        """
+        Останавливает фоновую подгрузку.
+        """
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=True, cancel_futures=True)
+
+    def _prefetch(self, key: str) -> None:
+        """
+        Фоновая подгрузка чанка комнаты, в которую игрок может перейти.
+        """
+        chunk_id = self._lookup(key)
+        if chunk_id is not None:
+            self._chunk(chunk_id)
+
+    def _lookup(self, key: str) -> int | None:
+        """
+        Находит номер чанка комнаты по справочнику.
+        """
+        bucket = _bucket_of(key, self.bucket_count)
+        with self._lock:
+            table = self._buckets.get(bucket)
+            if table is not None:
+                self._buckets.move_to_end(bucket)
+                return table.get(key)
+
+        with open(_bucket_path(self.directory, bucket), encoding="utf-8") as source:
+            table = json.load(source)
+        with self._lock:
+            self._buckets[bucket] = table
+            while len(self._buckets) > self._max_buckets:
+                self._buckets.popitem(last=False)
+        return table.get(key)
+
+    def _chunk(self, chunk_id: int) -> _Chunk:
+        """
+        Возвращает чанк, загружая его при необходимости.
+        Если чанк уже грузится в другом потоке, ждёт эту загрузку.
+        """
+        with self._lock:
+            chunk = self._resident.get(chunk_id)
+            if chunk is not None:
+                self._resident.move_to_end(chunk_id)
+                return chunk
+            future = self._loading.get(chunk_id)
+            owner = future is None
+            if owner:
+                future = self._loading[chunk_id] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            path = _chunk_path(self.directory, chunk_id)
+            with open(path, "rb") as source:
+                data = source.read()
+            chunk = _Chunk(json.loads(data), len(data) * MEMORY_FACTOR)
+        except BaseException as error:
+            with self._lock:
+                del self._loading[chunk_id]
+            future.set_exception(error)
+            raise
+
+        with self._lock:
+            self._resident[chunk_id] = chunk
+            self._resident_cost += chunk.cost
+            self._locations.update(dict.fromkeys(chunk.keys, chunk_id))
+            self._evict(chunk_id)
+            del self._loading[chunk_id]
+        future.set_result(chunk)
+        return chunk
+
+    def _evict(self, keep: int) -> None:
+        """
+        Выгружает давно не использованные чанки, пока не уложится в бюджет.
+        """
+        while self._resident_cost > self.memory_budget and len(self._resident) > 1:
+            chunk_id = next(iter(self._resident))
+            if chunk_id == keep:
+                self._resident.move_to_end(chunk_id)
+                chunk_id = next(iter(self._resident))
+            chunk = self._resident.pop(chunk_id)
+            self._resident_cost -= chunk.cost
+            for key in chunk.keys:
+                self._locations.pop(key, None)
+
+
+class _RoomKeys:
+    """
+    Последовательность ключей комнат по номерам без чтения всей карты.
+    """
+
+    __slots__ = ("world",)
+
+    def __init__(self, world: ChunkedWorld) -> None:
+        self.world = world
+
+    def __getitem__(self, room_id: int) -> str:
+        chunk_id = self.world.chunk_of(room_id)
+        position = room_id - self.world.offsets[chunk_id]
+        return self.world._chunk(chunk_id).keys[position]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.world)
+
+    def __len__(self) -> int:
+        return self.world.room_count
+
+
+class _RoomIds:
+    """
+    Отображение «ключ комнаты → номер» без чтения всей карты.
+    """
+
+    __slots__ = ("world",)
+
+    def __init__(self, world: ChunkedWorld) -> None:
+        self.world = world
+
+    def __getitem__(self, key: str) -> int:
+        room_id = self.world.room_id(key)
+        if room_id is None:
+            raise KeyError(key)
+        return room_id
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.world.room_id(key) is not None
+
+    def get(self, key: str, default: int | None = None) -> int | None:
+        room_id = self.world.room_id(key)
+        return default if room_id is None else room_id
@@ -0,0 +1,142 @@
+from typing import Any, Iterable
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ALIASES, COMMANDS
+from labyrinth_game.state import get_registry
+from labyrinth_game.world import DIRECTIONS
+
+COMMAND_SEPARATOR = ";"
+COMMAND_WORDS = frozenset(command.split()[0] for command in COMMANDS) | set(DIRECTIONS)
+# На картах больше этого числа комнат названия комнат не сокращаются:
+# префиксы всех ключей заняли бы слишком много памяти.
+ROOM_PREFIX_LIMIT = 10_000
+# Сколько разобранных строк помнит разборщик (см. CommandParser.parse).
+PARSE_CACHE_SIZE = 1 << 12
+
+
+class PrefixTrie:
+    """
+    Префиксное дерево слов, развёрнутое в словарь «префикс → слово»:
+    для целого слова и однозначного префикса хранится слово,
+    для неоднозначного префикса — None. Поиск — одно обращение к словарю.
+    """
+
+    __slots__ = ("words", "completions")
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words = frozenset(words)
+        completions: dict[str, str | None] = {}
+        for word in self.words:
+            for end in range(1, len(word) + 1):
+                prefix = word[:end]
+                completions[prefix] = None if prefix in completions else word
+        completions.update((word, word) for word in self.words)
+        self.completions = completions
+
+    def complete(self, prefix: str) -> str | None:
+        """
+        Возвращает слово, которое начинается с prefix: само слово, если оно
+        есть целиком, или единственное слово с таким началом. Иначе None.
+        """
+        return self.completions.get(prefix)
+
+    def candidates(self, prefix: str) -> list[str]:
+        """
+        Возвращает все слова с заданным началом (для сообщения
+        о неоднозначной команде).
+        """
+        return sorted(word for word in self.words if word.startswith(prefix))
+
+
+class CommandParser:
+    """
+    Разбор строки ввода для одной карты: сокращения из ALIASES, однозначные
+    префиксы команд, направлений, предметов и комнат. Строится один раз
+    на карту (см. get_parser). Разобранные строки запоминаются: игроки
+    и журнал повторяют одни и те же команды.
+    """
+
+    __slots__ = ("commands", "command_table", "argument_tables", "parsed")
+
+    def __init__(self, world: dict[str, Any]) -> None:
+        self.commands = PrefixTrie(COMMAND_WORDS)
+        self.command_table = {**self.commands.completions, **ALIASES}
+
+        directions = {
+            **PrefixTrie(DIRECTIONS).completions,
+            **{alias: word for alias, word in ALIASES.items() if word in DIRECTIONS},
+        }
+        items = PrefixTrie(get_registry(world).items).completions
+        self.argument_tables = {
+            "go": directions,
+            "take": items,
+            "use": items,
+            "drop": items,
+        }
+        if not isinstance(world, ChunkedWorld) and len(world) <= ROOM_PREFIX_LIMIT:
+            rooms = PrefixTrie(world).completions
+            self.argument_tables.update(goto=rooms, path=rooms)
+        self.parsed: dict[str, tuple[str, str | None] | None] = {}
+
+    def parse(self, command: str) -> tuple[str, str | None] | None:
+        """
+        Разбирает одну команду: возвращает пару (команда, аргумент)
+        с раскрытыми сокращениями или None для пустой строки.
+        Неизвестное или неоднозначное слово возвращается как есть.
+        Результат запоминается для PARSE_CACHE_SIZE последних строк.
+        """
+        parsed = self.parsed.get(command, False)
+        if parsed is not False:
+            return parsed
+
+        parts = command.strip().lower().split(maxsplit=1)
+        if not parts:
+            parsed = None
+        elif len(parts) == 1:
+            parsed = (self.command_table.get(parts[0]) or parts[0], None)
+        else:
+            word, arg = parts
+            cmd = self.command_table.get(word) or word
+            table = self.argument_tables.get(cmd)
+            if table is not None:
+                arg = table.get(arg) or arg
+            parsed = (cmd, arg)
+
+        if len(self.parsed) >= PARSE_CACHE_SIZE:
+            del self.parsed[next(iter(self.parsed))]
+        self.parsed[command] = parsed
+        return parsed
+
+    def is_ambiguous(self, word: str) -> bool:
+        """
+        Проверяет, что word — начало нескольких команд.
+        """
+        return word in self.command_table and self.command_table[word] is None
+
+    def candidates(self, word: str) -> list[str]:
+        """
+        Возвращает команды, которые начинаются с word.
+        """
+        return self.commands.candidates(word.lower())
+
+
+def split_commands(line: str) -> list[str]:
+    """
+    Делит строку на команды по разделителю COMMAND_SEPARATOR,
+    пропуская пустые.
+    """
+    return [part for part in line.split(COMMAND_SEPARATOR) if part.strip()]
+
+
+_parsers: dict[int, tuple[dict[str, Any], CommandParser]] = {}
+
+
+def get_parser(world: dict[str, Any]) -> CommandParser:
+    """
+    Возвращает разборщик команд для карты, создавая его при первом обращении.
+    """
+    entry = _parsers.get(id(world))
+    if entry is None or entry[0] is not world:
+        entry = (world, CommandParser(world))
+        _parsers[id(world)] = entry
+    return entry[1]
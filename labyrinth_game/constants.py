@@ -58,6 +58,7 @@ ROOMS = {
         ),
         "exits": {"south": "hall"},
         "items": ["treasure chest"],
+        "gate": "rusty key",
         "puzzle": (
             "Дверь защищена кодом. Введите код (подсказка: это число пятикратного "
             "шага, 2*5= ? )",
@@ -105,13 +106,33 @@ ROOMS = {
     },
 }
 
+EXTRA_ITEMS = ("coin", "rusty key", "portal_key")
+
 COMMANDS = {
     "go <direction>": "перейти в направлении (north/south/east/west)",
+    "goto <room>": "дойти до комнаты кратчайшим путём",
+    "path <room>": "показать кратчайший путь до комнаты",
     "look": "осмотреть текущую комнату",
     "take <item>": "поднять предмет",
     "use <item>": "использовать предмет из инвентаря",
     "inventory": "показать инвентарь",
-    "solve": "попытаться решить загадку в комнате",
+    "solve": "попытаться решить загадку в комнате (или сразу: solve <ответ>)",
+    "hint": "подсказать следующий шаг к победе",
     "quit": "выйти из игры",
     "help": "показать это сообщение",
 }
+
+# Сокращения команд и направлений. Кроме них, любую команду, предмет
+# или комнату можно сократить до однозначного начала слова.
+ALIASES = {
+    "n": "north",
+    "s": "south",
+    "e": "east",
+    "w": "west",
+    "h": "help",
+    "i": "inventory",
+    "inv": "inventory",
+    "l": "look",
+    "describe": "look",
+    "exit": "quit",
+}
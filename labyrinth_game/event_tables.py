@@ -0,0 +1,252 @@
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Sequence
+
+from labyrinth_game.state import Inventory, Registry
+
+MASK_64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+MIX_MULTIPLIER_1 = 0xBF58476D1CE4E5B9
+MIX_MULTIPLIER_2 = 0x94D049BB133111EB
+# Константы wyrand: шаг счётчика и маска множителя.
+STREAM_INCREMENT = 0xA0761D6478BD642F
+STREAM_MULTIPLIER = 0xE7037ED1A0B428DB
+# Номер числа в потоке хода: шаг, место розыгрыша и порядковый номер числа.
+SITE_BITS = 8
+DRAW_BITS = 8
+# Каждое 64-битное число делится на четыре 16-битных розыгрыша, начиная
+# с младших бит (RandomStream.sample и below). Выборка по весам
+# (AliasSampler) берёт число потока целиком.
+SAMPLE_BITS = 16
+SAMPLE_MASK = (1 << SAMPLE_BITS) - 1
+# Метка над непрочитанными битами запаса: запас пуст, когда осталась она одна.
+POOL_MARK = 1 << 64
+STREAM_KEY_CACHE_SIZE = 1 << 12
+# AliasSampler берёт столбец из младшей половины 64-битного числа,
+# а монетку — из старшей.
+ALIAS_BITS = 32
+ALIAS_MASK = (1 << ALIAS_BITS) - 1
+
+
+def mix64(value: int) -> int:
+    """
+    Перемешивает биты 64-битного числа (финализатор SplitMix64).
+    """
+    value = (value ^ (value >> 30)) * MIX_MULTIPLIER_1 & MASK_64
+    value = (value ^ (value >> 27)) * MIX_MULTIPLIER_2 & MASK_64
+    return value ^ (value >> 31)
+
+
+@lru_cache(maxsize=STREAM_KEY_CACHE_SIZE)
+def stream_key(seed: int) -> int:
+    """
+    Возвращает ключ потока для seed сессии. Ключ перемешан, поэтому
+    потоки соседних seed не сдвинуты друг относительно друга.
+    """
+    return mix64((seed + 1) * GOLDEN_GAMMA & MASK_64)
+
+
+class RandomStream:
+    """
+    Счётчиковый генератор случайных чисел для одного хода сессии:
+    число с номером n — перемешанная (как в wyrand) сумма ключа сессии
+    и n * STREAM_INCREMENT, внутреннего состояния кроме номера нет.
+    Номер складывается из числа шагов, места розыгрыша (переход, ловушка)
+    и порядкового номера, поэтому разные решения одного хода берут разные
+    числа, а ход воспроизводится по seed и числу шагов. Розыгрышам хватает
+    SAMPLE_BITS бит, поэтому 64-битное число делится на несколько
+    розыгрышей: непрочитанные биты лежат в pool.
+    """
+
+    __slots__ = ("state", "pool")
+
+    def __init__(self, seed: int, steps: int, site: int) -> None:
+        # Хранится сумма ключа и номера, уже умноженного на шаг:
+        # следующее число получается сложением.
+        counter = ((steps << SITE_BITS) | site) << DRAW_BITS
+        self.state = stream_key(seed) + counter * STREAM_INCREMENT
+        self.pool = 1
+
+    def next(self) -> int:
+        """
+        Возвращает следующее 64-битное случайное число потока.
+        """
+        self.state = state = (self.state + STREAM_INCREMENT) & MASK_64
+        # Одно 128-битное умножение вместо трёх раундов mix64:
+        # на горячем пути это почти вдвое дешевле.
+        product = state * (state ^ STREAM_MULTIPLIER)
+        return (product >> 64 ^ product) & MASK_64
+
+    def sample(self) -> int:
+        """
+        Возвращает следующий розыгрыш: случайное число из SAMPLE_BITS бит.
+        """
+        pool = self.pool
+        if pool == 1:
+            # Тело next, развёрнутое ради горячего пути.
+            self.state = state = (self.state + STREAM_INCREMENT) & MASK_64
+            product = state * (state ^ STREAM_MULTIPLIER)
+            pool = (product >> 64 ^ product) & MASK_64 | POOL_MARK
+        self.pool = pool >> SAMPLE_BITS
+        return pool & SAMPLE_MASK
+
+    def below(self, bound: int) -> int:
+        """
+        Возвращает случайное число из [0, bound). Вероятность каждого
+        значения отличается от 1 / bound не больше чем на 2**-SAMPLE_BITS,
+        для инвентаря и выходов комнаты этого достаточно.
+        """
+        return self.sample() * bound >> SAMPLE_BITS
+
+
+class AliasSampler:
+    """
+    Выборка по целым весам методом Уолкера (вариант Воуза): после
+    построения за O(n) каждый розыгрыш — один столбец и одна монетка,
+    независимо от числа исходов. Пороги целые, поэтому таблица строится
+    одинаково на любой машине. Столбец и монетка берутся из одного
+    64-битного числа потока (по ALIAS_BITS бит на каждого), поэтому
+    таблица может быть любого размера, а сумма весов — до 2**ALIAS_BITS.
+    """
+
+    __slots__ = ("size", "total", "thresholds", "aliases")
+
+    def __init__(self, weights: Sequence[int]) -> None:
+        self.size = len(weights)
+        self.total = sum(weights)
+        if not self.size or self.total <= 0 or min(weights) < 0:
+            raise ValueError("Веса выборки должны быть неотрицательными и не все 0.")
+        if self.total >> ALIAS_BITS or self.size >> ALIAS_BITS:
+            raise ValueError(
+                f"Сумма и число весов выборки должны быть меньше 2**{ALIAS_BITS}."
+            )
+
+        # Вес, умноженный на число исходов, сравнивается с суммой весов:
+        # столбец полон, когда в нём ровно total.
+        scaled = [weight * self.size for weight in weights]
+        self.thresholds = [self.total] * self.size
+        self.aliases = list(range(self.size))
+        small = [index for index, weight in enumerate(scaled) if weight < self.total]
+        large = [index for index, weight in enumerate(scaled) if weight >= self.total]
+        while small and large:
+            low = small.pop()
+            high = large.pop()
+            self.thresholds[low] = scaled[low]
+            self.aliases[low] = high
+            scaled[high] -= self.total - scaled[low]
+            (small if scaled[high] < self.total else large).append(high)
+
+    def sample(self, word: int) -> int:
+        """
+        Возвращает номер исхода по 64-битному числу потока.
+        """
+        column = (word & ALIAS_MASK) * self.size >> ALIAS_BITS
+        if (word >> ALIAS_BITS) * self.total >> ALIAS_BITS < self.thresholds[column]:
+            return column
+        return self.aliases[column]
+
+
+class EventRule(NamedTuple):
+    """
+    Строка таблицы случайных событий: вес, действие (None — ничего
+    не происходит) и условия по инвентарю — предметы, которые должны быть,
+    и предметы, которых быть не должно.
+    """
+
+    weight: int
+    effect: str | None = None
+    requires: tuple[str, ...] = ()
+    forbids: tuple[str, ...] = ()
+
+
+Compiled = tuple[AliasSampler, tuple[EventRule, ...]] | None
+
+
+class EventTable:
+    """
+    Скомпилированная таблица случайных событий. Для каждого набора
+    предметов из условий таблицы, который встречается в инвентаре,
+    один раз строится AliasSampler по подходящим строкам. Набор — биты
+    маски инвентаря под маской условий, поэтому розыгрыш не зависит
+    ни от числа строк таблицы, ни от числа условий.
+    """
+
+    __slots__ = ("rules", "condition_items", "_registries", "_last")
+
+    def __init__(self, rules: Iterable[EventRule]) -> None:
+        self.rules = tuple(rule for rule in rules if rule.weight > 0)
+        self.condition_items = tuple(
+            sorted(
+                {item for rule in self.rules for item in rule.requires + rule.forbids}
+            )
+        )
+        # Номера предметов свои у каждой карты: маска условий и выборки
+        # хранятся по справочнику карты.
+        self._registries: dict[int, tuple[Registry, int, dict[int, Compiled]]] = {}
+        # Обычно все сессии играют на одной карте: её запись держится
+        # под рукой, без поиска в словаре.
+        self._last: tuple[Registry, int, dict[int, Compiled]] | None = None
+
+    def draw(self, inventory: Inventory, stream: RandomStream) -> EventRule | None:
+        """
+        Разыгрывает строку таблицы для инвентаря игрока.
+        Возвращает None, если ни одна строка не подходит.
+        """
+        registry = inventory.registry
+        entry = self._last
+        if entry is None or entry[0] is not registry:
+            entry = self._last = self._entry(registry)
+
+        _, condition_mask, samplers = entry
+        signature = inventory.mask & condition_mask
+        compiled = samplers.get(signature, False)
+        if compiled is False:
+            compiled = samplers[signature] = self._compile(registry, signature)
+        if compiled is None:
+            return None
+
+        sampler, rules = compiled
+        return rules[sampler.sample(stream.next())]
+
+    def compiled(self, registry: Registry, signature: int) -> Compiled:
+        """
+        Возвращает выборку и строки таблицы для набора предметов signature
+        (битовая маска по номерам предметов карты) — ту же, что берёт draw.
+        Нужна пакетному розыгрышу (см. VectorEnv).
+        """
+        _, condition_mask, samplers = self._entry(registry)
+        signature &= condition_mask
+        compiled = samplers.get(signature, False)
+        if compiled is False:
+            compiled = samplers[signature] = self._compile(registry, signature)
+        return compiled
+
+    def _entry(self, registry: Registry) -> tuple[Registry, int, dict[int, Compiled]]:
+        """
+        Возвращает запись карты: маску условий и построенные выборки.
+        """
+        entry = self._registries.get(id(registry))
+        if entry is None or entry[0] is not registry:
+            condition_mask = 0
+            for item in self.condition_items:
+                condition_mask |= 1 << registry.item_id(item)
+            entry = self._registries[id(registry)] = (registry, condition_mask, {})
+        return entry
+
+    def _compile(self, registry: Registry, signature: int) -> Compiled:
+        """
+        Строит выборку по строкам, условия которых выполнены, когда
+        из предметов условий в инвентаре есть отмеченные в signature.
+        """
+        present = {
+            item
+            for item in self.condition_items
+            if signature >> registry.item_ids[item] & 1
+        }
+        rules = tuple(
+            rule
+            for rule in self.rules
+            if present.issuperset(rule.requires) and present.isdisjoint(rule.forbids)
+        )
+        if not rules:
+            return None
+        return AliasSampler([rule.weight for rule in rules]), rules
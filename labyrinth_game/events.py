@@ -0,0 +1,86 @@
+from typing import Any, NamedTuple
+
+
+class Event(NamedTuple):
+    """
+    Событие игрового движка: вид события и его параметры.
+    Текст для игрока строится из событий отдельно (см. render.py).
+    """
+
+    kind: str
+    args: tuple[Any, ...] = ()
+
+
+# Комнаты и перемещение
+ROOM_DESCRIBED = "room_described"
+MOVED = "moved"
+NO_EXIT = "no_exit"
+DOOR_LOCKED = "door_locked"
+DOOR_UNLOCKED = "door_unlocked"
+LOCATION_UNKNOWN = "location_unknown"
+ROOM_INVALID = "room_invalid"
+ROUTE_SHOWN = "route_shown"
+NO_ROUTE = "no_route"
+ALREADY_HERE = "already_here"
+HINT_SHOWN = "hint_shown"
+NO_HINT = "no_hint"
+HINTS_UNAVAILABLE = "hints_unavailable"
+UNKNOWN_ROOM = "unknown_room"
+
+# Предметы
+INVENTORY_SHOWN = "inventory_shown"
+ITEM_TAKEN = "item_taken"
+ITEM_NOT_HERE = "item_not_here"
+ITEM_TOO_HEAVY = "item_too_heavy"
+ITEM_NOT_OWNED = "item_not_owned"
+ITEM_USED = "item_used"
+ITEM_FOUND = "item_found"
+ITEM_USELESS_HERE = "item_useless_here"
+ITEM_UNKNOWN_USE = "item_unknown_use"
+ITEM_DROPPED = "item_dropped"
+
+# Другие игроки в общей игре
+PLAYERS_HERE = "players_here"
+PLAYER_ENTERED = "player_entered"
+PLAYER_LEFT = "player_left"
+PLAYER_TOOK = "player_took"
+PLAYER_DROPPED = "player_dropped"
+
+# Загадки и сундук
+PUZZLE_SHOWN = "puzzle_shown"
+PUZZLE_SOLVED = "puzzle_solved"
+PUZZLE_FAILED = "puzzle_failed"
+NO_PUZZLE = "no_puzzle"
+CHEST_MISSING = "chest_missing"
+CHEST_ALREADY_OPEN = "chest_already_open"
+CHEST_LOCKED = "chest_locked"
+CHEST_OPENED = "chest_opened"
+CHEST_LEFT = "chest_left"
+WRONG_CODE = "wrong_code"
+PORTAL_ACTIVATED = "portal_activated"
+
+# Ловушки и случайные события
+TRAP_TRIGGERED = "trap_triggered"
+TRAP_AVOIDED = "trap_avoided"
+ITEM_LOST = "item_lost"
+PLAYER_THROWN = "player_thrown"
+PLAYER_DIED = "player_died"
+TRAP_SURVIVED = "trap_survived"
+FLOOR_GLINTS = "floor_glints"
+COIN_FOUND = "coin_found"
+ONLY_DUST = "only_dust"
+RUSTLE_HEARD = "rustle_heard"
+RUSTLE_ENDED = "rustle_ended"
+FLOOR_GAVE_WAY = "floor_gave_way"
+
+# Команды и конец игры
+HELP_SHOWN = "help_shown"
+DIRECTION_REQUIRED = "direction_required"
+ITEM_REQUIRED = "item_required"
+ROOM_REQUIRED = "room_required"
+UNKNOWN_COMMAND = "unknown_command"
+AMBIGUOUS_COMMAND = "ambiguous_command"
+COMMAND_FAILED = "command_failed"
+PLAYER_QUIT = "player_quit"
+GAME_WON = "game_won"
+GAME_FINISHED = "game_finished"
@@ -0,0 +1,286 @@
+import argparse
+import json
+import random
+import time
+from typing import Any
+
+from labyrinth_game.chunked_world import ChunkWriter
+from labyrinth_game.world import DIRECTIONS
+
+NORTH, SOUTH, EAST, WEST = (1 << index for index in range(len(DIRECTIONS)))
+
+ITEM_POOL = (
+    "torch",
+    "sword",
+    "bronze box",
+    "ancient book",
+    "glowing mushroom",
+    "crystal fruit",
+    "star chart",
+    "telescope lens",
+    "magic rune",
+)
+ITEM_DENSITY = 0.05
+PUZZLE_DENSITY = 0.02
+LOOP_DENSITY = 0.05
+TREASURE_CODE = "10"
+WRITE_BATCH = 10_000
+TILE = 64
+
+_NO_ITEMS: list[str] = []
+
+
+class Labyrinth:
+    """
+    Лабиринт-решётка width × height. Выходы хранятся битовыми масками
+    в bytearray (бит на направление из DIRECTIONS), предметы и загадки —
+    только для комнат, где они есть. Комната 0 — вход, за последней
+    комнатой решётки находится запертая сокровищница.
+    """
+
+    def __init__(self, width: int, height: int, seed: int = 0) -> None:
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.exits = bytearray(width * height)
+        self.items: dict[int, list[str]] = {}
+        self.puzzles: dict[int, tuple[str, str]] = {}
+        self.key_room = 0
+
+    @property
+    def size(self) -> int:
+        return self.width * self.height
+
+    def room_key(self, index: int) -> str:
+        """
+        Возвращает ключ комнаты по её номеру в решётке.
+        """
+        if index == 0:
+            return "entrance"
+        if index == self.size:
+            return "treasure_room"
+        return f"room_{index % self.width}_{index // self.width}"
+
+    def neighbours(self, index: int) -> list[tuple[str, int]]:
+        """
+        Возвращает выходы комнаты решётки: пары (направление, номер комнаты).
+        """
+        mask = self.exits[index]
+        width = self.width
+        result = []
+        if mask & NORTH:
+            result.append(("north", index - width))
+        if mask & SOUTH:
+            result.append(("south", index + width))
+        if mask & EAST:
+            result.append(("east", index + 1))
+        if mask & WEST:
+            result.append(("west", index - 1))
+        if index == self.size - 1:
+            result.append(("south", self.size))
+        return result
+
+    def room(self, index: int) -> dict[str, Any]:
+        """
+        Возвращает комнату в формате ROOMS.
+        """
+        if index == self.size:
+            return {
+                "description": "Сокровищница. На столе большой сундук.",
+                "exits": {"north": self.room_key(self.size - 1)},
+                "items": ["treasure chest"],
+                "gate": "rusty key",
+                "puzzle": (
+                    f"Сундук защищён кодом. Введите код {TREASURE_CODE}.",
+                    TREASURE_CODE,
+                ),
+            }
+
+        return {
+            "description": (
+                f"Комната лабиринта ({index % self.width}, {index // self.width})."
+            ),
+            "exits": {
+                direction: self.room_key(target)
+                for direction, target in self.neighbours(index)
+            },
+            "items": self.items.get(index, _NO_ITEMS),
+            "puzzle": self.puzzles.get(index),
+        }
+
+    def to_rooms(self) -> dict[str, Any]:
+        """
+        Строит карту в формате ROOMS. Пустые списки предметов общие:
+        карта мира не изменяется во время игры.
+        """
+        return {
+            self.room_key(index): self.room(index) for index in range(self.size + 1)
+        }
+
+    def write(self, path: str) -> None:
+        """
+        Записывает карту построчно в формате JSON Lines: одна комната —
+        одна строка, поэтому файл можно читать и писать потоком.
+        Строки обычных комнат собираются напрямую, без словарей комнат.
+        """
+        dumps = json.JSONEncoder(ensure_ascii=False).encode
+        width = self.width
+        keys = [self.room_key(index) for index in range(self.size + 1)]
+        with open(path, "w", encoding="utf-8") as world_file:
+            lines = []
+            for index, mask in enumerate(self.exits):
+                exits = []
+                if mask & NORTH:
+                    exits.append(f'"north": "{keys[index - width]}"')
+                if mask & SOUTH:
+                    exits.append(f'"south": "{keys[index + width]}"')
+                if mask & EAST:
+                    exits.append(f'"east": "{keys[index + 1]}"')
+                if mask & WEST:
+                    exits.append(f'"west": "{keys[index - 1]}"')
+                if index == self.size - 1:
+                    exits.append(f'"south": "{keys[self.size]}"')
+                line = (
+                    f'{{"key": "{keys[index]}", "description": "Комната лабиринта '
+                    f'({index % width}, {index // width}).", '
+                    f'"exits": {{{", ".join(exits)}}}'
+                )
+                items = self.items.get(index)
+                if items:
+                    line += f', "items": {dumps(items)}'
+                puzzle = self.puzzles.get(index)
+                if puzzle:
+                    question, answer = puzzle
+                    line += (
+                        f', "puzzle": {{"question": {dumps(question)}, '
+                        f'"answer": {dumps(answer)}}}'
+                    )
+                lines.append(line + "}\n")
+                if len(lines) >= WRITE_BATCH:
+                    world_file.writelines(lines)
+                    lines.clear()
+            world_file.writelines(lines)
+
+            room = self.room(self.size)
+            question, answer = room.pop("puzzle")
+            record = {"key": keys[self.size], **room}
+            record["puzzle"] = {"question": question, "answer": answer}
+            world_file.write(dumps(record) + "\n")
+
+    def write_chunks(self, directory: str, tile: int = TILE) -> None:
+        """
+        Записывает карту каталогом чанков для ChunkedWorld: один чанк —
+        квадрат решётки tile × tile, поэтому соседние комнаты обычно
+        лежат в одном чанке. Сокровищница записывается отдельным чанком.
+        """
+        writer = ChunkWriter(directory, tile * tile)
+        width = self.width
+        for top in range(0, self.height, tile):
+            for left in range(0, width, tile):
+                rows = range(top, min(top + tile, self.height))
+                columns = range(left, min(left + tile, width))
+                writer.add_chunk(
+                    {
+                        self.room_key(index): self.room(index)
+                        for index in (y * width + x for y in rows for x in columns)
+                    }
+                )
+        writer.add_chunk({self.room_key(self.size): self.room(self.size)})
+        writer.close()
+
+
+def generate(
+    width: int,
+    height: int,
+    seed: int = 0,
+    item_density: float = ITEM_DENSITY,
+    puzzle_density: float = PUZZLE_DENSITY,
+    loop_density: float = LOOP_DENSITY,
+) -> Labyrinth:
+    """
+    Строит связный лабиринт по seed: остовное дерево решётки алгоритмом
+    sidewinder, несколько дополнительных проходов (циклов), предметы,
+    загадки и ключ от сокровищницы в случайной комнате.
+    """
+    if width < 1 or height < 1:
+        raise ValueError("Размеры лабиринта должны быть положительными.")
+
+    labyrinth = Labyrinth(width, height, seed)
+    exits = labyrinth.exits
+    rng = random.Random(seed)
+    chance = rng.random
+
+    for y in range(height):
+        row = y * width
+        run_start = row
+        for index in range(row, row + width):
+            at_east_edge = index == row + width - 1
+            if y > 0 and (at_east_edge or chance() < 0.5):
+                cell = rng.randrange(run_start, index + 1)
+                exits[cell] |= NORTH
+                exits[cell - width] |= SOUTH
+                run_start = index + 1
+            elif not at_east_edge:
+                exits[index] |= EAST
+                exits[index + 1] |= WEST
+
+    size = labyrinth.size
+    for _ in range(int(size * loop_density)):
+        index = rng.randrange(size)
+        if index % width < width - 1:
+            exits[index] |= EAST
+            exits[index + 1] |= WEST
+        elif index >= width:
+            exits[index] |= NORTH
+            exits[index - width] |= SOUTH
+
+    for _ in range(int(size * item_density)):
+        index = rng.randrange(size)
+        labyrinth.items.setdefault(index, []).append(rng.choice(ITEM_POOL))
+
+    for _ in range(int(size * puzzle_density)):
+        left, right = rng.randrange(1, 50), rng.randrange(1, 50)
+        labyrinth.puzzles[rng.randrange(size)] = (
+            f"На стене надпись: «Сколько будет {left} + {right}?» (ответ цифрой)",
+            str(left + right),
+        )
+
+    labyrinth.key_room = rng.randrange(size)
+    labyrinth.items.setdefault(labyrinth.key_room, []).append("rusty key")
+    return labyrinth
+
+
+def main() -> None:
+    """
+    Точка входа: создаёт лабиринт и записывает его в файл или каталог чанков.
+    """
+    parser = argparse.ArgumentParser(description="Генератор больших лабиринтов")
+    parser.add_argument("width", type=int)
+    parser.add_argument("height", type=int)
+    parser.add_argument("output", help="файл карты (.jsonl) или каталог чанков")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--items", type=float, default=ITEM_DENSITY)
+    parser.add_argument("--puzzles", type=float, default=PUZZLE_DENSITY)
+    parser.add_argument("--loops", type=float, default=LOOP_DENSITY)
+    parser.add_argument("--chunks", action="store_true", help="записать каталог чанков")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    labyrinth = generate(
+        args.width,
+        args.height,
+        seed=args.seed,
+        item_density=args.items,
+        puzzle_density=args.puzzles,
+        loop_density=args.loops,
+    )
+    if args.chunks:
+        labyrinth.write_chunks(args.output)
+    else:
+        labyrinth.write(args.output)
+    elapsed = time.perf_counter() - started
+    print(f"Комнат: {labyrinth.size + 1}, время: {elapsed:.2f} с, файл: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
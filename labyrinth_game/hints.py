@@ -0,0 +1,355 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_right
+from collections import Counter, deque
+from typing import Any
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.state import GameState, get_registry
+from labyrinth_game.world import DIRECTIONS, VERSION_SIZE, world_version
+from labyrinth_game.world_loader import NO_GATE, get_compiled_world, open_world
+
+HINTS_MAGIC = b"LBH1"
+HINTS_HEADER = struct.Struct(f"<4s{VERSION_SIZE}sIBBBI")
+NO_ACTION = 0
+
+# Правила движка, от которых зависит путь к победе (см. move_player, use_item
+# и check_puzzle_answer): предмет, который даёт использование другого
+# предмета, предмет-награда за загадку комнаты и предмет, который приносит
+# победу, если использовать его в комнате.
+USE_REWARDS = {"bronze box": "rusty key"}
+PUZZLE_REWARDS = {"portal_room": "portal_key"}
+WINNING_USES = {"treasure_room": "rusty key", "portal_room": "portal_key"}
+
+
+class HintModel:
+    """
+    Упрощённая модель игры для подсказок: состояние — комната, нужные
+    для победы предметы инвентаря, какие из таких предметов ещё лежат
+    на своих местах в комнатах и решённые загадки, которые дают такие
+    предметы. Остальные предметы и загадки на путь к победе не влияют
+    и в состояние не входят, случайные события не учитываются.
+    Предметы, которых на карте несколько, считаются лежащими на местах.
+    Состояние упаковывается в номер (комната, флаги предметов, загадки) —
+    позицию в таблице подсказок. В младших битах флагов — инвентарь,
+    в старших — предметы, которые ещё лежат в комнатах.
+    Модель строится по массивам индексированной карты (get_compiled_world),
+    без обхода словарей комнат; для карты из чанков это всё равно чтение
+    всех комнат, поэтому модель строят, только когда подсказки включены.
+    """
+
+    def __init__(self, world: dict[str, Any]) -> None:
+        self.world = world
+        self.registry = get_registry(world)
+        compiled = get_compiled_world(world)
+        self.gates = {
+            compiled.room_keys[room]: compiled.items[gate]
+            for room, gate in enumerate(compiled.gates)
+            if gate != NO_GATE
+        }
+
+        items = set(self.gates.values()) | {
+            item for room_key, item in WINNING_USES.items() if room_key in world
+        }
+        while True:
+            sources = {
+                source for source, reward in USE_REWARDS.items() if reward in items
+            }
+            if sources <= items:
+                break
+            items |= sources
+
+        self.items = tuple(sorted(items))
+        # Место в комнате отслеживается только у единственного на карте
+        # экземпляра предмета: если экземпляров несколько, число состояний
+        # росло бы вдвое на каждый, а потеря одного пути к победе не меняет.
+        item_ids = self.registry.item_ids
+        wanted = {item_ids[item] for item in items if item in item_ids}
+        places = []
+        for position, item_id in enumerate(compiled.slot_items):
+            if item_id in wanted:
+                room = bisect_right(compiled.slot_offsets, position) - 1
+                slot = position - compiled.slot_offsets[room]
+                places.append((compiled.room_keys[room], slot, compiled.items[item_id]))
+        copies = Counter(item for _, _, item in places)
+        self.placed = tuple(place for place in places if copies[place[2]] == 1)
+        self.copied = frozenset(item for item, count in copies.items() if count > 1)
+        self.puzzle_rooms = tuple(
+            room_key
+            for room_key, reward in sorted(PUZZLE_REWARDS.items())
+            if reward in items and room_key in world and world[room_key].get("puzzle")
+        )
+        self.item_bits = len(self.items)
+        self.flag_bits = self.item_bits + len(self.placed)
+        self.puzzle_bits = len(self.puzzle_rooms)
+        self.actions = (
+            *DIRECTIONS,
+            *(f"take {item}" for item in self.items),
+            *(f"use {item}" for item in self.items),
+            "solve",
+        )
+
+    @property
+    def layout(self) -> list[int]:
+        """
+        Размеры номера состояния: число комнат, предметов инвентаря,
+        флагов предметов и загадок. Записываются в заголовок файла.
+        """
+        return [
+            len(self.registry.room_keys),
+            self.item_bits,
+            self.flag_bits,
+            self.puzzle_bits,
+        ]
+
+    @property
+    def size(self) -> int:
+        """
+        Число состояний модели — длина таблицы подсказок.
+        """
+        return len(self.registry.room_keys) << self.flag_bits + self.puzzle_bits
+
+    def pack(self, room: int, flags: int, solved: int) -> int:
+        """
+        Упаковывает состояние в номер позиции таблицы.
+        """
+        return ((room << self.flag_bits | flags) << self.puzzle_bits) | solved
+
+    def state_of(self, game_state: GameState) -> int:
+        """
+        Возвращает номер состояния модели для сессии.
+        """
+        flags = 0
+        for bit, item in enumerate(self.items):
+            if item in game_state.inventory:
+                flags |= 1 << bit
+        removed_items = game_state.removed_items or {}
+        for bit, (room_key, slot, _) in enumerate(self.placed, self.item_bits):
+            if not removed_items.get(room_key, 0) >> slot & 1:
+                flags |= 1 << bit
+        solved = 0
+        for bit, room_key in enumerate(self.puzzle_rooms):
+            if self.registry.room_ids[room_key] in game_state.solved_rooms:
+                solved |= 1 << bit
+        return self.pack(game_state.room, flags, solved)
+
+    def build(self) -> bytearray:
+        """
+        Считает таблицу подсказок обратным поиском в ширину от победных
+        состояний: для каждого состояния, из которого можно победить,
+        запоминается номер первого действия кратчайшего пути (начиная с 1),
+        для остальных — NO_ACTION.
+        """
+        room_keys = self.registry.room_keys
+        room_ids = self.registry.room_ids
+        compiled = get_compiled_world(self.world)
+        item_bit = {item: 1 << bit for bit, item in enumerate(self.items)}
+        action_ids = {action: index + 1 for index, action in enumerate(self.actions)}
+
+        # Переходы берутся из массивов выходов индексированной карты.
+        entrances: list[list[tuple[int, int]]] = [[] for _ in room_keys]
+        for room in range(len(room_keys)):
+            for direction, next_room in compiled.exits(room):
+                entrances[next_room].append((room, action_ids[DIRECTIONS[direction]]))
+        takes: list[list[tuple[int, int, int]]] = [[] for _ in room_keys]
+        for bit, (room_key, _, item) in enumerate(self.placed, self.item_bits):
+            takes[room_ids[room_key]].append(
+                (item_bit[item], 1 << bit, action_ids[f"take {item}"])
+            )
+        copied_ids = frozenset(self.registry.item_ids[item] for item in self.copied)
+        for room, items in enumerate(compiled.room_items):
+            for item_id in items & copied_ids:
+                item = compiled.items[item_id]
+                takes[room].append((item_bit[item], 0, action_ids[f"take {item}"]))
+        gate_bits = {
+            room: item_bit[compiled.items[gate]]
+            for room, gate in enumerate(compiled.gates)
+            if gate != NO_GATE
+        }
+        uses = [
+            (item_bit[source], item_bit[reward], action_ids[f"use {source}"])
+            for source, reward in USE_REWARDS.items()
+            if source in item_bit and reward in item_bit
+        ]
+        solve = action_ids["solve"]
+        puzzles = {
+            room_ids[room_key]: (1 << bit, item_bit[PUZZLE_REWARDS[room_key]])
+            for bit, room_key in enumerate(self.puzzle_rooms)
+        }
+
+        table = bytearray(self.size)
+        queue: deque[int] = deque()
+        all_flags = 1 << self.flag_bits
+        all_solved = 1 << self.puzzle_bits
+        for room_key, item in WINNING_USES.items():
+            if room_key not in room_ids or item not in item_bit:
+                continue
+            room = room_ids[room_key]
+            for flags in range(all_flags):
+                if not flags & item_bit[item]:
+                    continue
+                for solved in range(all_solved):
+                    state = self.pack(room, flags, solved)
+                    if table[state] == NO_ACTION:
+                        table[state] = action_ids[f"use {item}"]
+                        queue.append(state)
+
+        flag_mask = all_flags - 1
+        solved_mask = all_solved - 1
+
+        def reach(state: int, action: int) -> None:
+            if table[state] == NO_ACTION:
+                table[state] = action
+                queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            solved = state & solved_mask
+            flags = state >> self.puzzle_bits & flag_mask
+            room = state >> self.puzzle_bits + self.flag_bits
+
+            gate_bit = gate_bits.get(room)
+            if gate_bit is None or flags & gate_bit:
+                for previous, action in entrances[room]:
+                    reach(self.pack(previous, flags, solved), action)
+            for bit, placed_bit, action in takes[room]:
+                if flags & bit and not flags & placed_bit:
+                    reach(self.pack(room, flags ^ bit ^ placed_bit, solved), action)
+            for source, reward, action in uses:
+                if flags & source and flags & reward:
+                    reach(self.pack(room, flags ^ reward, solved), action)
+            puzzle = puzzles.get(room)
+            if puzzle is not None and solved & puzzle[0] and flags & puzzle[1]:
+                reach(self.pack(room, flags ^ puzzle[1], solved ^ puzzle[0]), solve)
+                reach(self.pack(room, flags, solved ^ puzzle[0]), solve)
+
+        return table
+
+
+class HintTable:
+    """
+    Таблица подсказок: для каждого состояния модели (см. HintModel) —
+    следующее действие на кратчайшем пути к победе. Подсказка — одно
+    обращение к таблице по номеру состояния. Таблица с диска отображается
+    в память и не читается целиком.
+    """
+
+    def __init__(self, model: HintModel, table: bytes | bytearray | memoryview) -> None:
+        self.model = model
+        self.table = table
+
+    def hint(self, game_state: GameState) -> str | None:
+        """
+        Возвращает следующее действие для сессии или None,
+        если из этого состояния победить нельзя.
+        """
+        action = self.table[self.model.state_of(game_state)]
+        if action == NO_ACTION:
+            return None
+        return self.model.actions[action - 1]
+
+
+def write_hints(path: str, world: dict[str, Any] | None = None) -> HintModel:
+    """
+    Считает таблицу подсказок для карты и сохраняет её в файл:
+    заголовок, список действий в JSON и таблица по байту на состояние.
+    """
+    world = world if world is not None else ROOMS
+    model = HintModel(world)
+    table = model.build()
+    actions = json.dumps(model.actions, ensure_ascii=False).encode("utf-8")
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as hints_file:
+        hints_file.write(
+            HINTS_HEADER.pack(
+                HINTS_MAGIC,
+                world_version(world),
+                *model.layout,
+                len(actions),
+            )
+        )
+        hints_file.write(actions)
+        hints_file.write(table)
+    os.replace(temporary_path, path)
+    return model
+
+
+def load_hints(path: str, world: dict[str, Any] | None = None) -> HintTable:
+    """
+    Открывает файл подсказок, отображая таблицу в память, и делает его
+    таблицей подсказок карты (см. get_hint_table).
+    """
+    world = world if world is not None else ROOMS
+    model = HintModel(world)
+    with open(path, "rb") as hints_file:
+        data = mmap.mmap(hints_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, *layout, actions_size = HINTS_HEADER.unpack_from(data)
+    if magic != HINTS_MAGIC:
+        raise ValueError(f"{path} не является файлом подсказок.")
+    start = HINTS_HEADER.size + actions_size
+    actions = tuple(json.loads(data[HINTS_HEADER.size : start].decode("utf-8")))
+    if (
+        version != world_version(world)
+        or layout != model.layout
+        or actions != model.actions
+        or len(data) < start + model.size
+    ):
+        raise ValueError("Подсказки посчитаны для другой версии карты.")
+
+    table = HintTable(model, memoryview(data)[start : start + model.size])
+    _tables[id(world)] = (world, table)
+    return table
+
+
+_tables: dict[int, tuple[dict[str, Any], HintTable]] = {}
+
+
+def prepare_hints(
+    world: dict[str, Any] | None = None, path: str | None = None
+) -> HintTable:
+    """
+    Готовит таблицу подсказок карты при запуске: загружает её из файла
+    path или считает в памяти. При первой подсказке таблица не считается:
+    на большой карте это остановило бы цикл событий сервера или шард.
+    """
+    world = world if world is not None else ROOMS
+    if path is not None:
+        return load_hints(path, world)
+    model = HintModel(world)
+    table = HintTable(model, model.build())
+    _tables[id(world)] = (world, table)
+    return table
+
+
+def get_hint_table(world: dict[str, Any]) -> HintTable | None:
+    """
+    Возвращает таблицу подсказок карты, подготовленную prepare_hints
+    или load_hints, или None, если её не готовили.
+    """
+    entry = _tables.get(id(world))
+    if entry is None or entry[0] is not world:
+        return None
+    return entry[1]
+
+
+def main() -> None:
+    """
+    Точка входа: считает таблицу подсказок для карты и сохраняет её.
+    """
+    parser = argparse.ArgumentParser(description="Таблица подсказок лабиринта")
+    parser.add_argument("output", help="файл таблицы подсказок")
+    parser.add_argument("--world", help="файл или каталог чанков карты")
+    args = parser.parse_args()
+
+    world = open_world(args.world) if args.world else ROOMS
+    model = write_hints(args.output, world)
+    print(f"Подсказки для {model.size} состояний сохранены в {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
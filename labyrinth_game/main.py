@@ -1,90 +1,178 @@
-from typing import Any
-
+from labyrinth_game.commands import (
+    COMMAND_SEPARATOR,
+    COMMAND_WORDS,
+    get_parser,
+    split_commands,
+)
+from labyrinth_game.events import (
+    AMBIGUOUS_COMMAND,
+    DIRECTION_REQUIRED,
+    GAME_FINISHED,
+    GAME_WON,
+    ITEM_REQUIRED,
+    PLAYER_QUIT,
+    ROOM_REQUIRED,
+    UNKNOWN_COMMAND,
+    Event,
+)
+from labyrinth_game.hints import prepare_hints
 from labyrinth_game.player_actions import (
     get_input,
     move_player,
+    show_hint,
     show_inventory,
+    show_route,
     take_item,
+    travel_to,
     use_item,
 )
+from labyrinth_game.render import PROMPT_TEXTS, render_events
+from labyrinth_game.state import GameState
 from labyrinth_game.utils import (
+    answer_prompt,
     attempt_open_treasure,
     describe_current_room,
     show_help,
     solve_puzzle,
 )
+from labyrinth_game.world import DIRECTIONS, create_game_state, get_world
 
-game_state: dict[str, Any] = {
-    "player_inventory": [],
-    "current_room": "entrance",
-    "game_over": False,
-    "steps_taken": 0,
-}
+# Команды, которые только показывают игроку состояние и ничего не меняют.
+READ_ONLY_COMMANDS = frozenset({"look", "inventory", "path", "hint", "help"})
 
+game_state: GameState = create_game_state()
 
-def process_command(game_state: dict[str, Any], command: str):
+
+def process_command(game_state: GameState, command: str) -> list[Event]:
     """
-    Обрабатывает введённую пользователем команду и вызывает соответствующую функцию.
+    Обрабатывает строку ввода и возвращает события всех её команд.
+    В строке может быть несколько команд через «;» («n; n; take torch»):
+    они выполняются по очереди, пока игра не закончится.
+    Если сессия ждёт ответа на вопрос, команда передаётся этому вопросу.
+    Функция никогда не блокируется в ожидании ввода и ничего не выводит.
     """
-    parts = command.strip().lower().split(maxsplit=1)
-    cmd = parts[0]
-    arg = parts[1] if len(parts) > 1 else None
+    if COMMAND_SEPARATOR in command:
+        events = []
+        for part in split_commands(command):
+            if game_state.game_over:
+                break
+            events.extend(process_command(game_state, part))
+        return events
+
+    if game_state.pending_prompt:
+        return _announce_victory(answer_prompt(game_state, command))
+
+    parser = get_parser(game_state.world)
+    parsed = parser.parse(command)
+    if parsed is None:
+        return []
+    cmd, arg = parsed
 
     match cmd:
-        case "look" | "describe":
-            describe_current_room(game_state)
-        case "inventory" | "inv":
-            show_inventory(game_state)
+        case "look":
+            return describe_current_room(game_state)
+        case "inventory":
+            return show_inventory(game_state)
         case "north" | "south" | "east" | "west":
-            move_player(game_state, cmd)
+            return move_player(game_state, cmd)
         case "go":
-            if arg and arg in ["north", "south", "east", "west"]:
-                move_player(game_state, arg)
-            else:
-                print("Укажите направление. Пример: go north")
+            if arg in DIRECTIONS:
+                return move_player(game_state, arg)
+            return [Event(DIRECTION_REQUIRED)]
+        case "goto":
+            if arg:
+                return travel_to(game_state, arg)
+            return [Event(ROOM_REQUIRED, ("goto",))]
+        case "path":
+            if arg:
+                return show_route(game_state, arg)
+            return [Event(ROOM_REQUIRED, ("path",))]
         case "take":
             if arg:
-                take_item(game_state, arg)
-            else:
-                print("Укажите предмет для взятия. Пример: take torch")
+                return take_item(game_state, arg)
+            return [Event(ITEM_REQUIRED, ("take",))]
         case "use":
             if arg:
-                use_item(game_state, arg)
-            else:
-                print("Укажите предмет для использования. Пример: use torch")
+                return use_item(game_state, arg)
+            return [Event(ITEM_REQUIRED, ("use",))]
         case "solve":
-            if game_state.get("current_room") == "treasure_room":
-                success = attempt_open_treasure(game_state)
-                if success:
-                    game_state["game_over"] = True
-                    print("Поздравляем с победой! Игра завершена.")
-            else:
-                solve_puzzle(game_state)
+            if game_state.current_room == "treasure_room":
+                return _announce_victory(attempt_open_treasure(game_state, arg))
+            return solve_puzzle(game_state, arg)
+        case "hint":
+            return show_hint(game_state)
         case "help":
-            show_help()
-        case "quit" | "exit":
-            print("Вы вышли из игры. До новых встреч!")
-            game_state["game_over"] = True
+            return show_help()
+        case "quit":
+            game_state.game_over = True
+            return [Event(PLAYER_QUIT)]
         case _:
-            print("Неизвестная команда. Введите 'help' для справки.")
+            if parser.is_ambiguous(cmd):
+                candidates = ", ".join(parser.candidates(cmd))
+                return [Event(AMBIGUOUS_COMMAND, (cmd, candidates))]
+            return [Event(UNKNOWN_COMMAND, (cmd,))]
+
+
+def apply_command(game_state: GameState, command: str) -> None:
+    """
+    Выполняет команду только ради изменения состояния сессии: итог тот же,
+    что у process_command, но команды из READ_ONLY_COMMANDS и неизвестные
+    команды пропускаются, а события не возвращаются. Так проигрывается
+    журнал команд.
+    """
+    if not game_state.pending_prompt and COMMAND_SEPARATOR not in command:
+        parsed = get_parser(game_state.world).parse(command)
+        if (
+            parsed is None
+            or parsed[0] in READ_ONLY_COMMANDS
+            or parsed[0] not in COMMAND_WORDS
+        ):
+            return
+    process_command(game_state, command)
+
+
+def _announce_victory(events: list[Event]) -> list[Event]:
+    """
+    Добавляет поздравление, если сундук с сокровищами открыт.
+    """
+    if Event(GAME_WON, ("treasure",)) in events:
+        events.append(Event(GAME_FINISHED))
+    return events
+
+
+def get_prompt(game_state: GameState) -> str:
+    """
+    Возвращает приглашение к вводу с учётом вопроса, которого ждёт сессия.
+    """
+    return PROMPT_TEXTS.get(game_state.pending_prompt, "> ")
+
+
+def print_events(events: list[Event]) -> None:
+    """
+    Выводит текст событий в консоль.
+    """
+    text = render_events(events)
+    if text:
+        print(text)
 
 
 def main() -> None:
     """
     Основной игровой цикл.
     """
+    prepare_hints(get_world(game_state))
     print("Добро пожаловать в Лабиринт сокровищ!\n")
     print("Введите 'help' для просмотра доступных команд.\n")
 
-    describe_current_room(game_state)
+    print_events(describe_current_room(game_state))
 
-    while not game_state["game_over"]:
-        command = get_input("> ")
+    while not game_state.game_over:
+        command = get_input(get_prompt(game_state))
 
         if command:
-            process_command(game_state, command)
+            print_events(process_command(game_state, command))
 
-    print(f"\nИгра завершена! Вы сделали {game_state['steps_taken']} шагов.")
+    print(f"\nИгра завершена! Вы сделали {game_state.steps_taken} шагов.")
 
 
 if __name__ == "__main__":
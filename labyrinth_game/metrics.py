@@ -0,0 +1,233 @@
+import json
+import os
+import time
+from array import array
+from collections import Counter
+from typing import Any
+
+from labyrinth_game.commands import COMMAND_SEPARATOR, COMMAND_WORDS, get_parser
+from labyrinth_game.events import (
+    COIN_FOUND,
+    FLOOR_GAVE_WAY,
+    FLOOR_GLINTS,
+    ITEM_LOST,
+    ONLY_DUST,
+    PLAYER_DIED,
+    PLAYER_THROWN,
+    PUZZLE_FAILED,
+    PUZZLE_SOLVED,
+    RUSTLE_HEARD,
+    TRAP_AVOIDED,
+    TRAP_SURVIVED,
+    TRAP_TRIGGERED,
+    Event,
+)
+from labyrinth_game.main import process_command
+from labyrinth_game.state import GameState
+
+# Точность гистограммы: 2**PRECISION_BITS корзин на каждую степень двойки,
+# относительная погрешность не больше 1 / 2**PRECISION_BITS (около 3 %).
+PRECISION_BITS = 5
+# Значения больше 2**MAX_BITS наносекунд (около 68 секунд) попадают в последнюю
+# корзину.
+MAX_BITS = 36
+SUB_BUCKETS = 1 << PRECISION_BITS
+BUCKETS = (MAX_BITS - PRECISION_BITS + 1) * SUB_BUCKETS
+PERCENTILES = (50, 90, 99, 99.9)
+
+OTHER_COMMAND = "other"
+BATCH_COMMAND = "batch"
+
+COUNTED_EVENTS = frozenset(
+    {
+        FLOOR_GLINTS,
+        COIN_FOUND,
+        ONLY_DUST,
+        RUSTLE_HEARD,
+        FLOOR_GAVE_WAY,
+        TRAP_TRIGGERED,
+        TRAP_AVOIDED,
+        ITEM_LOST,
+        PLAYER_THROWN,
+        PLAYER_DIED,
+        TRAP_SURVIVED,
+        PUZZLE_SOLVED,
+        PUZZLE_FAILED,
+    }
+)
+
+
+def _bucket(value: int) -> int:
+    """
+    Возвращает номер корзины гистограммы для значения:
+    малые значения — по одному на корзину, дальше корзины растут
+    вместе со значением (старшие PRECISION_BITS + 1 бит).
+    """
+    if value < 2 * SUB_BUCKETS:
+        return max(value, 0)
+    shift = value.bit_length() - PRECISION_BITS - 1
+    index = shift * SUB_BUCKETS + (value >> shift)
+    return min(index, BUCKETS - 1)
+
+
+def _bucket_limit(index: int) -> int:
+    """
+    Возвращает наибольшее значение, которое попадает в корзину.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    top = index - shift * SUB_BUCKETS
+    return ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек в наносекундах в духе HdrHistogram:
+    логарифмически-линейные корзины в массиве фиксированного размера,
+    запись — одно сложение, память не зависит от числа замеров.
+    """
+
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.counts = array("Q", bytes(8 * BUCKETS))
+        self.count = 0
+        self.total = 0
+        self.minimum = 0
+        self.maximum = 0
+
+    def record(self, value: int) -> None:
+        """
+        Добавляет замер.
+        """
+        self.counts[_bucket(value)] += 1
+        if not self.count or value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percent: float) -> int:
+        """
+        Возвращает значение, не меньше которого percent процентов замеров
+        (с точностью до корзины).
+        """
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_limit(index), self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Возвращает сводку гистограммы (в микросекундах) для JSON.
+        """
+        result: dict[str, Any] = {"count": self.count}
+        if self.count:
+            result["mean_us"] = round(self.total / self.count / 1000, 3)
+            result["min_us"] = round(self.minimum / 1000, 3)
+            result["max_us"] = round(self.maximum / 1000, 3)
+            for percent in PERCENTILES:
+                result[f"p{percent}_us"] = round(self.percentile(percent) / 1000, 3)
+        return result
+
+
+def command_type(game_state: GameState, command: str) -> str:
+    """
+    Возвращает тип команды для статистики: ответ на вопрос сессии,
+    команда после раскрытия сокращений, batch для нескольких команд
+    в одной строке или other. Набор типов ограничен, поэтому произвольный
+    ввод игроков не раздувает статистику.
+    """
+    if game_state.pending_prompt:
+        return game_state.pending_prompt
+    if COMMAND_SEPARATOR in command:
+        return BATCH_COMMAND
+    parsed = get_parser(game_state.world).parse(command)
+    if parsed is not None and parsed[0] in COMMAND_WORDS:
+        return parsed[0]
+    return OTHER_COMMAND
+
+
+class Metrics:
+    """
+    Статистика выполнения команд: гистограмма задержек на каждый тип
+    команды и счётчики игровых событий (случайные события, ловушки,
+    потерянные предметы, загадки).
+    """
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.events: Counter[str] = Counter()
+
+    def run_command(self, game_state: GameState, command: str) -> list[Event]:
+        """
+        Выполняет команду через process_command и записывает её задержку
+        и события.
+        """
+        kind = command_type(game_state, command)
+        started = time.perf_counter_ns()
+        events = process_command(game_state, command)
+        self.observe(kind, time.perf_counter_ns() - started, events)
+        return events
+
+    def observe(self, kind: str, elapsed: int, events: list[Event]) -> None:
+        """
+        Записывает задержку команды (в наносекундах) и её события.
+        """
+        histogram = self.latency.get(kind)
+        if histogram is None:
+            histogram = self.latency[kind] = LatencyHistogram()
+        histogram.record(elapsed)
+        for event_kind, _ in events:
+            if event_kind in COUNTED_EVENTS:
+                self.events[event_kind] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Возвращает всю статистику для сохранения в JSON.
+        """
+        return {
+            "started": self.started,
+            "uptime": round(time.time() - self.started, 3),
+            "commands": {
+                kind: histogram.to_dict()
+                for kind, histogram in sorted(self.latency.items())
+            },
+            "events": dict(sorted(self.events.items())),
+        }
+
+    def dump(self, path: str) -> None:
+        """
+        Записывает статистику в файл JSON. Файл заменяется целиком,
+        поэтому читатель никогда не видит его недописанным.
+        """
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as stats_file:
+            json.dump(self.to_dict(), stats_file, ensure_ascii=False, indent=2)
+        os.replace(temporary_path, path)
+
+    def report(self) -> str:
+        """
+        Возвращает статистику текстом для команды stats.
+        """
+        lines = [f"Статистика за {time.time() - self.started:.0f} с:"]
+        for kind, histogram in sorted(self.latency.items()):
+            lines.append(
+                f"  {kind:<16} {histogram.count:>8} команд, "
+                f"p50 {histogram.percentile(50) / 1000:.1f} мкс, "
+                f"p99 {histogram.percentile(99) / 1000:.1f} мкс, "
+                f"макс. {histogram.maximum / 1000:.1f} мкс"
+            )
+        if not self.latency:
+            lines.append("  Команд пока не было.")
+        for kind, count in sorted(self.events.items()):
+            lines.append(f"  {kind:<16} {count:>8}")
+        return "\n".join(lines)
@@ -0,0 +1,493 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.commands import COMMAND_SEPARATOR, get_parser, split_commands
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import (
+    ITEM_DROPPED,
+    ITEM_REQUIRED,
+    ITEM_TAKEN,
+    PLAYER_DROPPED,
+    PLAYER_ENTERED,
+    PLAYER_LEFT,
+    PLAYER_TOOK,
+    PLAYERS_HERE,
+    ROOM_DESCRIBED,
+    Event,
+)
+from labyrinth_game.hints import prepare_hints
+from labyrinth_game.main import process_command
+from labyrinth_game.player_actions import drop_item, find_route
+from labyrinth_game.state import GameState, get_registry
+from labyrinth_game.utils import describe_current_room
+from labyrinth_game.world import DIRECTIONS, create_game_state
+from labyrinth_game.world_loader import open_world
+
+SHARDS = 4
+
+# Личное состояние игрока, которое пересылается шарду вместе с командой:
+# комната, шаги, конец игры, ожидаемый вопрос, решённые загадки, инвентарь
+# и seed случайных событий.
+PlayerState = tuple[str, int, bool, str | None, frozenset[int], tuple[str, ...], int]
+# Сообщение другому игроку: номер игрока и событие для него.
+Notice = tuple[int, Event]
+
+ITEM_NOTICES = {ITEM_TAKEN: PLAYER_TOOK, ITEM_DROPPED: PLAYER_DROPPED}
+
+
+def export_player(game_state: GameState) -> PlayerState:
+    """
+    Возвращает личное состояние игрока без изменений комнат.
+    """
+    return (
+        game_state.current_room,
+        game_state.steps_taken,
+        game_state.game_over,
+        game_state.pending_prompt,
+        game_state.solved_rooms,
+        tuple(game_state.inventory),
+        game_state.seed,
+    )
+
+
+def import_player(game_state: GameState, state: PlayerState) -> None:
+    """
+    Переносит личное состояние игрока в game_state.
+    """
+    (
+        game_state.current_room,
+        game_state.steps_taken,
+        game_state.game_over,
+        game_state.pending_prompt,
+        game_state.solved_rooms,
+        items,
+        game_state.seed,
+    ) = state
+    game_state.player_inventory = items
+
+
+class RoomPartition:
+    """
+    Распределение комнат по шардам непрерывными блоками номеров комнат,
+    чтобы соседние комнаты чаще принадлежали одному шарду. Размеры блоков
+    отличаются не больше чем на комнату, поэтому у каждого шарда есть
+    комнаты, если комнат не меньше, чем шардов. Для карты из чанков
+    блок — чанк, и шарды сверх числа чанков комнат не получают.
+    """
+
+    __slots__ = ("registry", "shards", "rooms", "chunks")
+
+    def __init__(self, world: dict[str, Any], shards: int) -> None:
+        if shards < 1:
+            raise ValueError("Нужен хотя бы один шард.")
+        self.registry = get_registry(world)
+        self.shards = shards
+        self.chunks = world if isinstance(world, ChunkedWorld) else None
+        self.rooms = max(1, len(world))
+
+    def owner(self, room_key: str) -> int:
+        """
+        Возвращает номер шарда, которому принадлежит комната.
+        """
+        room_id = self.registry.room_ids[room_key]
+        if self.chunks is not None:
+            return self.chunks.chunk_of(room_id) % self.shards
+        return room_id * self.shards // self.rooms
+
+
+class _OwnedRooms(dict):
+    """
+    Изменения предметов в комнатах одного шарда.
+    Запись в комнату другого шарда — ошибка: такие комнаты меняет
+    только их владелец.
+    """
+
+    def __init__(self, partition: RoomPartition, index: int) -> None:
+        super().__init__()
+        self.partition = partition
+        self.index = index
+
+    def _check(self, room_key: str) -> None:
+        if self.partition.owner(room_key) != self.index:
+            raise RuntimeError(f"Комната {room_key} принадлежит другому шарду.")
+
+    def __setitem__(self, room_key: str, value: Any) -> None:
+        self._check(room_key)
+        super().__setitem__(room_key, value)
+
+    def setdefault(self, room_key: str, default: Any = None) -> Any:
+        self._check(room_key)
+        return super().setdefault(room_key, default)
+
+
+class RoomShard:
+    """
+    Владелец части комнат общей карты: хранит общие для всех игроков
+    изменения предметов в своих комнатах и список игроков в каждой из них.
+    Команды шард выполняет по одной, поэтому взять предмет может только
+    один игрок, а проверка и изъятие предмета не разрываются.
+    Личное состояние игрока шард не хранит: оно приходит с командой
+    и возвращается с ответом.
+    """
+
+    def __init__(self, world: dict[str, Any], index: int, shards: int) -> None:
+        self.world = world
+        self.index = index
+        self.partition = RoomPartition(world, shards)
+        self.presence: dict[str, dict[int, None]] = {}
+        self._game_state = create_game_state(world)
+        self._game_state.removed_items = _OwnedRooms(self.partition, index)
+        self._game_state.added_items = _OwnedRooms(self.partition, index)
+
+    def _player(self, state: PlayerState) -> GameState:
+        """
+        Возвращает состояние для выполнения команды: личные данные игрока
+        поверх общих изменений комнат шарда.
+        """
+        import_player(self._game_state, state)
+        return self._game_state
+
+    def execute(
+        self, player: int, state: PlayerState, command: str
+    ) -> tuple[PlayerState, list[Event], list[Notice]]:
+        """
+        Выполняет одну команду игрока и возвращает его новое состояние,
+        события для него и сообщения другим игрокам в комнате.
+        Если игрок перешёл, шард сам переводит его между своими комнатами;
+        комнаты других шардов обновляет вызывающий.
+        """
+        previous_room = state[0]
+        game_state = self._player(state)
+        parsed = None
+        if not game_state.pending_prompt:
+            parsed = get_parser(self.world).parse(command)
+
+        if parsed is not None and parsed[0] == "drop":
+            item = parsed[1]
+            if item:
+                events = drop_item(game_state, item)
+            else:
+                events = [Event(ITEM_REQUIRED, ("drop",))]
+        else:
+            events = process_command(game_state, command)
+
+        notices = []
+        room_key = game_state.current_room
+        if self.partition.owner(room_key) == self.index:
+            others = self._others(player, room_key)
+            events = _add_presence(events, room_key, others)
+            for kind, args in events:
+                notice = ITEM_NOTICES.get(kind)
+                if notice is not None:
+                    notices.extend(
+                        (other, Event(notice, (player, *args))) for other in others
+                    )
+
+        if room_key != previous_room:
+            if self.partition.owner(previous_room) == self.index:
+                notices.extend(self.leave(player, previous_room))
+            if self.partition.owner(room_key) == self.index:
+                notices.extend(self.enter(player, room_key))
+        return export_player(game_state), events, notices
+
+    def describe(self, player: int, state: PlayerState) -> list[Event]:
+        """
+        Описывает текущую комнату игрока вместе с другими игроками в ней.
+        """
+        game_state = self._player(state)
+        room_key = game_state.current_room
+        events = describe_current_room(game_state)
+        return _add_presence(events, room_key, self._others(player, room_key))
+
+    def enter(self, player: int, room_key: str) -> list[Notice]:
+        """
+        Отмечает игрока в комнате и сообщает об этом остальным.
+        """
+        others = self._others(player, room_key)
+        self.presence.setdefault(room_key, {})[player] = None
+        return [(other, Event(PLAYER_ENTERED, (player,))) for other in others]
+
+    def leave(self, player: int, room_key: str) -> list[Notice]:
+        """
+        Убирает игрока из комнаты и сообщает об этом остальным.
+        """
+        players = self.presence.get(room_key)
+        if not players or player not in players:
+            return []
+        del players[player]
+        if not players:
+            del self.presence[room_key]
+        return [(other, Event(PLAYER_LEFT, (player,))) for other in players]
+
+    def _others(self, player: int, room_key: str) -> list[int]:
+        return [other for other in self.presence.get(room_key, ()) if other != player]
+
+
+def _add_presence(events: list[Event], room_key: str, others: list[int]) -> list[Event]:
+    """
+    Добавляет после описания комнаты список других игроков в ней.
+    """
+    if not others:
+        return events
+    for position in range(len(events) - 1, -1, -1):
+        kind, args = events[position]
+        if kind == ROOM_DESCRIBED and args[0] == room_key:
+            events.insert(position + 1, Event(PLAYERS_HERE, (tuple(others),)))
+            break
+    return events
+
+
+def _replace_description(events: list[Event], description: list[Event]) -> list[Event]:
+    """
+    Заменяет последнее описание комнаты в событиях новым.
+    """
+    for position in range(len(events) - 1, -1, -1):
+        if events[position].kind == ROOM_DESCRIBED:
+            return events[:position] + description + events[position + 1 :]
+    return events + description
+
+
+class ShardError(RuntimeError):
+    """
+    Шард не смог выполнить вызов. Сам шард продолжает работать.
+    """
+
+
+def _run_shard(
+    world_path: str | None,
+    hints: bool,
+    hints_path: str | None,
+    index: int,
+    shards: int,
+    connection: Connection,
+) -> None:
+    """
+    Цикл процесса-шарда: готовит карту и, если hints, подсказки, затем
+    получает вызовы (метод, аргументы) и отвечает их результатами,
+    пока не придёт None.
+    """
+    world = open_world(world_path) if world_path else ROOMS
+    if hints:
+        prepare_hints(world, hints_path)
+    shard = RoomShard(world, index, shards)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, args = request
+        # Ошибка одной команды не должна останавливать шард со всеми его
+        # комнатами: она возвращается вызывающему вместо результата.
+        try:
+            reply = (True, getattr(shard, method)(*args))
+        except Exception as error:
+            reply = (False, f"{method}: {error!r}")
+        connection.send(reply)
+    connection.close()
+
+
+class SharedWorld:
+    """
+    Общая карта для нескольких игроков. Комнаты разделены между шардами
+    (см. RoomPartition); каждый шард — отдельный процесс, который выполняет
+    команды игроков в своих комнатах по очереди. Запросы к разным шардам
+    идут параллельно, общей блокировки нет.
+    Команда выполняется шардом комнаты, где она меняет предметы: переход —
+    шардом комнаты назначения, goto — по одному переходу, остальные —
+    шардом текущей комнаты.
+    С processes=False шарды работают в текущем процессе (для отладки).
+    С hints=True каждый шард готовит таблицу подсказок при запуске
+    (см. prepare_hints); без них команда hint недоступна и комнаты карты
+    из чанков при запуске не читаются.
+    """
+
+    def __init__(
+        self,
+        world_path: str | None = None,
+        shards: int = SHARDS,
+        processes: bool = True,
+        hints: bool = False,
+        hints_path: str | None = None,
+    ) -> None:
+        self.world = open_world(world_path) if world_path else ROOMS
+        self.partition = RoomPartition(self.world, shards)
+        self._local: list[RoomShard] = []
+        self._connections: list[Connection] = []
+        self._processes: list[multiprocessing.Process] = []
+        self._executors: list[ThreadPoolExecutor] = []
+
+        if not processes:
+            if hints:
+                prepare_hints(self.world, hints_path)
+            self._local = [
+                RoomShard(self.world, index, shards) for index in range(shards)
+            ]
+            return
+
+        context = multiprocessing.get_context("spawn")
+        for index in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_run_shard,
+                args=(world_path, hints, hints_path, index, shards, child),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+            # Один поток на шард: вызовы одного шарда не перемешиваются в канале.
+            self._executors.append(ThreadPoolExecutor(1))
+
+    async def _call(self, shard: int, method: str, *args: Any) -> Any:
+        """
+        Вызывает метод шарда и ждёт результата, не блокируя цикл событий.
+        """
+        if self._local:
+            try:
+                return getattr(self._local[shard], method)(*args)
+            except Exception as error:
+                raise ShardError(f"{method}: {error!r}") from error
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executors[shard], self._request, shard, method, args
+        )
+
+    def _request(self, shard: int, method: str, args: tuple[Any, ...]) -> Any:
+        connection = self._connections[shard]
+        connection.send((method, args))
+        ok, result = connection.recv()
+        if not ok:
+            raise ShardError(result)
+        return result
+
+    async def join(
+        self, player: int, game_state: GameState
+    ) -> tuple[list[Event], list[Notice]]:
+        """
+        Вводит игрока в его комнату: возвращает описание комнаты
+        и сообщения другим игрокам.
+        """
+        room_key = game_state.current_room
+        shard = self.partition.owner(room_key)
+        notices = await self._call(shard, "enter", player, room_key)
+        events = await self._call(shard, "describe", player, export_player(game_state))
+        return events, notices
+
+    async def leave(self, player: int, game_state: GameState) -> list[Notice]:
+        """
+        Убирает игрока из общей карты.
+        """
+        room_key = game_state.current_room
+        return await self._call(
+            self.partition.owner(room_key), "leave", player, room_key
+        )
+
+    async def run_command(
+        self, player: int, game_state: GameState, command: str
+    ) -> tuple[list[Event], list[Notice]]:
+        """
+        Выполняет строку ввода игрока (можно несколько команд через «;»)
+        и возвращает события для него и сообщения другим игрокам.
+        """
+        if COMMAND_SEPARATOR in command:
+            events: list[Event] = []
+            notices: list[Notice] = []
+            for part in split_commands(command):
+                if game_state.game_over:
+                    break
+                part_events, part_notices = await self.run_command(
+                    player, game_state, part
+                )
+                events.extend(part_events)
+                notices.extend(part_notices)
+            return events, notices
+
+        room_key = game_state.current_room
+        if game_state.pending_prompt:
+            return await self._step(player, game_state, command, room_key)
+
+        parsed = get_parser(self.world).parse(command)
+        if parsed is None:
+            return [], []
+        cmd, arg = parsed
+        if cmd == "goto" and arg:
+            return await self._travel(player, game_state, arg)
+
+        direction = arg if cmd == "go" else cmd
+        if direction in DIRECTIONS:
+            room_key = self.world[room_key]["exits"].get(direction, room_key)
+        return await self._step(player, game_state, command, room_key)
+
+    async def _step(
+        self, player: int, game_state: GameState, command: str, room_key: str
+    ) -> tuple[list[Event], list[Notice]]:
+        """
+        Выполняет команду на шарде комнаты room_key и переводит игрока
+        между комнатами, если он перешёл.
+        """
+        previous_room = game_state.current_room
+        shard = self.partition.owner(room_key)
+        state, events, notices = await self._call(
+            shard, "execute", player, export_player(game_state), command
+        )
+        import_player(game_state, state)
+
+        current_room = game_state.current_room
+        owner = self.partition.owner(current_room)
+        if owner != shard:
+            # Игрока отбросило в комнату другого шарда: описание этой комнаты
+            # с её предметами знает только владелец.
+            description = await self._call(owner, "describe", player, state)
+            events = _replace_description(events, description)
+
+        if current_room != previous_room:
+            previous_owner = self.partition.owner(previous_room)
+            if previous_owner != shard:
+                notices.extend(
+                    await self._call(previous_owner, "leave", player, previous_room)
+                )
+            if owner != shard:
+                notices.extend(await self._call(owner, "enter", player, current_room))
+        return events, notices
+
+    async def _travel(
+        self, player: int, game_state: GameState, target: str
+    ) -> tuple[list[Event], list[Notice]]:
+        """
+        Ведёт игрока по кратчайшему пути: каждый переход выполняет шард
+        комнаты назначения, как в travel_to.
+        """
+        directions, events = find_route(game_state, target)
+        if directions is None:
+            return events, []
+
+        notices: list[Notice] = []
+        room_key = game_state.current_room
+        for direction in directions:
+            expected_key = self.world[room_key]["exits"][direction]
+            step_events, step_notices = await self._step(
+                player, game_state, direction, expected_key
+            )
+            events.extend(step_events)
+            notices.extend(step_notices)
+            room_key = game_state.current_room
+            if game_state.game_over or room_key != expected_key:
+                break
+        return events, notices
+
+    def close(self) -> None:
+        """
+        Останавливает процессы шардов.
+        """
+        for connection in self._connections:
+            connection.send(None)
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+        for executor in self._executors:
+            executor.shutdown()
@@ -1,25 +1,54 @@
-from typing import Any
-
-from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import (
+    ALREADY_HERE,
+    DOOR_LOCKED,
+    DOOR_UNLOCKED,
+    GAME_WON,
+    HINT_SHOWN,
+    HINTS_UNAVAILABLE,
+    INVENTORY_SHOWN,
+    ITEM_DROPPED,
+    ITEM_FOUND,
+    ITEM_NOT_HERE,
+    ITEM_NOT_OWNED,
+    ITEM_TAKEN,
+    ITEM_TOO_HEAVY,
+    ITEM_UNKNOWN_USE,
+    ITEM_USED,
+    ITEM_USELESS_HERE,
+    LOCATION_UNKNOWN,
+    MOVED,
+    NO_EXIT,
+    NO_HINT,
+    NO_ROUTE,
+    PORTAL_ACTIVATED,
+    ROOM_INVALID,
+    ROUTE_SHOWN,
+    UNKNOWN_ROOM,
+    Event,
+)
+from labyrinth_game.hints import get_hint_table
+from labyrinth_game.routes import get_route_index
+from labyrinth_game.state import GameState
 from labyrinth_game.utils import (
     attempt_open_treasure,
     describe_current_room,
     random_event,
 )
+from labyrinth_game.world import (
+    add_room_item,
+    get_room,
+    get_room_gate,
+    get_world,
+    remove_room_item,
+)
 
 
-def show_inventory(game_state: dict[str, Any]) -> None:
+def show_inventory(game_state: GameState) -> list[Event]:
     """
-    Выводит содержимое инвентаря игрока.
+    Возвращает событие с содержимым инвентаря игрока.
     """
-    inventory = game_state.get("player_inventory", [])
-
-    if not inventory:
-        print("Ваш инвентарь пуст.")
-    else:
-        print("В вашем инвентаре:")
-        for item in inventory:
-            print(f" - {item}")
+    inventory = game_state.inventory
+    return [Event(INVENTORY_SHOWN, (tuple(inventory),))]
 
 
 def get_input(prompt: str = "> ") -> str | None:
@@ -33,103 +62,173 @@ def get_input(prompt: str = "> ") -> str | None:
         return "quit"
 
 
-def move_player(game_state: dict[str, Any], direction: str) -> None:
+def move_player(game_state: GameState, direction: str) -> list[Event]:
     """
     Перемещает игрока в указанном направлении, если это возможно.
     """
-    current_room_key = game_state.get("current_room")
+    current_room_key = game_state.current_room
     if not current_room_key:
-        print("Ошибка: текущее местоположение неизвестно.")
-        return
+        return [Event(LOCATION_UNKNOWN)]
 
-    room = ROOMS.get(current_room_key)
+    room = get_room(game_state, current_room_key)
     if not room:
-        print("Ошибка: текущая комната некорректна.")
-        return
+        return [Event(ROOM_INVALID)]
 
     exits = room.get("exits", {})
     next_room_key = exits.get(direction.lower())
 
-    if next_room_key:
-        if next_room_key == "treasure_room":
-            if "rusty key" in game_state.get("player_inventory", []):
-                print(
-                    "Вы используете найденный ключ,",
-                    "чтобы открыть путь в комнату сокровищ.",
-                )
-            else:
-                print("Дверь заперта. Нужен ключ, чтобы пройти дальше.")
-                return
+    if not next_room_key:
+        return [Event(NO_EXIT)]
+
+    events = []
+    gate_key = get_room_gate(game_state, next_room_key)
+    if gate_key is not None:
+        if gate_key in game_state.inventory:
+            events.append(Event(DOOR_UNLOCKED, (next_room_key,)))
+        else:
+            return [Event(DOOR_LOCKED, (next_room_key,))]
+
+    game_state.current_room = next_room_key
+    game_state.steps_taken = game_state.steps_taken + 1
+    events.append(Event(MOVED, (current_room_key, next_room_key)))
+    events.extend(describe_current_room(game_state))
+
+    events.extend(random_event(game_state))
+    return events
+
+
+def find_route(
+    game_state: GameState, target: str
+) -> tuple[list[str] | None, list[Event]]:
+    """
+    Ищет кратчайший путь из текущей комнаты до target с учётом ключей игрока.
+    Возвращает направления и события об ошибках, если пути нет.
+    """
+    world = get_world(game_state)
+    current_room_key = game_state.current_room
+    if target not in world:
+        return None, [Event(UNKNOWN_ROOM, (target,))]
+    if target == current_room_key:
+        return None, [Event(ALREADY_HERE, (target,))]
+
+    directions = get_route_index(world).route(
+        current_room_key, target, game_state.inventory
+    )
+    if directions is None:
+        return None, [Event(NO_ROUTE, (target,))]
+    return directions, []
+
+
+def show_route(game_state: GameState, target: str) -> list[Event]:
+    """
+    Показывает кратчайший путь до комнаты, не перемещая игрока.
+    """
+    directions, events = find_route(game_state, target)
+    if directions is None:
+        return events
+    return [Event(ROUTE_SHOWN, (target, tuple(directions)))]
+
+
+def travel_to(game_state: GameState, target: str) -> list[Event]:
+    """
+    Ведёт игрока до комнаты по кратчайшему пути за одну команду.
+    Каждая комната по пути проходится обычным переходом со случайными
+    событиями; путь прерывается, если игрока отбросило или игра окончена.
+    """
+    directions, events = find_route(game_state, target)
+    if directions is None:
+        return events
+
+    room_key = game_state.current_room
+    world = get_world(game_state)
+    for direction in directions:
+        expected_key = world[room_key]["exits"][direction]
+        events.extend(move_player(game_state, direction))
+        room_key = game_state.current_room
+        if game_state.game_over or room_key != expected_key:
+            break
+
+    return events
 
-        game_state["current_room"] = next_room_key
-        game_state["steps_taken"] = game_state.get("steps_taken", 0) + 1
-        describe_current_room(game_state)
 
-        random_event(game_state)
-    else:
-        print("Нельзя пойти в этом направлении.")
+def show_hint(game_state: GameState) -> list[Event]:
+    """
+    Подсказывает следующий шаг кратчайшего пути к победе.
+    Ответ загадки подсказка не раскрывает. Таблицу подсказок готовят
+    при запуске (prepare_hints).
+    """
+    table = get_hint_table(get_world(game_state))
+    if table is None:
+        return [Event(HINTS_UNAVAILABLE)]
+    action = table.hint(game_state)
+    if action is None:
+        return [Event(NO_HINT)]
+    return [Event(HINT_SHOWN, (action,))]
 
 
-def take_item(game_state: dict[str, Any], item_name: str) -> None:
+def take_item(game_state: GameState, item_name: str) -> list[Event]:
     """
     Позволяет игроку взять предмет из текущей комнаты.
     """
 
-    current_room_key = game_state.get("current_room")
+    current_room_key = game_state.current_room
     if not current_room_key:
-        print("Ошибка: текущее местоположение неизвестно.")
-        return
+        return [Event(LOCATION_UNKNOWN)]
 
-    room = ROOMS.get(current_room_key)
+    room = get_room(game_state, current_room_key)
     if not room:
-        print("Ошибка: текущая комната некорректна.")
-        return
-
-    room_items = room.get("items", [])
+        return [Event(ROOM_INVALID)]
 
     if item_name.lower() == "treasure chest":
-        print("Вы не можете поднять сундук, он слишком тяжелый.")
-        return
+        return [Event(ITEM_TOO_HEAVY, (item_name,))]
+
+    # Проверка и изъятие — одна операция: в общей игре предмет не достанется
+    # двоим игрокам.
+    if remove_room_item(game_state, current_room_key, item_name):
+        game_state.inventory.append(item_name)
+        return [Event(ITEM_TAKEN, (item_name,))]
 
-    if item_name in room_items:
-        game_state.setdefault("player_inventory", []).append(item_name)
-        room_items.remove(item_name)
-        print(f"Вы подняли: {item_name}")
-    else:
-        print("Такого предмета здесь нет.")
+    return [Event(ITEM_NOT_HERE, (item_name,))]
 
 
-def use_item(game_state: dict[str, Any], item_name: str) -> None:
+def drop_item(game_state: GameState, item_name: str) -> list[Event]:
+    """
+    Кладёт предмет из инвентаря в текущую комнату.
+    Используется в общей игре, где предметы комнат видят все игроки.
+    """
+    if item_name not in game_state.inventory:
+        return [Event(ITEM_NOT_OWNED, (item_name,))]
+
+    game_state.inventory.remove(item_name)
+    add_room_item(game_state, game_state.current_room, item_name)
+    return [Event(ITEM_DROPPED, (item_name,))]
+
+
+def use_item(game_state: GameState, item_name: str) -> list[Event]:
     """
     Использует предмет из инвентаря с уникальным эффектом для некоторых предметов.
     """
-    inventory = game_state.get("player_inventory", [])
+    inventory = game_state.inventory
 
     if item_name not in inventory:
-        print("У вас нет такого предмета.")
-        return
+        return [Event(ITEM_NOT_OWNED, (item_name,))]
 
-    if item_name == "torch":
-        print("Вы зажгли факел. Стало светлее, и вы видите окрестности лучше.")
-    elif item_name == "sword":
-        print("Вы держите меч в руках. Чувствуете уверенность и силу.")
+    if item_name in ("torch", "sword"):
+        return [Event(ITEM_USED, (item_name,))]
     elif item_name == "bronze box":
-        print("Вы открыли бронзовую шкатулку. Там только пыль.")
+        events = [Event(ITEM_USED, (item_name,))]
         if "rusty key" not in inventory:
             inventory.append("rusty key")
-            print("В шкатулке вы нашли: rusty key")
+            events.append(Event(ITEM_FOUND, ("rusty key",)))
+        return events
     elif item_name == "rusty key":
-        if game_state.get("current_room") == "treasure_room":
-            if attempt_open_treasure(game_state):
-                game_state["game_over"] = True
-        else:
-            print("Здесь не к чему применить этот ключ.")
+        if game_state.current_room == "treasure_room":
+            return attempt_open_treasure(game_state)
+        return [Event(ITEM_USELESS_HERE, (item_name,))]
     elif item_name == "portal_key":
-        if game_state.get("current_room") == "portal_room":
-            print("Вы используете ключ портала. Портал активируется!")
-            print("Поздравляем! Вы нашли выход из лабиринта!")
-            game_state["game_over"] = True
-        else:
-            print("Этот ключ можно использовать только в комнате с порталом.")
-    else:
-        print("Вы не знаете, как использовать этот предмет.")
+        if game_state.current_room == "portal_room":
+            game_state.game_over = True
+            return [Event(PORTAL_ACTIVATED), Event(GAME_WON, ("portal",))]
+        return [Event(ITEM_USELESS_HERE, (item_name,))]
+
+    return [Event(ITEM_UNKNOWN_USE, (item_name,))]
@@ -0,0 +1,150 @@
+import math
+
+import numpy as np
+
+from labyrinth_game.event_tables import (
+    ALIAS_BITS,
+    ALIAS_MASK,
+    DRAW_BITS,
+    GOLDEN_GAMMA,
+    MIX_MULTIPLIER_1,
+    MIX_MULTIPLIER_2,
+    SAMPLE_BITS,
+    SAMPLE_MASK,
+    SITE_BITS,
+    STREAM_INCREMENT,
+    STREAM_MULTIPLIER,
+    AliasSampler,
+)
+from labyrinth_game.utils import SIN_MULTIPLIER_1, SIN_MULTIPLIER_2
+
+LOW_32 = np.uint64(0xFFFFFFFF)
+# Граница расхождения np.sin и math.sin в x = sin(...) * SIN_MULTIPLIER_2,
+# с запасом в сотни ulp синуса (см. pseudo_random_batch).
+SINE_TOLERANCE = 1e-9
+
+
+def mix64_batch(values: np.ndarray) -> np.ndarray:
+    """
+    Векторная версия mix64 для массива uint64.
+    """
+    values = values ^ (values >> 30)
+    values = values * np.uint64(MIX_MULTIPLIER_1)
+    values = values ^ (values >> 27)
+    values = values * np.uint64(MIX_MULTIPLIER_2)
+    return values ^ (values >> 31)
+
+
+def stream_keys(seeds: np.ndarray) -> np.ndarray:
+    """
+    Возвращает ключи потоков (stream_key) для массива seed.
+    """
+    seeds = np.asarray(seeds, dtype=np.uint64)
+    return mix64_batch((seeds + np.uint64(1)) * np.uint64(GOLDEN_GAMMA))
+
+
+def _fold_product(state: np.ndarray) -> np.ndarray:
+    """
+    Считает (p >> 64) ^ p по модулю 2**64 для 128-битного произведения
+    p = state * (state ^ STREAM_MULTIPLIER): старшая половина собирается
+    из четырёх произведений 32-битных половин.
+    """
+    other = state ^ np.uint64(STREAM_MULTIPLIER)
+    state_low, state_high = state & LOW_32, state >> 32
+    other_low, other_high = other & LOW_32, other >> 32
+    low_low = state_low * other_low
+    low_high = state_low * other_high
+    high_low = state_high * other_low
+    middle = (low_low >> 32) + (low_high & LOW_32) + (high_low & LOW_32)
+    high = (
+        state_high * other_high + (low_high >> 32) + (high_low >> 32) + (middle >> 32)
+    )
+    return high ^ (state * other)
+
+
+def stream_words(
+    keys: np.ndarray, steps: np.ndarray, site: int, index: int = 1
+) -> np.ndarray:
+    """
+    Возвращает для каждого потока (ключ, число шагов) его 64-битное число
+    с номером index — то же, что index-й вызов RandomStream.next.
+    """
+    steps = np.asarray(steps, dtype=np.uint64)
+    counter = ((steps << SITE_BITS) | np.uint64(site)) << DRAW_BITS
+    state = keys + (counter + np.uint64(index)) * np.uint64(STREAM_INCREMENT)
+    return _fold_product(state)
+
+
+def first_samples(keys: np.ndarray, steps: np.ndarray, site: int) -> np.ndarray:
+    """
+    Возвращает первый розыгрыш каждого потока — то же, что первый вызов
+    RandomStream.sample.
+    """
+    return stream_words(keys, steps, site) & np.uint64(SAMPLE_MASK)
+
+
+def alias_samples(sampler: AliasSampler, words: np.ndarray) -> np.ndarray:
+    """
+    Векторная версия AliasSampler.sample: номер исхода для каждого
+    64-битного числа потока (см. stream_words). Половины числа и размеры
+    выборки меньше 2**ALIAS_BITS, поэтому произведения помещаются в uint64.
+    """
+    shift = np.uint64(ALIAS_BITS)
+    columns = ((words & np.uint64(ALIAS_MASK)) * np.uint64(sampler.size)) >> shift
+    coins = ((words >> shift) * np.uint64(sampler.total)) >> shift
+    columns = columns.astype(np.int64)
+    thresholds = np.asarray(sampler.thresholds, dtype=np.int64)
+    aliases = np.asarray(sampler.aliases, dtype=np.int64)
+    return np.where(
+        coins.astype(np.int64) < thresholds[columns], columns, aliases[columns]
+    )
+
+
+def below_batch(samples: np.ndarray, bounds: np.ndarray | int) -> np.ndarray:
+    """
+    Векторная версия RandomStream.below для уже взятых розыгрышей.
+    """
+    return samples.astype(np.int64) * np.asarray(bounds, dtype=np.int64) >> SAMPLE_BITS
+
+
+def compute_fractions(seeds: np.ndarray) -> np.ndarray:
+    """
+    Считает дробные части pseudo_fraction для массива seed через np.sin.
+    Векторный синус может расходиться с math.sin в последних битах.
+    """
+    x = np.sin(seeds.astype(np.float64) * SIN_MULTIPLIER_1) * SIN_MULTIPLIER_2
+    return x - np.floor(x)
+
+
+def exact_fractions(seeds: np.ndarray) -> np.ndarray:
+    """
+    Считает дробные части через math.sin — бит в бит как pseudo_fraction.
+    """
+    angles = seeds.astype(np.float64) * SIN_MULTIPLIER_1
+    sines = np.fromiter(map(math.sin, angles.tolist()), np.float64, len(angles))
+    x = sines * SIN_MULTIPLIER_2
+    return x - np.floor(x)
+
+
+def pseudo_random_batch(seeds: np.ndarray, moduli: np.ndarray | int) -> np.ndarray:
+    """
+    Векторная версия pseudo_random: для каждой пары (seed, modulo)
+    возвращает то же число, что и pseudo_random, бит в бит.
+    Массивы seed и modulo согласуются по правилам NumPy: дробная часть
+    считается один раз на элемент seeds и годится для всех его modulo
+    (seeds[:, None] и строка modulo дают таблицу seed × modulo).
+    Числа, которые лежат ближе SINE_TOLERANCE * modulo к границе целого
+    и могли бы сдвинуться из-за последних битов np.sin, пересчитываются
+    через math.sin; таких единицы на миллион.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64)
+    fractions, moduli = np.broadcast_arrays(
+        compute_fractions(seeds), np.asarray(moduli, dtype=np.float64)
+    )
+    scaled = fractions * moduli
+
+    doubtful = np.abs(scaled - np.rint(scaled)) <= moduli * SINE_TOLERANCE
+    if doubtful.any():
+        seeds = np.broadcast_to(seeds, scaled.shape)
+        scaled[doubtful] = exact_fractions(seeds[doubtful]) * moduli[doubtful]
+    return scaled.astype(np.int64)
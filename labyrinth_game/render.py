@@ -0,0 +1,319 @@
+from typing import Any, Iterable
+
+from labyrinth_game.constants import COMMANDS
+from labyrinth_game.events import (
+    ALREADY_HERE,
+    AMBIGUOUS_COMMAND,
+    CHEST_ALREADY_OPEN,
+    CHEST_LEFT,
+    CHEST_LOCKED,
+    CHEST_MISSING,
+    CHEST_OPENED,
+    COIN_FOUND,
+    COMMAND_FAILED,
+    DIRECTION_REQUIRED,
+    DOOR_LOCKED,
+    DOOR_UNLOCKED,
+    FLOOR_GAVE_WAY,
+    FLOOR_GLINTS,
+    GAME_FINISHED,
+    GAME_WON,
+    HELP_SHOWN,
+    HINT_SHOWN,
+    HINTS_UNAVAILABLE,
+    INVENTORY_SHOWN,
+    ITEM_DROPPED,
+    ITEM_FOUND,
+    ITEM_LOST,
+    ITEM_NOT_HERE,
+    ITEM_NOT_OWNED,
+    ITEM_REQUIRED,
+    ITEM_TAKEN,
+    ITEM_TOO_HEAVY,
+    ITEM_UNKNOWN_USE,
+    ITEM_USED,
+    ITEM_USELESS_HERE,
+    LOCATION_UNKNOWN,
+    MOVED,
+    NO_EXIT,
+    NO_HINT,
+    NO_PUZZLE,
+    NO_ROUTE,
+    ONLY_DUST,
+    PLAYER_DIED,
+    PLAYER_DROPPED,
+    PLAYER_ENTERED,
+    PLAYER_LEFT,
+    PLAYER_QUIT,
+    PLAYER_THROWN,
+    PLAYER_TOOK,
+    PLAYERS_HERE,
+    PORTAL_ACTIVATED,
+    PUZZLE_FAILED,
+    PUZZLE_SHOWN,
+    PUZZLE_SOLVED,
+    ROOM_DESCRIBED,
+    ROOM_INVALID,
+    ROOM_REQUIRED,
+    ROUTE_SHOWN,
+    RUSTLE_ENDED,
+    RUSTLE_HEARD,
+    TRAP_AVOIDED,
+    TRAP_SURVIVED,
+    TRAP_TRIGGERED,
+    UNKNOWN_COMMAND,
+    UNKNOWN_ROOM,
+    WRONG_CODE,
+    Event,
+)
+
+ENCODING = "utf-8"
+# Сколько закодированных описаний комнат хранит encode_events.
+ROOM_BYTES_CACHE_SIZE = 1 << 16
+
+PROMPT_TEXTS = {
+    "puzzle_answer": "Ваш ответ: ",
+    "treasure_confirm": "Ввести код? (да/нет): ",
+    "treasure_code": "Введите код: ",
+}
+
+MESSAGES = {
+    MOVED: None,
+    NO_EXIT: "Нельзя пойти в этом направлении.",
+    DOOR_LOCKED: "Дверь заперта. Нужен ключ, чтобы пройти дальше.",
+    DOOR_UNLOCKED: (
+        "Вы используете найденный ключ, чтобы открыть путь в комнату сокровищ."
+    ),
+    LOCATION_UNKNOWN: "Ошибка: текущее местоположение неизвестно.",
+    ROOM_INVALID: "Ошибка: текущая комната некорректна.",
+    NO_ROUTE: "Сейчас до {0} не добраться.",
+    ALREADY_HERE: "Вы уже здесь.",
+    UNKNOWN_ROOM: "Такой комнаты нет в лабиринте.",
+    HINT_SHOWN: "Подсказка: {0}",
+    NO_HINT: "Отсюда до победы не добраться.",
+    HINTS_UNAVAILABLE: "Подсказки для этой карты не подготовлены.",
+    ITEM_TAKEN: "Вы подняли: {0}",
+    ITEM_NOT_HERE: "Такого предмета здесь нет.",
+    ITEM_TOO_HEAVY: "Вы не можете поднять сундук, он слишком тяжелый.",
+    ITEM_NOT_OWNED: "У вас нет такого предмета.",
+    ITEM_FOUND: "В шкатулке вы нашли: {0}",
+    ITEM_UNKNOWN_USE: "Вы не знаете, как использовать этот предмет.",
+    ITEM_DROPPED: "Вы положили: {0}",
+    PLAYER_ENTERED: "Игрок {0} входит в комнату.",
+    PLAYER_LEFT: "Игрок {0} уходит из комнаты.",
+    PLAYER_TOOK: "Игрок {0} поднимает: {1}",
+    PLAYER_DROPPED: "Игрок {0} кладёт: {1}",
+    PUZZLE_SHOWN: "Загадка: {0}",
+    PUZZLE_FAILED: "Неверно. Попробуйте снова.",
+    NO_PUZZLE: "Загадок здесь нет.",
+    CHEST_MISSING: "Здесь нет сундука с сокровищами.",
+    CHEST_ALREADY_OPEN: "Сундук с сокровищами уже открыт или отсутствует.",
+    CHEST_LOCKED: "Сундук заперт. У вас нет ключа, но можно попробовать ввести код.",
+    CHEST_LEFT: "Вы отступаете от сундука.",
+    WRONG_CODE: "Неверный код. Сундук остается запертым.",
+    PORTAL_ACTIVATED: "Вы используете ключ портала. Портал активируется!",
+    TRAP_TRIGGERED: "Ловушка активирована! Пол стал дрожать...",
+    ITEM_LOST: "Из-за тряски вы потеряли: {0}!",
+    PLAYER_THROWN: "Вас отбросило в случайном направлении!",
+    PLAYER_DIED: "Ловушка нанесла смертельный урон! Игра окончена.",
+    TRAP_SURVIVED: "Вам повезло! Вы смогли избежать ловушки, но сильно испугались.",
+    FLOOR_GLINTS: "Вы заметили что-то блестящее на полу...",
+    COIN_FOUND: "Вы нашли монетку!",
+    ONLY_DUST: "Но это оказалась всего лишь пыль...",
+    RUSTLE_HEARD: "Вы слышите странный шорох в темноте...",
+    FLOOR_GAVE_WAY: "Внезапно пол под ногами подался! Это ловушка!",
+    DIRECTION_REQUIRED: "Укажите направление. Пример: go north",
+    UNKNOWN_COMMAND: "Неизвестная команда. Введите 'help' для справки.",
+    AMBIGUOUS_COMMAND: "Команда {0} неоднозначна: {1}.",
+    COMMAND_FAILED: "Команда не выполнена из-за ошибки сервера. Попробуйте ещё раз.",
+    PLAYER_QUIT: "Вы вышли из игры. До новых встреч!",
+    GAME_FINISHED: "Поздравляем с победой! Игра завершена.",
+}
+
+ITEM_USE_MESSAGES = {
+    "torch": "Вы зажгли факел. Стало светлее, и вы видите окрестности лучше.",
+    "sword": "Вы держите меч в руках. Чувствуете уверенность и силу.",
+    "bronze box": "Вы открыли бронзовую шкатулку. Там только пыль.",
+}
+
+ITEM_USELESS_MESSAGES = {
+    "rusty key": "Здесь не к чему применить этот ключ.",
+    "portal_key": "Этот ключ можно использовать только в комнате с порталом.",
+}
+
+PUZZLE_SOLVED_MESSAGES = {
+    "treasure_room": "Вы получаете доступ к сундуку!",
+    "portal_room": "Портал активирован! Вы можете использовать его для выхода.",
+    "trap_room": "Ловушка деактивирована! Теперь вы можете безопасно перемещаться.",
+}
+
+CHEST_OPENED_MESSAGES = {
+    "key": "Вы применяете ключ, и замок щёлкает. Сундук открыт!",
+    "code": "Код принят! Замок щёлкает, и сундук открывается.",
+}
+
+GAME_WON_MESSAGES = {
+    "treasure": "В сундуке сокровище! Вы победили!",
+    "portal": "Поздравляем! Вы нашли выход из лабиринта!",
+}
+
+TRAP_AVOIDED_MESSAGES = {
+    "sword": "Благодаря мечу вам удалось удержаться на ногах! Ловушка не сработала.",
+    "torch": "Свет факла помог вовремя заметить ловушку! Вы успели отпрыгнуть.",
+}
+
+RUSTLE_ENDED_MESSAGES = {
+    "sword": (
+        "Благодаря мечу в руках, вы чувствуете себя увереннее и отпугиваете существо."
+    ),
+    "torch": (
+        "Свет факла помог разглядеть маленького грызуна, который быстро скрылся."
+    ),
+    None: "Вы замираете от страха, но шорох быстро стихает.",
+}
+
+ITEM_REQUIRED_MESSAGES = {
+    "take": "Укажите предмет для взятия. Пример: take torch",
+    "use": "Укажите предмет для использования. Пример: use torch",
+    "drop": "Укажите предмет, который нужно положить. Пример: drop torch",
+}
+
+ROOM_REQUIRED_MESSAGES = {
+    "goto": "Укажите комнату. Пример: goto library",
+    "path": "Укажите комнату. Пример: path library",
+}
+
+KEYED_MESSAGES = {
+    ITEM_USED: ITEM_USE_MESSAGES,
+    ITEM_USELESS_HERE: ITEM_USELESS_MESSAGES,
+    CHEST_OPENED: CHEST_OPENED_MESSAGES,
+    GAME_WON: GAME_WON_MESSAGES,
+    TRAP_AVOIDED: TRAP_AVOIDED_MESSAGES,
+    RUSTLE_ENDED: RUSTLE_ENDED_MESSAGES,
+    ITEM_REQUIRED: ITEM_REQUIRED_MESSAGES,
+    ROOM_REQUIRED: ROOM_REQUIRED_MESSAGES,
+}
+
+
+def render_room(
+    room_key: str,
+    description: str,
+    items: tuple[str, ...],
+    exits: tuple[str, ...],
+    has_puzzle: bool,
+) -> str:
+    """
+    Формирует описание комнаты: название, описание, предметы, выходы и загадку.
+    """
+    lines = [f"== {room_key.upper()} ==", description]
+
+    if items:
+        lines.append("Заметные предметы:")
+        lines.extend(f" - {item}" for item in items)
+
+    if exits:
+        lines.append(f"Выходы: {', '.join(exits)}")
+
+    if has_puzzle:
+        lines.append("Кажется, здесь есть загадка (используйте команду solve).")
+
+    return "\n".join(lines)
+
+
+def render_inventory(items: tuple[str, ...]) -> str:
+    """
+    Формирует список предметов в инвентаре.
+    """
+    if not items:
+        return "Ваш инвентарь пуст."
+    return "\n".join(["В вашем инвентаре:", *(f" - {item}" for item in items)])
+
+
+def render_help() -> str:
+    """
+    Формирует список доступных команд.
+    """
+    lines = ["\nДоступные команды:"]
+    lines.extend(
+        f"  {command:<16} - {description}" for command, description in COMMANDS.items()
+    )
+    lines.append(
+        "\nКоманды, предметы и комнаты можно сокращать (n, inv, take to),"
+        "\nнесколько команд пишутся в одной строке через «;»."
+    )
+    return "\n".join(lines)
+
+
+def render_event(event: Event) -> str | None:
+    """
+    Превращает событие в текст для игрока.
+    Возвращает None для событий, которые не выводятся.
+    """
+    kind, args = event
+
+    if kind == ROOM_DESCRIBED:
+        return render_room(*args)
+    if kind == INVENTORY_SHOWN:
+        return render_inventory(*args)
+    if kind == HELP_SHOWN:
+        return render_help()
+    if kind == PLAYERS_HERE:
+        return "Здесь также: " + ", ".join(f"игрок {player}" for player in args[0])
+    if kind == ROUTE_SHOWN:
+        target, directions = args
+        return f"Путь до {target}: {', '.join(directions)}"
+    if kind == PUZZLE_SOLVED:
+        message = PUZZLE_SOLVED_MESSAGES.get(
+            args[0], "Вы чувствуете, что стали ближе к разгадке тайны лабиринта."
+        )
+        return f"Правильно! Загадка решена.\n{message}"
+
+    keyed_messages = KEYED_MESSAGES.get(kind)
+    if keyed_messages is not None:
+        return keyed_messages[args[0]]
+
+    template = MESSAGES[kind]
+    if template is None:
+        return None
+    return template.format(*args) if args else template
+
+
+def render_events(events: Iterable[Event]) -> str:
+    """
+    Превращает последовательность событий в текст, по строке на событие.
+    """
+    texts = (render_event(event) for event in events)
+    return "\n".join(text for text in texts if text is not None)
+
+
+_room_bytes: dict[tuple[Any, ...], bytes] = {}
+
+
+def encode_room(args: tuple[Any, ...]) -> bytes:
+    """
+    Возвращает описание комнаты (параметры события ROOM_DESCRIBED)
+    в кодировке ENCODING. Буфер строится один раз на состояние комнаты
+    и общий для всех сессий, которые видят комнату такой.
+    """
+    data = _room_bytes.get(args)
+    if data is None:
+        if len(_room_bytes) >= ROOM_BYTES_CACHE_SIZE:
+            del _room_bytes[next(iter(_room_bytes))]
+        data = _room_bytes[args] = render_room(*args).encode(ENCODING)
+    return data
+
+
+def encode_events(events: Iterable[Event]) -> bytes:
+    """
+    Превращает события в текст в кодировке ENCODING, как render_events,
+    но описания комнат берёт готовыми (см. encode_room).
+    """
+    parts = []
+    for event in events:
+        if event.kind == ROOM_DESCRIBED:
+            parts.append(encode_room(event.args))
+            continue
+        text = render_event(event)
+        if text is not None:
+            parts.append(text.encode(ENCODING))
+    return b"\n".join(parts)
@@ -0,0 +1,127 @@
+from collections import OrderedDict, deque
+from typing import Any
+
+from labyrinth_game.world import get_gates
+
+EAGER_BUILD_ROOMS = 1024
+# Сколько комнат всего хранят кешированные пути. Путь из комнаты занимает
+# по записи на каждую достижимую комнату, поэтому кеш ограничен числом
+# записей, а не путей: на большой карте каждый путь много больше.
+ROUTE_CACHE_ENTRIES = 1 << 22
+
+
+class RouteIndex:
+    """
+    Индекс кратчайших путей между комнатами карты.
+    Пути из каждой комнаты считаются поиском в ширину один раз и кешируются
+    отдельно для каждого набора ключей от запертых комнат. Когда в кеше
+    набирается больше max_entries записей, забываются пути, к которым
+    дольше всего не обращались.
+    Запертые комнаты по умолчанию берутся из поля gate комнат карты.
+    """
+
+    def __init__(
+        self,
+        world: dict[str, Any],
+        gates: dict[str, str] | None = None,
+        max_entries: int = ROUTE_CACHE_ENTRIES,
+    ) -> None:
+        self.world = world
+        self.gates = gates if gates is not None else get_gates(world)
+        self.max_entries = max_entries
+        self.entries = 0
+        self._rows: OrderedDict[
+            tuple[str, frozenset[str]], dict[str, tuple[str, str]]
+        ] = OrderedDict()
+
+    def build(self) -> None:
+        """
+        Заранее считает пути из всех комнат для всех наборов ключей.
+        """
+        keys = frozenset(self.gates.values())
+        for source in self.world:
+            self._row(source, frozenset())
+            self._row(source, keys)
+
+    def route(
+        self, source: str, target: str, inventory: list[str] | tuple[str, ...] = ()
+    ) -> list[str] | None:
+        """
+        Возвращает список направлений от source до target
+        или None, если с таким инвентарём туда не пройти.
+        """
+        row = self._row(source, self._keys(inventory))
+        if target not in row:
+            return None
+
+        directions = []
+        while target != source:
+            target, direction = row[target]
+            directions.append(direction)
+        directions.reverse()
+        return directions
+
+    def invalidate_room(self, room_key: str) -> None:
+        """
+        Сбрасывает только те пути, которые проходят через изменённую комнату.
+        Вызывается после изменения выходов комнаты.
+        """
+        for row_key, row in list(self._rows.items()):
+            if room_key in row:
+                del self._rows[row_key]
+                self.entries -= len(row)
+
+    def _keys(self, inventory: list[str] | tuple[str, ...]) -> frozenset[str]:
+        """
+        Оставляет из инвентаря только ключи от запертых комнат.
+        """
+        return frozenset(item for item in self.gates.values() if item in inventory)
+
+    def _row(self, source: str, keys: frozenset[str]) -> dict[str, tuple[str, str]]:
+        """
+        Возвращает кратчайшие пути из source: для каждой достижимой комнаты —
+        предыдущая комната и направление последнего перехода.
+        """
+        row_key = (source, keys)
+        row = self._rows.get(row_key)
+        if row is not None:
+            self._rows.move_to_end(row_key)
+            return row
+
+        row = {source: (source, "")}
+        queue = deque([source])
+        while queue:
+            room_key = queue.popleft()
+            for direction, next_key in self.world[room_key].get("exits", {}).items():
+                if next_key in row:
+                    continue
+                gate_key = self.gates.get(next_key)
+                if gate_key is not None and gate_key not in keys:
+                    continue
+                row[next_key] = (room_key, direction)
+                queue.append(next_key)
+
+        self._rows[row_key] = row
+        self.entries += len(row)
+        while self.entries > self.max_entries and len(self._rows) > 1:
+            _, evicted = self._rows.popitem(last=False)
+            self.entries -= len(evicted)
+        return row
+
+
+_indexes: dict[int, tuple[dict[str, Any], RouteIndex]] = {}
+
+
+def get_route_index(world: dict[str, Any]) -> RouteIndex:
+    """
+    Возвращает индекс путей для карты, создавая его при первом обращении.
+    Для небольших карт пути между всеми комнатами считаются сразу,
+    для больших — по мере запросов.
+    """
+    entry = _indexes.get(id(world))
+    if entry is None or entry[0] is not world:
+        entry = (world, RouteIndex(world))
+        if len(world) <= EAGER_BUILD_ROOMS:
+            entry[1].build()
+        _indexes[id(world)] = entry
+    return entry[1]
@@ -0,0 +1,534 @@
+import argparse
+import asyncio
+import contextlib
+import hmac
+import os
+import time
+from typing import Any
+
+from labyrinth_game.events import COMMAND_FAILED, GAME_WON, Event
+from labyrinth_game.hints import prepare_hints
+from labyrinth_game.journal import Journal, recover, save_snapshot
+from labyrinth_game.main import get_prompt, process_command
+from labyrinth_game.metrics import Metrics, command_type
+from labyrinth_game.multiplayer import Notice, ShardError, SharedWorld
+from labyrinth_game.render import ENCODING, encode_events, render_events
+from labyrinth_game.session_db import SessionRepository
+from labyrinth_game.session_store import SessionStore
+from labyrinth_game.state import GameState
+from labyrinth_game.utils import describe_current_room
+from labyrinth_game.world import create_game_state
+from labyrinth_game.world_loader import open_world
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8023
+MAX_SESSIONS = 10_000
+IDLE_TIMEOUT = 300.0
+MAX_LINE_LENGTH = 1024
+SNAPSHOT_INTERVAL = 60.0
+STATS_INTERVAL = 60.0
+ADMIN_TOKEN_VARIABLE = "LABYRINTH_ADMIN_TOKEN"
+# Сколько байт может ждать отправки игроку, прежде чем сообщения о других
+# игроках для него начнут отбрасываться.
+NOTICE_BUFFER_LIMIT = 1 << 16
+
+
+def run_command(game_state: GameState, command: str) -> str:
+    """
+    Выполняет команду для сессии и возвращает текст ответа.
+    Если сессия ждёт ответа на вопрос, текст завершается этим вопросом.
+    """
+    return render_reply(game_state, process_command(game_state, command))
+
+
+def render_reply(game_state: GameState, events: list[Event]) -> str:
+    """
+    Строит текст ответа на команду из её событий.
+    """
+    text = render_events(events)
+    if text:
+        text += "\n"
+    if game_state.pending_prompt:
+        text += get_prompt(game_state) + "\n"
+    return text
+
+
+def encode_reply(game_state: GameState, events: list[Event]) -> bytes:
+    """
+    Строит ответ на команду, как render_reply, сразу в кодировке ENCODING:
+    готовые описания комнат не кодируются заново.
+    """
+    data = encode_events(events)
+    if data:
+        data += b"\n"
+    if game_state.pending_prompt:
+        data += f"{get_prompt(game_state)}\n".encode(ENCODING)
+    return data
+
+
+class GameServer:
+    """
+    Асинхронный сервер: каждое подключение — отдельная игровая сессия.
+    Номер сессии служит seed её случайных событий, поэтому журнал
+    восстанавливает их без отдельного поля.
+    Протокол построчный: одна строка — одна команда.
+    С журналом каждая принятая команда записывается до выполнения,
+    а ответ уходит игроку только после того, как запись оказалась
+    на диске: подтверждённая команда переживает сбой. Сессии,
+    восстановленные после сбоя, ждут команды resume <номер>.
+    С хранилищем сессий доступны команды save и load <номер>,
+    с базой SQLite — ещё таблица рекордов (команда leaders).
+    Со статистикой время выполнения команд и игровые события собираются
+    в metrics, а команда stats <токен> показывает их администратору:
+    без admin_token или с неверным токеном команда неизвестна.
+    С общей картой (shared) все игроки находятся в одном лабиринте:
+    команды выполняют шарды комнат, а игроки видят друг друга.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        idle_timeout: float = IDLE_TIMEOUT,
+        max_line_length: int = MAX_LINE_LENGTH,
+        journal: Journal | None = None,
+        snapshot_path: str | None = None,
+        store: SessionStore | SessionRepository | None = None,
+        world: dict[str, Any] | None = None,
+        metrics: Metrics | None = None,
+        shared: SharedWorld | None = None,
+        admin_token: str | None = None,
+        replay_workers: int = 1,
+    ) -> None:
+        self.world = shared.world if shared is not None else world
+        self.metrics = metrics
+        self.admin_token = admin_token
+        self.shared = shared
+        self.writers: dict[int, asyncio.StreamWriter] = {}
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_line_length = max_line_length
+        self.journal = journal
+        self.snapshot_path = snapshot_path
+        self.store = store
+        self.sessions: dict[int, GameState] = {}
+        self.recovered: dict[int, GameState] = {}
+        self._next_id = 0
+
+        if journal is not None:
+            self.recovered = recover(journal.path, snapshot_path, world, replay_workers)
+            self._next_id = max(self.recovered, default=-1) + 1
+        if store is not None:
+            self._next_id = max(self._next_id, max(store, default=-1) + 1)
+
+    async def snapshot(self) -> None:
+        """
+        Сохраняет снимок сессий, чтобы восстановление проигрывало
+        только хвост журнала. Сессии упаковываются сразу, пока команды
+        не выполняются, а запись файла с fsync идёт в отдельном потоке
+        после того, как учтённые снимком записи журнала окажутся на диске.
+        """
+        if self.journal is None or self.snapshot_path is None:
+            return
+        record, data = self.journal.encode_snapshot({**self.recovered, **self.sessions})
+        await self._wait_durable(record)
+        await asyncio.get_running_loop().run_in_executor(
+            None, save_snapshot, self.snapshot_path, data
+        )
+
+    def is_admin(self, token: str) -> bool:
+        """
+        Проверяет токен администратора. Сравнение идёт за постоянное время,
+        чтобы токен нельзя было подобрать по времени ответа.
+        """
+        if not self.admin_token:
+            return False
+        return hmac.compare_digest(
+            token.encode(ENCODING), self.admin_token.encode(ENCODING)
+        )
+
+    def server_command(self, session_id: int, command: str) -> tuple[int, str] | None:
+        """
+        Выполняет команду сервера (resume, save, load, leaders, stats)
+        для сессии.
+        Возвращает номер сессии после команды и текст ответа
+        или None, если это обычная игровая команда.
+        """
+        name, _, argument = command.partition(" ")
+        argument = argument.strip()
+
+        if name == "save" and self.store is not None:
+            self.store.save(session_id, self.sessions[session_id])
+            return session_id, f"Игра сохранена под номером {session_id}.\n"
+
+        if name == "leaders" and isinstance(self.store, SessionRepository):
+            lines = [
+                f"{place}. Сессия {key}: {steps} шагов"
+                for place, (key, steps) in enumerate(self.store.leaderboard(), 1)
+            ]
+            return session_id, "\n".join(lines or ["Побед пока нет."]) + "\n"
+
+        if name == "stats" and self.metrics is not None and self.is_admin(argument):
+            return session_id, f"{self.metrics.report()}\n"
+
+        if name == "resume" and self.journal is not None:
+            game_state = None
+            if argument.isdigit():
+                game_state = self.recovered.pop(int(argument), None)
+            if game_state is None:
+                return session_id, "Такой сессии нет.\n"
+
+            del self.sessions[session_id]
+            self.journal.close_session(session_id)
+            session_id = int(argument)
+            self.sessions[session_id] = game_state
+
+        elif name == "load" and self.store is not None:
+            game_state = self.store.load(int(argument)) if argument.isdigit() else None
+            if game_state is None or game_state.game_over:
+                return session_id, "Такого сохранения нет.\n"
+
+            game_state.seed = session_id
+            self.sessions[session_id] = game_state
+            # Загруженного состояния нет в журнале: записываем его целиком.
+            if self.journal is not None:
+                self.journal.save_state(session_id, game_state)
+
+        else:
+            return None
+
+        text = render_events(describe_current_room(self.sessions[session_id]))
+        return session_id, f"{text}\n"
+
+    async def start_tcp(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+    ) -> asyncio.AbstractServer:
+        """
+        Запускает сервер на TCP-сокете.
+        """
+        return await asyncio.start_server(
+            self.handle_client, host, port, limit=self.max_line_length
+        )
+
+    async def start_unix(self, path: str) -> asyncio.AbstractServer:
+        """
+        Запускает сервер на Unix-сокете.
+        """
+        return await asyncio.start_unix_server(
+            self.handle_client, path, limit=self.max_line_length
+        )
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """
+        Обслуживает одно подключение до выхода игрока или простоя.
+        """
+        if len(self.sessions) >= self.max_sessions:
+            await self._send(writer, "Сервер переполнен. Попробуйте позже.\n")
+            await self._close(writer)
+            return
+
+        session_id = self._next_id
+        self._next_id += 1
+        game_state = create_game_state(self.world, session_id)
+        self.sessions[session_id] = game_state
+        self.writers[session_id] = writer
+
+        try:
+            if self.shared is None:
+                room_events = describe_current_room(game_state)
+            else:
+                room_events, notices = await self.shared.join(session_id, game_state)
+                self._notify(notices)
+            greeting = (
+                "Добро пожаловать в Лабиринт сокровищ!\n\n"
+                "Введите 'help' для просмотра доступных команд.\n"
+                f"Номер сессии: {session_id}.\n\n"
+                f"{render_events(room_events)}\n"
+            )
+            await self._send(writer, greeting)
+
+            while not game_state.game_over:
+                try:
+                    line = await asyncio.wait_for(
+                        reader.readline(), timeout=self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    await self._send(writer, "\nСессия закрыта из-за бездействия.\n")
+                    break
+                except (asyncio.LimitOverrunError, ValueError):
+                    await self._send(writer, "Слишком длинная команда.\n")
+                    break
+
+                if not line:
+                    break
+
+                command = line.decode(ENCODING, errors="replace").strip()
+                if not command:
+                    continue
+
+                reply = self.server_command(session_id, command)
+                if reply is not None:
+                    session_id, text = reply
+                    game_state = self.sessions[session_id]
+                    if self.journal is not None:
+                        await self._wait_durable(self.journal.records)
+                    await self._send(writer, text)
+                    continue
+
+                record = None
+                if self.journal is not None:
+                    record = self.journal.append(session_id, command)
+                if self.shared is not None:
+                    try:
+                        events = await self._run_shared(session_id, game_state, command)
+                    except ShardError:
+                        events = [Event(COMMAND_FAILED)]
+                elif self.metrics is None:
+                    events = process_command(game_state, command)
+                else:
+                    events = self.metrics.run_command(game_state, command)
+                if isinstance(self.store, SessionRepository) and any(
+                    kind == GAME_WON for kind, _ in events
+                ):
+                    self.store.record_victory(session_id, game_state.steps_taken)
+                if record is not None:
+                    await self._wait_durable(record)
+                await self._write(writer, encode_reply(game_state, events))
+
+            if game_state.game_over:
+                await self._send(
+                    writer,
+                    f"\nИгра завершена! Вы сделали {game_state.steps_taken} "
+                    "шагов.\n",
+                )
+        except (ConnectionError, ShardError):
+            pass
+        finally:
+            del self.sessions[session_id]
+            del self.writers[session_id]
+            if self.shared is not None:
+                with contextlib.suppress(Exception):
+                    self._notify(await self.shared.leave(session_id, game_state))
+            if self.journal is not None:
+                self.journal.close_session(session_id)
+            await self._close(writer)
+
+    async def _run_shared(
+        self, session_id: int, game_state: GameState, command: str
+    ) -> list[Event]:
+        """
+        Выполняет команду на общей карте и рассылает сообщения другим игрокам.
+        """
+        kind = command_type(game_state, command) if self.metrics else None
+        started = time.perf_counter_ns()
+        events, notices = await self.shared.run_command(session_id, game_state, command)
+        if self.metrics is not None:
+            self.metrics.observe(kind, time.perf_counter_ns() - started, events)
+        self._notify(notices)
+        return events
+
+    async def _wait_durable(self, record: int) -> None:
+        """
+        Ждёт, пока запись журнала окажется на диске, не останавливая
+        остальные сессии и не занимая поток: поток групповой фиксации
+        сам завершает future через call_soon_threadsafe. Пока команда
+        выполнялась, запись уже могла уйти на диск.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.journal.on_durable(
+            record, lambda: loop.call_soon_threadsafe(_resolve, future)
+        )
+        await future
+
+    def _notify(self, notices: list[Notice]) -> None:
+        """
+        Отправляет другим игрокам сообщения о событиях рядом с ними.
+        Ответа не ждёт: медленный игрок не задерживает остальных. Игроку,
+        у которого не отправлено больше NOTICE_BUFFER_LIMIT байт, сообщения
+        не пишутся: они только описывают чужие действия, а буфер иначе
+        рос бы без предела.
+        """
+        for player, event in notices:
+            writer = self.writers.get(player)
+            if writer is None or writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > NOTICE_BUFFER_LIMIT:
+                continue
+            writer.write(encode_events([event]) + b"\n")
+
+    async def _send(self, writer: asyncio.StreamWriter, text: str) -> None:
+        """
+        Отправляет текст клиенту и ждёт освобождения буфера (backpressure).
+        """
+        await self._write(writer, text.encode(ENCODING))
+
+    async def _write(self, writer: asyncio.StreamWriter, data: bytes) -> None:
+        """
+        Отправляет готовые байты клиенту одной записью и ждёт освобождения
+        буфера.
+        """
+        writer.write(data)
+        await asyncio.wait_for(writer.drain(), timeout=self.idle_timeout)
+
+    async def _close(self, writer: asyncio.StreamWriter) -> None:
+        """
+        Закрывает соединение, игнорируя ошибки уже разорванного сокета.
+        """
+        writer.close()
+        with contextlib.suppress(ConnectionError, asyncio.TimeoutError):
+            await writer.wait_closed()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    """
+    Завершает future, если его ещё не отменили.
+    """
+    if not future.done():
+        future.set_result(None)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    """
+    Запускает сервер с параметрами командной строки и обслуживает клиентов.
+    """
+    # Модель подсказок читает все комнаты, поэтому без подсказок её не строят.
+    hints = args.hints is not None or args.build_hints
+    shared = None
+    if args.shards:
+        shared = SharedWorld(
+            args.world, args.shards, hints=hints, hints_path=args.hints
+        )
+        world = shared.world
+    else:
+        world = open_world(args.world) if args.world else None
+        if hints:
+            prepare_hints(world, args.hints)
+    journal = Journal(args.journal, world) if args.journal else None
+    store = None
+    if args.db:
+        store = SessionRepository(args.db, world)
+    elif args.store:
+        store = SessionStore(args.store, world)
+    metrics = Metrics() if args.stats or args.stats_file else None
+    game_server = GameServer(
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        journal=journal,
+        snapshot_path=args.snapshot,
+        store=store,
+        world=world,
+        metrics=metrics,
+        shared=shared,
+        admin_token=args.admin_token,
+        replay_workers=args.replay_workers,
+    )
+    if args.unix:
+        server = await game_server.start_unix(args.unix)
+    else:
+        server = await game_server.start_tcp(args.host, args.port)
+
+    snapshots = None
+    if journal is not None and args.snapshot:
+        snapshots = asyncio.create_task(
+            _snapshot_loop(game_server, args.snapshot_interval)
+        )
+
+    stats_dumps = None
+    if metrics is not None and args.stats_file:
+        stats_dumps = asyncio.create_task(
+            _stats_loop(metrics, args.stats_file, args.stats_interval)
+        )
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if snapshots is not None:
+            snapshots.cancel()
+        if stats_dumps is not None:
+            stats_dumps.cancel()
+            metrics.dump(args.stats_file)
+        if journal is not None:
+            journal.close()
+        if store is not None:
+            store.close()
+        if shared is not None:
+            shared.close()
+
+
+async def _snapshot_loop(game_server: GameServer, interval: float) -> None:
+    """
+    Периодически сохраняет снимок сессий сервера.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await game_server.snapshot()
+
+
+async def _stats_loop(metrics: Metrics, path: str, interval: float) -> None:
+    """
+    Периодически сохраняет статистику сервера в файл JSON.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        metrics.dump(path)
+
+
+def main() -> None:
+    """
+    Точка входа игрового сервера.
+    """
+    parser = argparse.ArgumentParser(description="Сервер Лабиринта сокровищ")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="путь к Unix-сокету вместо TCP")
+    parser.add_argument("--max-sessions", type=int, default=MAX_SESSIONS)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT)
+    parser.add_argument("--journal", help="файл журнала команд")
+    parser.add_argument("--snapshot", help="файл снимка сессий (нужен журнал)")
+    parser.add_argument("--snapshot-interval", type=float, default=SNAPSHOT_INTERVAL)
+    parser.add_argument(
+        "--replay-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="процессов для проигрывания журнала при запуске",
+    )
+    parser.add_argument("--store", help="файл хранилища сохранённых сессий")
+    parser.add_argument("--db", help="база SQLite для сессий и рекордов")
+    parser.add_argument("--world", help="файл или каталог чанков карты")
+    parser.add_argument(
+        "--hints",
+        help="файл таблицы подсказок (project-hints); без него и без "
+        "--build-hints команда hint недоступна",
+    )
+    parser.add_argument(
+        "--build-hints",
+        action="store_true",
+        help="посчитать таблицу подсказок при запуске, без файла",
+    )
+    parser.add_argument("--stats", action="store_true", help="собирать статистику")
+    parser.add_argument("--stats-file", help="файл JSON для статистики")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL)
+    parser.add_argument(
+        "--admin-token",
+        default=os.environ.get(ADMIN_TOKEN_VARIABLE),
+        help="токен администратора для команды stats <токен> "
+        f"(по умолчанию из {ADMIN_TOKEN_VARIABLE})",
+    )
+    parser.add_argument(
+        "--shards", type=int, default=0, help="общая карта на N процессах-шардах"
+    )
+    args = parser.parse_args()
+    if args.shards and (args.journal or args.store or args.db):
+        parser.error("общая карта не поддерживает журнал и сохранение сессий")
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\nСервер остановлен.")
+
+
+if __name__ == "__main__":
+    main()
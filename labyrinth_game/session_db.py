@@ -0,0 +1,296 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.solver import StateCodec
+from labyrinth_game.state import GameState
+from labyrinth_game.world import world_version
+
+FLUSH_INTERVAL = 0.05
+FLUSH_SESSIONS = 500
+POOL_SIZE = 4
+LEADERBOARD_SIZE = 10
+
+_MISSING = object()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    state BLOB NOT NULL,
+    game_over INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS victories (
+    session_id INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS victories_steps ON victories (steps);
+"""
+
+
+class SessionRepository:
+    """
+    Хранилище отложенных сессий и таблицы рекордов в SQLite.
+    Запись отложенная: save и record_victory только кладут данные в очередь,
+    а фоновый поток записывает их одной транзакцией раз в flush_interval
+    секунд или при накоплении flush_sessions сессий. Если транзакция
+    не удалась, пачка возвращается в очередь и записывается снова
+    в следующий раз, а flush и close сообщают об ошибке. Чтение идёт
+    через небольшой пул соединений (база работает в режиме WAL).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        world: dict[str, Any] | None = None,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_sessions: int = FLUSH_SESSIONS,
+        pool_size: int = POOL_SIZE,
+    ) -> None:
+        self.path = path
+        self.world = world if world is not None else ROOMS
+        self.codec = StateCodec(self.world)
+        self.flush_interval = flush_interval
+        self.flush_sessions = flush_sessions
+
+        self._writer_connection = self._connect()
+        self._check_version()
+
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+
+        self._pending: dict[int, tuple[bytes, bool] | None] = {}
+        self._writing: dict[int, tuple[bytes, bool] | None] = {}
+        self._victories: list[tuple[int, int, float]] = []
+        self._flushed = 0
+        self._requested = 0
+        self._closed = False
+        self._error: sqlite3.Error | None = None
+        self._lock = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Открывает соединение с базой в режиме WAL.
+        """
+        connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _check_version(self) -> None:
+        """
+        Создаёт таблицы и проверяет, что база сделана для той же карты.
+        """
+        connection = self._writer_connection
+        connection.executescript(SCHEMA)
+        version = world_version(self.world)
+        row = connection.execute(
+            "SELECT value FROM meta WHERE key = 'world_version'"
+        ).fetchone()
+        if row is None:
+            connection.execute(
+                "INSERT INTO meta (key, value) VALUES ('world_version', ?)",
+                (version,),
+            )
+        elif row[0] != version:
+            connection.close()
+            raise ValueError("База сессий создана для другой версии карты.")
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Берёт соединение из пула на время чтения.
+        """
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def save(self, key: int, game_state: GameState) -> None:
+        """
+        Ставит сессию в очередь на запись. Диск не трогается.
+        """
+        state = self._pack(game_state)
+        with self._lock:
+            self._pending[key] = (state, game_state.game_over)
+            if len(self._pending) >= self.flush_sessions:
+                self._lock.notify()
+
+    def delete(self, key: int) -> None:
+        """
+        Ставит в очередь удаление сессии.
+        """
+        with self._lock:
+            self._pending[key] = None
+
+    def record_victory(self, key: int, steps: int) -> None:
+        """
+        Ставит в очередь запись о победе для таблицы рекордов.
+        """
+        with self._lock:
+            self._victories.append((key, steps, time.time()))
+
+    def load(self, key: int) -> GameState | None:
+        """
+        Возвращает сохранённую сессию или None, если её нет.
+        Ещё не записанные изменения из очереди учитываются.
+        """
+        with self._lock:
+            pending = self._pending.get(key, self._writing.get(key, _MISSING))
+        if pending is None:
+            return None
+        if pending is not _MISSING:
+            return self._unpack(*pending)
+
+        with self._reader() as connection:
+            row = connection.execute(
+                "SELECT state, game_over FROM sessions WHERE id = ?", (key,)
+            ).fetchone()
+        return self._unpack(row[0], bool(row[1])) if row else None
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, int) and self.load(key) is not None
+
+    def __iter__(self) -> Iterator[int]:
+        self.flush()
+        with self._reader() as connection:
+            keys = [row[0] for row in connection.execute("SELECT id FROM sessions")]
+        return iter(keys)
+
+    def leaderboard(self, limit: int = LEADERBOARD_SIZE) -> list[tuple[int, int]]:
+        """
+        Возвращает лучшие победы: пары (номер сессии, число шагов).
+        """
+        with self._reader() as connection:
+            return connection.execute(
+                "SELECT session_id, steps FROM victories "
+                "ORDER BY steps, finished LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def _pack(self, game_state: GameState) -> bytes:
+        """
+        Упаковывает состояние сессии в байты.
+        """
+        code = self.codec.encode(game_state)
+        return code.to_bytes((code.bit_length() + 7) // 8, "little")
+
+    def _unpack(self, state: bytes, game_over: bool) -> GameState:
+        """
+        Восстанавливает состояние сессии из байтов.
+        """
+        game_state = self.codec.decode(int.from_bytes(state, "little"))
+        game_state.game_over = game_over
+        return game_state
+
+    def flush(self) -> None:
+        """
+        Ждёт, пока все изменения из очереди окажутся в базе.
+        Если запись не удалась, выбрасывает RuntimeError: изменения
+        остаются в очереди.
+        """
+        with self._lock:
+            self._requested += 1
+            target = self._requested
+            self._lock.notify()
+            while self._flushed < target and not self._closed:
+                self._lock.wait()
+            error = self._error
+        if error is not None:
+            raise RuntimeError("Не удалось записать сессии в базу.") from error
+
+    def close(self) -> None:
+        """
+        Записывает очередь и закрывает все соединения.
+        Если записать очередь не удалось, соединения всё равно закрываются,
+        а ошибка выбрасывается, как в flush.
+        """
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+                self._lock.notify_all()
+            self._writer.join()
+            self._writer_connection.close()
+            while not self._pool.empty():
+                self._pool.get().close()
+
+    def _write_loop(self) -> None:
+        """
+        Фоновый поток: забирает очередь и записывает её одной транзакцией.
+        """
+        while True:
+            with self._lock:
+                if not self._closed and self._flushed == self._requested:
+                    self._lock.wait(self.flush_interval)
+                pending, self._pending = self._pending, {}
+                self._writing = pending
+                victories, self._victories = self._victories, []
+                requested = self._requested
+                closed = self._closed
+
+            error = None
+            if pending or victories:
+                try:
+                    self._write(pending, victories)
+                except sqlite3.Error as write_error:
+                    error = write_error
+
+            with self._lock:
+                if error is not None:
+                    # Более новые изменения из очереди важнее неудавшихся.
+                    self._pending = {**pending, **self._pending}
+                    self._victories[:0] = victories
+                if pending or victories:
+                    self._error = error
+                self._writing = {}
+                self._flushed = requested
+                self._lock.notify_all()
+            if closed:
+                return
+
+    def _write(
+        self,
+        pending: dict[int, tuple[bytes, bool] | None],
+        victories: list[tuple[int, int, float]],
+    ) -> None:
+        """
+        Записывает пачку изменений одной транзакцией.
+        """
+        now = time.time()
+        saved = [
+            (key, entry[0], entry[1], now)
+            for key, entry in pending.items()
+            if entry is not None
+        ]
+        deleted = [(key,) for key, entry in pending.items() if entry is None]
+
+        connection = self._writer_connection
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(
+                "INSERT OR REPLACE INTO sessions (id, state, game_over, updated) "
+                "VALUES (?, ?, ?, ?)",
+                saved,
+            )
+            connection.executemany("DELETE FROM sessions WHERE id = ?", deleted)
+            connection.executemany(
+                "INSERT INTO victories (session_id, steps, finished) VALUES (?, ?, ?)",
+                victories,
+            )
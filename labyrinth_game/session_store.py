@@ -0,0 +1,308 @@
+import mmap
+import os
+import struct
+from typing import Any, Iterator
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.solver import PROMPTS
+from labyrinth_game.state import GameState, get_registry
+from labyrinth_game.world import VERSION_SIZE, create_game_state, world_version
+
+STORE_MAGIC = b"LBM2"
+STORE_HEADER = struct.Struct(f"<4s{VERSION_SIZE}sII")
+
+RECORD_FREE = 0
+RECORD_USED = 1
+RECORD_CONTINUED = 2
+NO_NEXT = 0xFFFFFFFF
+
+# Заголовок записи: состояние, вопрос, конец игры, число предметов
+# и изменённых комнат в записи, номер сессии, комната, шаги, seed
+# и позиция следующей записи цепочки.
+RECORD_HEAD = "<BBBBBQIIQI"
+# Изменённая комната: номер, взятые предметы и флаги комнаты.
+TOUCHED_ROOM = "IQB"
+ROOM_SOLVED = 1
+ROOM_COIN = 2
+
+INITIAL_CAPACITY = 1024
+TOUCHED_CAPACITY = 8
+INVENTORY_CAPACITY = 16
+
+
+class SessionStore:
+    """
+    Хранилище отложенных сессий в одном файле, отображённом в память.
+    Каждая сессия — запись постоянного размера: комната, число шагов,
+    ожидаемый вопрос, seed, список изменённых комнат (решённая загадка,
+    взятые предметы, брошенная монета) и инвентарь номерами предметов.
+    Размер записи не зависит от размера карты: то, что не поместилось
+    в запись, продолжается в следующих записях того же файла. Загрузка
+    читает записи сессии прямо из отображения, без разбора файла.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        world: dict[str, Any] | None = None,
+        capacity: int = INITIAL_CAPACITY,
+    ) -> None:
+        self.path = path
+        self.world = world if world is not None else ROOMS
+        self.registry = get_registry(self.world)
+        self.head = struct.Struct(RECORD_HEAD)
+        self.record = struct.Struct(
+            RECORD_HEAD + TOUCHED_ROOM * TOUCHED_CAPACITY + f"{INVENTORY_CAPACITY}H"
+        )
+
+        self.version = world_version(self.world)
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, "r+b" if exists else "w+b")
+        if exists:
+            header = STORE_HEADER.unpack(self._file.read(STORE_HEADER.size))
+            magic, file_version, record_size, capacity = header
+            if magic != STORE_MAGIC:
+                self._file.close()
+                raise ValueError(f"{path} не является хранилищем сессий.")
+            if file_version != self.version or record_size != self.record.size:
+                self._file.close()
+                raise ValueError("Хранилище создано для другой версии карты.")
+        else:
+            self._file.write(
+                STORE_HEADER.pack(STORE_MAGIC, self.version, self.record.size, capacity)
+            )
+            self._file.truncate(self._offset(capacity))
+
+        self.capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._index: dict[int, list[int]] = {}
+        self._free: list[int] = []
+        self._scan()
+
+    def _offset(self, slot: int) -> int:
+        """
+        Возвращает смещение записи в файле.
+        """
+        return STORE_HEADER.size + slot * self.record.size
+
+    def _scan(self) -> None:
+        """
+        Строит индекс «номер сессии → позиции её записей» и список свободных
+        мест. Записи, до которых не доходит ни одна цепочка, считаются
+        свободными.
+        """
+        heads = {}
+        continued = set()
+        links = []
+        for slot in range(self.capacity):
+            fields = self.head.unpack_from(self._map, self._offset(slot))
+            if fields[0] == RECORD_USED:
+                heads[fields[5]] = slot
+            elif fields[0] == RECORD_CONTINUED:
+                continued.add(slot)
+            links.append(fields[9])
+
+        occupied = set(heads.values())
+        for key, slot in heads.items():
+            chain = self._index[key] = [slot]
+            next_slot = links[slot]
+            while next_slot in continued and next_slot not in occupied:
+                chain.append(next_slot)
+                occupied.add(next_slot)
+                next_slot = links[next_slot]
+        self._free = [
+            slot for slot in reversed(range(self.capacity)) if slot not in occupied
+        ]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._index)
+
+    def save(self, key: int, game_state: GameState) -> None:
+        """
+        Записывает сессию под номером key, заменяя прежние записи.
+        """
+        room_ids = self.registry.room_ids
+        touched: dict[int, list[int]] = {}
+        for room_key, mask in (game_state.removed_items or {}).items():
+            if mask >> 64:
+                raise ValueError("Предметы комнаты не помещаются в запись.")
+            if mask:
+                touched.setdefault(room_ids[room_key], [0, 0])[0] = mask
+        for room_key, items in (game_state.added_items or {}).items():
+            if items:
+                touched.setdefault(room_ids[room_key], [0, 0])[1] |= ROOM_COIN
+        for room in game_state.solved_rooms:
+            touched.setdefault(room, [0, 0])[1] |= ROOM_SOLVED
+
+        rooms = sorted(touched.items())
+        inventory = game_state.inventory.ids
+        count = max(
+            1,
+            -(-len(rooms) // TOUCHED_CAPACITY),
+            -(-len(inventory) // INVENTORY_CAPACITY),
+        )
+
+        chain = self._index.get(key, [])
+        self._release(chain[count:])
+        chain = chain[:count]
+        while len(self._free) < count - len(chain):
+            self._grow()
+        chain.extend(self._free.pop() for _ in range(count - len(chain)))
+
+        # Состояние сессии — в первой записи, в продолжениях там нули.
+        head = (
+            RECORD_USED,
+            PROMPTS.index(game_state.pending_prompt),
+            game_state.game_over,
+        )
+        position = (key, game_state.room, game_state.steps_taken, game_state.seed)
+        for index, slot in enumerate(chain):
+            part = rooms[index * TOUCHED_CAPACITY : (index + 1) * TOUCHED_CAPACITY]
+            items = inventory[
+                index * INVENTORY_CAPACITY : (index + 1) * INVENTORY_CAPACITY
+            ]
+            touched_fields = [value for room, pair in part for value in (room, *pair)]
+            self.record.pack_into(
+                self._map,
+                self._offset(slot),
+                *head,
+                len(items),
+                len(part),
+                *position,
+                chain[index + 1] if index + 1 < count else NO_NEXT,
+                *touched_fields,
+                *[0] * (len(TOUCHED_ROOM) * (TOUCHED_CAPACITY - len(part))),
+                *items,
+                *[0] * (INVENTORY_CAPACITY - len(items)),
+            )
+            head = (RECORD_CONTINUED, 0, 0)
+            position = (key, 0, 0, 0)
+        self._index[key] = chain
+
+    def load(self, key: int) -> GameState | None:
+        """
+        Возвращает сохранённую сессию или None, если её нет.
+        """
+        chain = self._index.get(key)
+        if chain is None:
+            return None
+
+        fields = self.record.unpack_from(self._map, self._offset(chain[0]))
+        _, prompt, game_over, _, _, _, room, steps, seed, _ = fields[:10]
+        game_state = create_game_state(self.world, seed)
+        game_state.room = room
+        game_state.steps_taken = steps
+        game_state.game_over = bool(game_over)
+        game_state.pending_prompt = PROMPTS[prompt]
+
+        room_keys = self.registry.room_keys
+        solved = []
+        items_start = 10 + len(TOUCHED_ROOM) * TOUCHED_CAPACITY
+        for slot in chain:
+            fields = self.record.unpack_from(self._map, self._offset(slot))
+            item_count, room_count = fields[3:5]
+            for position in range(10, 10 + len(TOUCHED_ROOM) * room_count, 3):
+                room, mask, flags = fields[position : position + 3]
+                room_key = room_keys[room]
+                if mask:
+                    if game_state.removed_items is None:
+                        game_state.removed_items = {}
+                    game_state.removed_items[room_key] = mask
+                if flags & ROOM_COIN:
+                    if game_state.added_items is None:
+                        game_state.added_items = {}
+                    game_state.added_items[room_key] = ["coin"]
+                if flags & ROOM_SOLVED:
+                    solved.append(room)
+            game_state.inventory.ids.extend(
+                fields[items_start : items_start + item_count]
+            )
+
+        if solved:
+            game_state.solved_rooms = frozenset(solved)
+        for item_id in game_state.inventory.ids:
+            game_state.inventory.mask |= 1 << item_id
+        return game_state
+
+    def delete(self, key: int) -> bool:
+        """
+        Удаляет сессию. Возвращает False, если её не было.
+        """
+        chain = self._index.pop(key, None)
+        if chain is None:
+            return False
+        self._release(chain)
+        return True
+
+    def _release(self, slots: list[int]) -> None:
+        """
+        Помечает записи свободными.
+        """
+        for slot in slots:
+            self._map[self._offset(slot)] = RECORD_FREE
+            self._free.append(slot)
+
+    def compact(self) -> None:
+        """
+        Сдвигает записи в начало файла и освобождает место после удалений.
+        """
+        size = self.record.size
+        occupied = sorted(slot for chain in self._index.values() for slot in chain)
+        moved = {}
+        for new_slot, slot in enumerate(occupied):
+            if slot != new_slot:
+                self._map.move(self._offset(new_slot), self._offset(slot), size)
+            moved[slot] = new_slot
+
+        # Позиции продолжений сдвинулись: переписываем ссылки цепочек.
+        link = self.head.size - 4
+        for key, chain in self._index.items():
+            chain = self._index[key] = [moved[slot] for slot in chain]
+            for slot, next_slot in zip(chain, [*chain[1:], NO_NEXT]):
+                struct.pack_into("<I", self._map, self._offset(slot) + link, next_slot)
+
+        capacity = max(len(occupied), INITIAL_CAPACITY)
+        tail = self._offset(len(occupied))
+        end = self._offset(self.capacity)
+        self._map[tail:end] = bytes(end - tail)
+        self._resize(capacity)
+        self._free = list(reversed(range(len(occupied), capacity)))
+
+    def _grow(self) -> None:
+        """
+        Удваивает ёмкость файла. Новые записи заполнены нулями, то есть свободны,
+        и выдаются после уже свободных.
+        """
+        capacity = self.capacity
+        self._resize(capacity * 2)
+        self._free[:0] = reversed(range(capacity, capacity * 2))
+
+    def _resize(self, capacity: int) -> None:
+        """
+        Меняет ёмкость файла и записывает её в заголовок.
+        """
+        self._map.resize(self._offset(capacity))
+        self.capacity = capacity
+        STORE_HEADER.pack_into(
+            self._map, 0, STORE_MAGIC, self.version, self.record.size, capacity
+        )
+
+    def flush(self) -> None:
+        """
+        Сбрасывает изменения на диск.
+        """
+        self._map.flush()
+
+    def close(self) -> None:
+        """
+        Сбрасывает изменения и закрывает файл.
+        """
+        self._map.flush()
+        self._map.close()
+        self._file.close()
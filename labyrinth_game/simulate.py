@@ -0,0 +1,398 @@
+import argparse
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from labyrinth_game import utils
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import (
+    COIN_FOUND,
+    FLOOR_GAVE_WAY,
+    FLOOR_GLINTS,
+    GAME_WON,
+    ITEM_LOST,
+    PLAYER_DIED,
+    PLAYER_QUIT,
+    RUSTLE_HEARD,
+    TRAP_TRIGGERED,
+)
+from labyrinth_game.hints import get_hint_table, prepare_hints
+from labyrinth_game.main import process_command
+from labyrinth_game.state import DEFAULT_SEED, GameState
+from labyrinth_game.world import build_actions, create_game_state
+from labyrinth_game.world_loader import open_world
+
+POLICIES = ("random", "scripted", "solver")
+TUNABLE_CONSTANTS = (
+    "EVENT_PROBABILITY",
+    "DAMAGE_THRESHOLD",
+    "EVENT_TYPES",
+    "TRAP_CHANCE",
+    "TORCH_SAVE_CHANCE",
+    "RANDOM_MOVEMENT_CHANCE",
+)
+SCRIPT = ("east", "take rusty key", "west", "north", "north", "solve")
+
+MAX_COMMANDS = 200
+CHUNK_SIZE = 1000
+STEPS_BUCKETS = 256
+ITEMS_LOST_BUCKETS = 32
+
+RANDOM_EVENT_KINDS = {
+    FLOOR_GLINTS: "находка",
+    RUSTLE_HEARD: "шорох",
+    FLOOR_GAVE_WAY: "ловушка",
+}
+
+OUTCOMES = ("won", "died", "quit", "timeout")
+
+
+class Histogram:
+    """
+    Гистограмма целых значений с постоянным числом корзин.
+    Значения не меньше последней корзины попадают в неё же.
+    """
+
+    __slots__ = ("counts", "total", "sum")
+
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * buckets
+        self.total = 0
+        self.sum = 0
+
+    def add(self, value: int) -> None:
+        """
+        Учитывает одно значение.
+        """
+        self.counts[min(value, len(self.counts) - 1)] += 1
+        self.total += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Добавляет к гистограмме данные другой гистограммы того же размера.
+        """
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Возвращает значение, ниже которого лежит заданная доля наблюдений.
+        """
+        if not self.total:
+            return 0
+        threshold = fraction * self.total
+        seen = 0
+        for value, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold:
+                return value
+        return len(self.counts) - 1
+
+    def summary(self) -> dict[str, float]:
+        """
+        Возвращает краткую сводку: среднее и основные перцентили.
+        """
+        return {
+            "mean": self.sum / self.total if self.total else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
+
+
+class SimulationStats:
+    """
+    Накопленная статистика прогонов. Размер не зависит от числа игр,
+    статистики разных процессов складываются через merge.
+    """
+
+    def __init__(self) -> None:
+        self.games = 0
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.trap_triggers = 0
+        self.coins_found = 0
+        self.random_events = dict.fromkeys(RANDOM_EVENT_KINDS.values(), 0)
+        self.steps = Histogram(STEPS_BUCKETS)
+        self.items_lost = Histogram(ITEMS_LOST_BUCKETS)
+
+    def merge(self, other: "SimulationStats") -> None:
+        """
+        Добавляет статистику другого прогона.
+        """
+        self.games += other.games
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        for kind, count in other.random_events.items():
+            self.random_events[kind] += count
+        self.trap_triggers += other.trap_triggers
+        self.coins_found += other.coins_found
+        self.steps.merge(other.steps)
+        self.items_lost.merge(other.items_lost)
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Возвращает сводку для вывода в JSON.
+        """
+        games = self.games or 1
+        return {
+            "games": self.games,
+            "win_rate": self.outcomes["won"] / games,
+            "death_rate": self.outcomes["died"] / games,
+            "outcomes": self.outcomes,
+            "trap_triggers": self.trap_triggers,
+            "coins_found": self.coins_found,
+            "random_events": self.random_events,
+            "steps_to_finish": self.steps.summary(),
+            "items_lost": self.items_lost.summary(),
+        }
+
+
+Policy = Callable[[GameState], str]
+
+
+def make_policy(name: str, world: dict[str, Any], seed: int) -> Policy:
+    """
+    Создаёт стратегию игрока для одной игры.
+    random — случайные команды, scripted — заранее заданный сценарий,
+    solver — кратчайший путь к победе из текущего состояния по таблице
+    подсказок (её готовит процесс до игр). Путь выбирается заново после
+    каждой команды, поэтому решатель играет с потоком случайных событий
+    своей игры, а не с потоком по умолчанию.
+    """
+    if name == "random":
+        actions = _actions(world)
+        rng = random.Random(seed)
+        return lambda game_state: rng.choice(actions)
+
+    if name == "scripted":
+        return _script_policy(SCRIPT)
+
+    if name == "solver":
+        return _solver_policy(world)
+
+    raise ValueError(f"Неизвестная стратегия: {name}. Доступны: {POLICIES}")
+
+
+def _script_policy(script: tuple[str, ...]) -> Policy:
+    """
+    Стратегия, которая проигрывает сценарий и затем выходит из игры.
+    """
+    commands = iter(script)
+    return lambda game_state: next(commands, "quit")
+
+
+def _solver_policy(world: dict[str, Any]) -> Policy:
+    """
+    Стратегия, которая делает следующий шаг кратчайшего пути к победе,
+    отвечая на загадки, и выходит из игры, если победить уже нельзя.
+    """
+    table = get_hint_table(world)
+    if table is None:
+        raise ValueError("Для стратегии solver нужна таблица подсказок карты.")
+
+    def policy(game_state: GameState) -> str:
+        action = table.hint(game_state)
+        if action is None:
+            return "quit"
+        if action == "solve":
+            return f"solve {world[game_state.current_room]['puzzle'][1]}"
+        return action
+
+    return policy
+
+
+_actions_cache: dict[int, tuple[str, ...]] = {}
+_world: dict[str, Any] = ROOMS
+
+
+def _actions(world: dict[str, Any]) -> tuple[str, ...]:
+    """
+    Возвращает команды для случайной стратегии (без выхода из игры).
+    """
+    actions = _actions_cache.get(id(world))
+    if actions is None:
+        actions = build_actions(world)
+        _actions_cache[id(world)] = actions
+    return actions
+
+
+def play_game(
+    stats: SimulationStats,
+    world: dict[str, Any],
+    policy: Policy,
+    max_commands: int = MAX_COMMANDS,
+    seed: int = DEFAULT_SEED,
+) -> None:
+    """
+    Проигрывает одну игру без вывода текста и добавляет её итог в статистику.
+    seed задаёт поток случайных событий игры.
+    """
+    game_state = create_game_state(world, seed)
+    outcome = "timeout"
+    items_lost = 0
+
+    for _ in range(max_commands):
+        events = process_command(game_state, policy(game_state))
+
+        for kind, _ in events:
+            if kind == TRAP_TRIGGERED:
+                stats.trap_triggers += 1
+            elif kind == ITEM_LOST:
+                items_lost += 1
+            elif kind == COIN_FOUND:
+                stats.coins_found += 1
+            elif kind == GAME_WON:
+                outcome = "won"
+            elif kind == PLAYER_DIED:
+                outcome = "died"
+            elif kind == PLAYER_QUIT:
+                outcome = "quit"
+
+            random_event = RANDOM_EVENT_KINDS.get(kind)
+            if random_event is not None:
+                stats.random_events[random_event] += 1
+
+        if game_state.game_over:
+            break
+
+    stats.games += 1
+    stats.outcomes[outcome] += 1
+    stats.steps.add(game_state.steps_taken)
+    stats.items_lost.add(items_lost)
+
+
+def _init_worker(
+    overrides: dict[str, int], world: dict[str, Any] | str | None, policy: str
+) -> None:
+    """
+    Готовит процесс-исполнитель: подставляет значения настраиваемых констант,
+    открывает карту (по пути, если передан путь) и готовит таблицу подсказок
+    для решателя.
+    """
+    global _world
+    for name, value in overrides.items():
+        if name not in TUNABLE_CONSTANTS:
+            raise ValueError(f"Константу {name} нельзя менять при симуляции.")
+        setattr(utils, name, value)
+    utils.reset_event_tables()
+
+    if isinstance(world, str):
+        world = open_world(world)
+    _world = world if world is not None else ROOMS
+    if policy == "solver" and get_hint_table(_world) is None:
+        prepare_hints(_world)
+
+
+def _run_chunk(
+    policy: str, first_seed: int, games: int, max_commands: int
+) -> SimulationStats:
+    """
+    Проигрывает на карте процесса пачку игр с последовательными seed
+    и возвращает их статистику.
+    """
+    stats = SimulationStats()
+    for seed in range(first_seed, first_seed + games):
+        play_game(stats, _world, make_policy(policy, _world, seed), max_commands, seed)
+    return stats
+
+
+def simulate(
+    games: int,
+    policy: str = "random",
+    workers: int | None = None,
+    seed: int = 0,
+    max_commands: int = MAX_COMMANDS,
+    overrides: dict[str, int] | None = None,
+    world: dict[str, Any] | None = None,
+    world_path: str | None = None,
+) -> SimulationStats:
+    """
+    Проигрывает games игр без вывода текста, раскладывая их по пулу процессов,
+    и возвращает объединённую статистику.
+    overrides задаёт значения констант вроде EVENT_PROBABILITY и TRAP_CHANCE.
+    Карта — world или файл (каталог чанков) world_path. Процессам пула
+    передаётся путь к карте, которую каждый открывает сам: карта из чанков
+    не передаётся между процессами, а обычная карта передаётся один раз
+    на процесс, а не с каждой пачкой игр.
+    """
+    global _world
+    if policy not in POLICIES:
+        raise ValueError(f"Неизвестная стратегия: {policy}. Доступны: {POLICIES}")
+
+    overrides = overrides or {}
+    workers = workers or os.cpu_count() or 1
+    chunks = [
+        (policy, seed + start, min(CHUNK_SIZE, games - start), max_commands)
+        for start in range(0, games, CHUNK_SIZE)
+    ]
+
+    total = SimulationStats()
+    if workers == 1:
+        saved = {name: getattr(utils, name) for name in overrides}
+        try:
+            _init_worker(overrides, world if world is not None else world_path, policy)
+            for chunk in chunks:
+                total.merge(_run_chunk(*chunk))
+        finally:
+            for name, value in saved.items():
+                setattr(utils, name, value)
+            utils.reset_event_tables()
+            _world = ROOMS
+        return total
+
+    source = world_path if world is None else world
+    if isinstance(world, ChunkedWorld):
+        source = world.directory
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(overrides, source, policy)
+    ) as pool:
+        for stats in pool.map(_run_chunk, *zip(*chunks)):
+            total.merge(stats)
+    return total
+
+
+def main() -> None:
+    """
+    Точка входа для запуска симуляции из командной строки.
+    """
+    parser = argparse.ArgumentParser(description="Симуляция прохождений лабиринта")
+    parser.add_argument("games", type=int)
+    parser.add_argument("--policy", choices=POLICIES, default="random")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-commands", type=int, default=MAX_COMMANDS)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="ИМЯ=ЗНАЧЕНИЕ",
+        help=f"значение константы: {', '.join(TUNABLE_CONSTANTS)}",
+    )
+    parser.add_argument("--world", help="файл или каталог чанков карты")
+    args = parser.parse_args()
+
+    overrides = {}
+    for assignment in args.set:
+        name, _, value = assignment.partition("=")
+        overrides[name.strip().upper()] = int(value)
+
+    stats = simulate(
+        args.games,
+        policy=args.policy,
+        workers=args.workers,
+        seed=args.seed,
+        max_commands=args.max_commands,
+        overrides=overrides,
+        world_path=args.world,
+    )
+    print(json.dumps(stats.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
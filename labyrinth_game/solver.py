@@ -0,0 +1,308 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, NamedTuple
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import GAME_WON
+from labyrinth_game.main import process_command
+from labyrinth_game.state import GameState, get_registry
+from labyrinth_game.world import build_actions, create_game_state, list_items
+
+# Младший байт кода — версия упаковки: код другой версии не распаковывается.
+CODEC_VERSION = 2
+VERSION_BITS = 8
+STEP_BITS = 32
+SEED_BITS = 64
+PROMPT_BITS = 2
+# Длина маски взятых предметов комнаты (в битах) хранится в поле такой ширины.
+MASK_LENGTH_BITS = 16
+PROMPTS = (None, "puzzle_answer", "treasure_confirm", "treasure_code")
+
+PARALLEL_FRONTIER = 4096
+CHUNK_SIZE = 1024
+
+OUTCOME_STATE = 0
+OUTCOME_WON = 1
+OUTCOME_DIED = 2
+
+
+class SolverResult(NamedTuple):
+    """
+    Результат полного перебора состояний игры.
+    """
+
+    winnable: bool
+    solution: tuple[str, ...] | None
+    dead_ends: tuple[tuple[str, ...], ...]
+    states_explored: int
+
+
+class StateCodec:
+    """
+    Упаковывает состояние сессии в одно целое число и распаковывает обратно.
+    В число входят версия упаковки, комната, число шагов, ожидаемый вопрос
+    и seed случайных событий, а за ними — списки решённых загадок, комнат
+    со взятыми предметами (с маской взятых) и комнат с брошенной монетой,
+    каждый с длиной и по возрастанию номеров комнат, и инвентарь
+    с сохранением порядка. Комнаты нумеруются по справочнику карты, поэтому
+    код сессии совпадает с её game_state.room. Таблицы кодека строятся
+    по справочнику, без чтения комнат: для карты из чанков не загружается
+    ни один чанк.
+    """
+
+    def __init__(self, world: dict[str, Any]) -> None:
+        self.world = world
+        registry = get_registry(world)
+        self.room_keys = registry.room_keys
+        self.room_ids = registry.room_ids
+        self.items = list_items(world)
+
+        rooms = len(self.room_keys)
+        self.room_bits = max(1, (rooms - 1).bit_length())
+        self.count_bits = rooms.bit_length()
+        self.item_bits = (len(self.items) + 1).bit_length()
+
+        self.room_shift = VERSION_BITS
+        self.steps_shift = self.room_shift + self.room_bits
+        self.prompt_shift = self.steps_shift + STEP_BITS
+        self.seed_shift = self.prompt_shift + PROMPT_BITS
+        self.lists_shift = self.seed_shift + SEED_BITS
+
+    def encode(self, game_state: GameState) -> int:
+        """
+        Упаковывает состояние сессии в целое число.
+        """
+        if not 0 <= game_state.seed < 1 << SEED_BITS:
+            raise ValueError(f"seed сессии не помещается в {SEED_BITS} бит.")
+        if not 0 <= game_state.steps_taken < 1 << STEP_BITS:
+            raise ValueError(f"Число шагов не помещается в {STEP_BITS} бит.")
+        code = CODEC_VERSION
+        code |= game_state.room << self.room_shift
+        code |= game_state.steps_taken << self.steps_shift
+        code |= PROMPTS.index(game_state.pending_prompt) << self.prompt_shift
+        code |= game_state.seed << self.seed_shift
+
+        count_bits = self.count_bits
+        room_bits = self.room_bits
+        shift = self.lists_shift
+
+        solved = game_state.solved_rooms
+        code |= len(solved) << shift
+        shift += count_bits
+        for room in sorted(solved):
+            code |= room << shift
+            shift += room_bits
+
+        room_ids = self.room_ids
+        removed = sorted(
+            (room_ids[key], mask)
+            for key, mask in (game_state.removed_items or {}).items()
+            if mask
+        )
+        code |= len(removed) << shift
+        shift += count_bits
+        for room, mask in removed:
+            length = mask.bit_length()
+            if length >> MASK_LENGTH_BITS:
+                raise ValueError(
+                    f"Маска предметов не помещается в {MASK_LENGTH_BITS} бит."
+                )
+            code |= room << shift
+            shift += room_bits
+            code |= length << shift
+            shift += MASK_LENGTH_BITS
+            code |= mask << shift
+            shift += length
+
+        coins = sorted(
+            room_ids[key]
+            for key, added in (game_state.added_items or {}).items()
+            if added
+        )
+        code |= len(coins) << shift
+        shift += count_bits
+        for room in coins:
+            code |= room << shift
+            shift += room_bits
+
+        for item_id in game_state.inventory.ids:
+            code |= (item_id + 1) << shift
+            shift += self.item_bits
+        return code
+
+    def decode(self, code: int) -> GameState:
+        """
+        Восстанавливает состояние сессии из целого числа.
+        """
+        if code & ((1 << VERSION_BITS) - 1) != CODEC_VERSION:
+            raise ValueError("Состояние упаковано другой версией кодека.")
+        seed = (code >> self.seed_shift) & ((1 << SEED_BITS) - 1)
+        game_state = create_game_state(self.world, seed)
+        game_state.room = (code >> self.room_shift) & ((1 << self.room_bits) - 1)
+        game_state.steps_taken = (code >> self.steps_shift) & ((1 << STEP_BITS) - 1)
+        game_state.pending_prompt = PROMPTS[
+            (code >> self.prompt_shift) & ((1 << PROMPT_BITS) - 1)
+        ]
+
+        count_mask = (1 << self.count_bits) - 1
+        room_bits = self.room_bits
+        room_mask = (1 << room_bits) - 1
+        rest = code >> self.lists_shift
+
+        count = rest & count_mask
+        rest >>= self.count_bits
+        if count:
+            solved = []
+            for _ in range(count):
+                solved.append(rest & room_mask)
+                rest >>= room_bits
+            game_state.solved_rooms = frozenset(solved)
+
+        count = rest & count_mask
+        rest >>= self.count_bits
+        if count:
+            game_state.removed_items = {}
+            for _ in range(count):
+                key = self.room_keys[rest & room_mask]
+                rest >>= room_bits
+                length = rest & ((1 << MASK_LENGTH_BITS) - 1)
+                rest >>= MASK_LENGTH_BITS
+                game_state.removed_items[key] = rest & ((1 << length) - 1)
+                rest >>= length
+
+        count = rest & count_mask
+        rest >>= self.count_bits
+        if count:
+            game_state.added_items = {}
+            for _ in range(count):
+                game_state.added_items[self.room_keys[rest & room_mask]] = ["coin"]
+                rest >>= room_bits
+
+        item_mask = (1 << self.item_bits) - 1
+        while rest:
+            game_state.inventory.append(self.items[(rest & item_mask) - 1])
+            rest >>= self.item_bits
+
+        return game_state
+
+
+_codec: StateCodec | None = None
+_actions: tuple[str, ...] = ()
+
+
+def _init_worker(world: dict[str, Any], actions: tuple[str, ...]) -> None:
+    """
+    Готовит процесс-исполнитель: кодек и список действий для карты.
+    """
+    global _codec, _actions
+    _codec = StateCodec(world)
+    _actions = actions
+
+
+def _expand(codes: list[int]) -> list[tuple[int, int, int, int]]:
+    """
+    Применяет все действия к каждому состоянию.
+    Возвращает кортежи (родитель, действие, исход, потомок).
+    """
+    results = []
+    for code in codes:
+        for action, command in enumerate(_actions):
+            game_state = _codec.decode(code)
+            events = process_command(game_state, command)
+
+            if game_state.game_over:
+                won = any(kind == GAME_WON for kind, _ in events)
+                outcome = OUTCOME_WON if won else OUTCOME_DIED
+                results.append((code, action, outcome, -1))
+            else:
+                child = _codec.encode(game_state)
+                if child != code:
+                    results.append((code, action, OUTCOME_STATE, child))
+    return results
+
+
+def solve(
+    world: dict[str, Any] | None = None,
+    max_depth: int = 10,
+    workers: int | None = None,
+    stop_at_win: bool = False,
+) -> SolverResult:
+    """
+    Перебирает в ширину все состояния, достижимые из входа за max_depth команд.
+    Находит кратчайшую победную последовательность команд и все тупики —
+    последовательности, которые заканчиваются гибелью игрока.
+    Большие слои перебора раскладываются по пулу процессов.
+    """
+    world = world if world is not None else ROOMS
+    actions = tuple(
+        command for command in build_actions(world) if command not in ("solve", "look")
+    )
+    _init_worker(world, actions)
+
+    start = _codec.encode(create_game_state(world))
+    parents: dict[int, tuple[int, int] | None] = {start: None}
+    frontier = [start]
+    solution = None
+    dead_ends = []
+
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    try:
+        for _ in range(max_depth):
+            if not frontier:
+                break
+
+            if workers > 1 and len(frontier) >= PARALLEL_FRONTIER:
+                if pool is None:
+                    pool = ProcessPoolExecutor(
+                        workers, initializer=_init_worker, initargs=(world, actions)
+                    )
+                chunks = [
+                    frontier[i : i + CHUNK_SIZE]
+                    for i in range(0, len(frontier), CHUNK_SIZE)
+                ]
+                expanded = (row for rows in pool.map(_expand, chunks) for row in rows)
+            else:
+                expanded = _expand(frontier)
+
+            next_frontier = []
+            for parent, action, outcome, child in expanded:
+                if outcome == OUTCOME_WON:
+                    if solution is None:
+                        solution = _path(parents, parent, actions) + (actions[action],)
+                elif outcome == OUTCOME_DIED:
+                    dead_ends.append(
+                        _path(parents, parent, actions) + (actions[action],)
+                    )
+                elif child not in parents:
+                    parents[child] = (parent, action)
+                    next_frontier.append(child)
+
+            frontier = next_frontier
+            if stop_at_win and solution is not None:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return SolverResult(
+        winnable=solution is not None,
+        solution=solution,
+        dead_ends=tuple(dead_ends),
+        states_explored=len(parents),
+    )
+
+
+def _path(
+    parents: dict[int, tuple[int, int] | None], code: int, actions: tuple[str, ...]
+) -> tuple[str, ...]:
+    """
+    Восстанавливает последовательность команд от входа до состояния.
+    """
+    path = []
+    link = parents[code]
+    while link is not None:
+        code, action = link
+        path.append(actions[action])
+        link = parents[code]
+    return tuple(reversed(path))
@@ -0,0 +1,290 @@
+from array import array
+from typing import Any, Iterable, Iterator
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import EXTRA_ITEMS, ROOMS
+
+# seed сессии по умолчанию: поток случайных событий (см. RandomStream).
+DEFAULT_SEED = 0
+# Сколько описаний комнат хранит справочник карты (см. Registry.views).
+ROOM_VIEW_CACHE_SIZE = 1 << 16
+# Решённые загадки новой сессии: одно пустое множество на все сессии.
+NO_SOLVED_ROOMS: frozenset[int] = frozenset()
+
+
+class Registry:
+    """
+    Справочник карты: комнаты и предметы получают небольшие целые номера.
+    Один справочник на карту, общий для всех сессий.
+    Для карты из чанков номера комнат и список предметов берутся из её
+    индекса, без чтения всех комнат.
+    answers — принятые ответы загадок по комнатам, собираются при первой
+    проверке ответа в комнате.
+    views — готовые описания комнат по состоянию комнаты
+    (см. get_room_view), общие для всех сессий.
+    """
+
+    __slots__ = ("room_keys", "room_ids", "items", "item_ids", "answers", "views")
+
+    def __init__(self, world: dict[str, Any]) -> None:
+        self.answers: dict[str, frozenset[str]] = {}
+        self.views: dict[tuple[Any, ...], Any] = {}
+        if isinstance(world, ChunkedWorld):
+            self.room_keys = world.room_keys
+            self.room_ids = world.room_ids
+            self.items = list(world.items)
+            self.item_ids = {item: index for index, item in enumerate(self.items)}
+            return
+
+        self.room_keys = tuple(world)
+        self.room_ids = {key: index for index, key in enumerate(self.room_keys)}
+
+        items = dict.fromkeys(item for room in world.values() for item in room["items"])
+        items.update(dict.fromkeys(EXTRA_ITEMS))
+        self.items = list(items)
+        self.item_ids = {item: index for index, item in enumerate(self.items)}
+
+    def item_id(self, item: str) -> int:
+        """
+        Возвращает номер предмета, регистрируя новый предмет при необходимости.
+        """
+        item_id = self.item_ids.get(item)
+        if item_id is None:
+            item_id = len(self.items)
+            self.items.append(item)
+            self.item_ids[item] = item_id
+        return item_id
+
+    def remember_view(self, key: tuple[Any, ...], view: Any) -> None:
+        """
+        Запоминает описание комнаты. Когда описаний набирается
+        ROOM_VIEW_CACHE_SIZE, забывается самое старое.
+        """
+        if len(self.views) >= ROOM_VIEW_CACHE_SIZE:
+            del self.views[next(iter(self.views))]
+        self.views[key] = view
+
+
+_registries: dict[int, tuple[dict[str, Any], Registry]] = {}
+
+
+def get_registry(world: dict[str, Any]) -> Registry:
+    """
+    Возвращает справочник карты, создавая его при первом обращении.
+    """
+    entry = _registries.get(id(world))
+    if entry is None or entry[0] is not world:
+        entry = (world, Registry(world))
+        _registries[id(world)] = entry
+    return entry[1]
+
+
+class Inventory:
+    """
+    Инвентарь игрока: номера предметов в порядке подбора и битовая маска
+    для проверки наличия предмета за постоянное время.
+    Ведёт себя как список названий предметов.
+    """
+
+    __slots__ = ("registry", "ids", "mask")
+
+    def __init__(self, registry: Registry, items: Iterable[str] = ()) -> None:
+        self.registry = registry
+        self.ids = array("H")
+        self.mask = 0
+        for item in items:
+            self.append(item)
+
+    def __contains__(self, item: object) -> bool:
+        item_id = self.registry.item_ids.get(item)
+        return item_id is not None and bool(self.mask >> item_id & 1)
+
+    def __iter__(self) -> Iterator[str]:
+        items = self.registry.items
+        return (items[item_id] for item_id in self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (Inventory, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Inventory({list(self)!r})"
+
+    def append(self, item: str) -> None:
+        """
+        Добавляет предмет в конец инвентаря.
+        """
+        item_id = self.registry.item_id(item)
+        self.ids.append(item_id)
+        self.mask |= 1 << item_id
+
+    def pop(self, index: int = -1) -> str:
+        """
+        Убирает предмет по номеру позиции и возвращает его название.
+        """
+        item_id = self.ids.pop(index)
+        if item_id not in self.ids:
+            self.mask &= ~(1 << item_id)
+        return self.registry.items[item_id]
+
+    def remove(self, item: str) -> None:
+        """
+        Убирает первый такой предмет из инвентаря.
+        """
+        item_id = self.registry.item_ids.get(item)
+        if item_id is None or item not in self:
+            raise ValueError(f"{item!r} нет в инвентаре")
+        self.pop(self.ids.index(item_id))
+
+
+WRITABLE_KEYS = (
+    "player_inventory",
+    "current_room",
+    "game_over",
+    "steps_taken",
+    "solved_puzzles",
+    "pending_prompt",
+)
+SNAPSHOT_KEYS = ("world", "removed_items", "added_items")
+STATE_KEYS = WRITABLE_KEYS + SNAPSHOT_KEYS
+
+
+class GameState:
+    """
+    Состояние игровой сессии.
+    Комната хранится номером из справочника карты, решённые загадки —
+    множеством номеров их комнат (размер зависит от числа решённых
+    загадок, а не от размера карты), взятые из комнаты предметы —
+    битовой маской по их позициям в комнате. Словари изменений комнат
+    создаются только при первом изменении.
+    seed задаёт поток случайных событий сессии.
+    Поддерживает доступ как к словарю со старыми ключами
+    (game_state["current_room"] и т. п.) для совместимости;
+    изменения предметов комнат по старым ключам доступны только для чтения.
+    """
+
+    __slots__ = (
+        "world",
+        "registry",
+        "room",
+        "steps_taken",
+        "game_over",
+        "inventory",
+        "pending_prompt",
+        "removed_items",
+        "added_items",
+        "solved_rooms",
+        "seed",
+    )
+
+    def __init__(
+        self, world: dict[str, Any] | None = None, seed: int = DEFAULT_SEED
+    ) -> None:
+        self.world = world if world is not None else ROOMS
+        self.registry = get_registry(self.world)
+        self.room = self.registry.room_ids["entrance"]
+        self.steps_taken = 0
+        self.game_over = False
+        self.inventory = Inventory(self.registry)
+        self.pending_prompt: str | None = None
+        self.removed_items: dict[str, int] | None = None
+        self.added_items: dict[str, list[str]] | None = None
+        self.solved_rooms = NO_SOLVED_ROOMS
+        self.seed = seed
+
+    @property
+    def current_room(self) -> str:
+        return self.registry.room_keys[self.room]
+
+    @current_room.setter
+    def current_room(self, room_key: str) -> None:
+        self.room = self.registry.room_ids[room_key]
+
+    @property
+    def player_inventory(self) -> Inventory:
+        return self.inventory
+
+    @player_inventory.setter
+    def player_inventory(self, items: Iterable[str]) -> None:
+        self.inventory = Inventory(self.registry, items)
+
+    @property
+    def solved_puzzles(self) -> frozenset[str]:
+        room_keys = self.registry.room_keys
+        return frozenset(room_keys[room] for room in self.solved_rooms)
+
+    @solved_puzzles.setter
+    def solved_puzzles(self, room_keys: Iterable[str]) -> None:
+        room_ids = self.registry.room_ids
+        self.solved_rooms = frozenset(room_ids[room_key] for room_key in room_keys)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in WRITABLE_KEYS:
+            return getattr(self, key)
+        if key in SNAPSHOT_KEYS:
+            return self.as_dict()[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in WRITABLE_KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in STATE_KEYS
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Возвращает значение по старому ключу словаря состояния.
+        """
+        if key not in STATE_KEYS:
+            return default
+        value = self[key]
+        return default if value is None else value
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        """
+        Возвращает значение по старому ключу, задавая его, если оно пусто.
+        """
+        if self.get(key) is None:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """
+        Возвращает и сбрасывает ожидаемый вопрос сессии.
+        """
+        if key != "pending_prompt":
+            raise KeyError(key)
+        value = self.pending_prompt
+        self.pending_prompt = None
+        return default if value is None else value
+
+    def as_dict(self) -> dict[str, Any]:
+        """
+        Возвращает копию состояния в виде старого словаря.
+        """
+        return {
+            "world": self.world,
+            "player_inventory": list(self.inventory),
+            "current_room": self.current_room,
+            "game_over": self.game_over,
+            "steps_taken": self.steps_taken,
+            "removed_items": {
+                key: {
+                    item
+                    for slot, item in enumerate(self.world[key]["items"])
+                    if mask >> slot & 1
+                }
+                for key, mask in (self.removed_items or {}).items()
+            },
+            "added_items": {
+                key: list(items) for key, items in (self.added_items or {}).items()
+            },
+            "solved_puzzles": set(self.solved_puzzles),
+            "pending_prompt": self.pending_prompt,
+        }
@@ -1,7 +1,50 @@
 import math
-from typing import Any
-
-from labyrinth_game.constants import COMMANDS, ROOMS
+from functools import lru_cache
+from typing import Callable, Iterable
+
+from labyrinth_game.answers import normalize_answer
+from labyrinth_game.event_tables import EventRule, EventTable, RandomStream
+from labyrinth_game.events import (
+    CHEST_ALREADY_OPEN,
+    CHEST_LEFT,
+    CHEST_LOCKED,
+    CHEST_MISSING,
+    CHEST_OPENED,
+    COIN_FOUND,
+    FLOOR_GAVE_WAY,
+    FLOOR_GLINTS,
+    GAME_WON,
+    HELP_SHOWN,
+    ITEM_LOST,
+    LOCATION_UNKNOWN,
+    NO_PUZZLE,
+    ONLY_DUST,
+    PLAYER_DIED,
+    PLAYER_THROWN,
+    PUZZLE_FAILED,
+    PUZZLE_SHOWN,
+    PUZZLE_SOLVED,
+    ROOM_DESCRIBED,
+    ROOM_INVALID,
+    RUSTLE_ENDED,
+    RUSTLE_HEARD,
+    TRAP_AVOIDED,
+    TRAP_SURVIVED,
+    TRAP_TRIGGERED,
+    WRONG_CODE,
+    Event,
+)
+from labyrinth_game.state import GameState
+from labyrinth_game.world import (
+    add_room_item,
+    get_puzzle_answers,
+    get_room,
+    get_room_items,
+    get_room_puzzle,
+    mark_puzzle_solved,
+    remove_room_item,
+    room_state_key,
+)
 
 EVENT_PROBABILITY = 3
 DAMAGE_THRESHOLD = 3
@@ -13,255 +56,420 @@ RANDOM_MOVEMENT_CHANCE = 3
 
 SIN_MULTIPLIER_1 = 12.9898
 SIN_MULTIPLIER_2 = 43758.5453
+FRACTION_CACHE_SIZE = 1 << 16
+# Места розыгрыша в потоке хода (см. RandomStream).
+MOVE_STREAM = 0
+TRAP_STREAM = 1
+
+PROMPT_PUZZLE_ANSWER = "puzzle_answer"
+PROMPT_TREASURE_CONFIRM = "treasure_confirm"
+PROMPT_TREASURE_CODE = "treasure_code"
 
 
-def describe_current_room(game_state: dict[str, Any]) -> None:
+def describe_current_room(game_state: GameState) -> list[Event]:
     """
-    Выводит полную информацию о текущей комнате:
+    Возвращает событие с полной информацией о текущей комнате:
     - название
     - описание
     - заметные предметы
     - доступные выходы
-    - сообщение о загадке
+    - наличие загадки
+    Событие собирается один раз на состояние комнаты (см. room_state_key)
+    и дальше берётся из справочника карты, общего для всех сессий.
     """
-    current_room_key = game_state.get("current_room")
+    current_room_key = game_state.current_room
     if current_room_key is None:
         raise ValueError("game_state не содержит 'current_room'!")
 
-    room_data = ROOMS.get(current_room_key)
+    key = room_state_key(game_state, current_room_key)
+    view = game_state.registry.views.get(key)
+    if view is not None:
+        return [view]
+
+    room_data = get_room(game_state, current_room_key)
     if room_data is None:
         raise ValueError("Неверное имя комнаты! Проверьте 'current_room'.")
 
-    print(f"== {current_room_key.upper()} ==")
-
-    description = room_data.get("description", "")
-    print(description)
-
-    items = room_data.get("items", [])
-    if items:
-        print("Заметные предметы:")
-        for item in items:
-            print(f" - {item}")
-
-    exits = room_data.get("exits", {})
-    if exits:
-        exits_list = ", ".join(exits.keys())
-        print(f"Выходы: {exits_list}")
-
-    puzzle = room_data.get("puzzle")
-    if puzzle is not None:
-        print("Кажется, здесь есть загадка (используйте команду solve).")
-
-
-def solve_puzzle(game_state: dict[str, Any]) -> None:
+    view = Event(
+        ROOM_DESCRIBED,
+        (
+            current_room_key,
+            room_data.get("description", ""),
+            tuple(get_room_items(game_state, current_room_key)),
+            tuple(room_data.get("exits", {})),
+            get_room_puzzle(game_state, current_room_key) is not None,
+        ),
+    )
+    game_state.registry.remember_view(key, view)
+    return [view]
+
+
+def solve_puzzle(game_state: GameState, answer: str | None = None) -> list[Event]:
     """
-    Решает загадку в текущей комнате с поддержкой альтернативных ответов.
+    Показывает загадку в текущей комнате.
+    Если ответ не передан, сессия переходит в ожидание ответа:
+    следующая строка ввода будет проверена как ответ на загадку.
     """
-    current_room_key = game_state.get("current_room")
+    current_room_key = game_state.current_room
     if not current_room_key:
-        print("Ошибка: неизвестное местоположение.")
-        return
+        return [Event(LOCATION_UNKNOWN)]
 
-    room = ROOMS.get(current_room_key)
+    room = get_room(game_state, current_room_key)
     if not room:
-        print("Ошибка: комната не найдена.")
-        return
+        return [Event(ROOM_INVALID)]
 
-    puzzle = room.get("puzzle")
+    puzzle = get_room_puzzle(game_state, current_room_key)
     if not puzzle:
-        print("Загадок здесь нет.")
-        return
+        return [Event(NO_PUZZLE)]
 
-    question, correct_answer = puzzle
-    print(f"Загадка: {question}")
+    question = puzzle[0]
+    events = [Event(PUZZLE_SHOWN, (question,))]
 
-    user_answer = input("Ваш ответ: ").strip().lower()
+    if answer is None:
+        game_state.pending_prompt = PROMPT_PUZZLE_ANSWER
+        return events
 
-    valid_answers = [correct_answer.lower()]
+    events.extend(check_puzzle_answer(game_state, answer))
+    return events
 
-    number_alternatives = {
-        "10": ["десять", "10"],
-        "4": ["четыре", "4"],
-        "8": ["восемь", "8"],
-        "366": ["триста шестьдесят шесть", "366"],
-    }
 
-    if correct_answer in number_alternatives:
-        valid_answers = number_alternatives[correct_answer]
+def check_puzzle_answer(game_state: GameState, answer: str) -> list[Event]:
+    """
+    Проверяет ответ на загадку текущей комнаты.
+    Ответ сравнивается в каноническом виде: регистр и ё/е не важны,
+    число можно написать цифрами или словами.
+    """
+    current_room_key = game_state.current_room
+    if not get_room_puzzle(game_state, current_room_key):
+        return [Event(NO_PUZZLE)]
 
-    if user_answer in valid_answers:
-        print("Правильно! Загадка решена.")
+    if normalize_answer(answer) in get_puzzle_answers(game_state, current_room_key):
+        mark_puzzle_solved(game_state, current_room_key)
 
-        room["puzzle"] = None
+        if current_room_key == "portal_room":
+            if "portal_key" not in game_state.inventory:
+                game_state.inventory.append("portal_key")
 
-        if current_room_key == "treasure_room":
-            print("Вы получаете доступ к сундуку!")
-        elif current_room_key == "portal_room":
-            print("Портал активирован! Вы можете использовать его для выхода.")
-            if "portal_key" not in game_state["player_inventory"]:
-                game_state["player_inventory"].append("portal_key")
-        elif current_room_key == "trap_room":
-            print("Ловушка деактивирована! Теперь вы можете безопасно перемещаться.")
-        else:
-            print("Вы чувствуете, что стали ближе к разгадке тайны лабиринта.")
-    else:
-        print("Неверно. Попробуйте снова.")
-        if current_room_key == "trap_room":
-            trigger_trap(game_state)
+        return [Event(PUZZLE_SOLVED, (current_room_key,))]
+
+    events = [Event(PUZZLE_FAILED, (current_room_key,))]
+    if current_room_key == "trap_room":
+        events.extend(trigger_trap(game_state))
+    return events
 
 
-def attempt_open_treasure(game_state: dict[str, Any]) -> bool:
+def attempt_open_treasure(
+    game_state: GameState, code: str | None = None
+) -> list[Event]:
     """
     Пытается открыть сундук с сокровищами.
-    Возвращает True, если игра завершена (победа).
+    Если ключа нет и код не передан, сессия переходит в ожидание ответа
+    на вопрос о вводе кода.
+    При победе отмечает игру завершённой.
     """
-    current_room_key = game_state.get("current_room")
+    current_room_key = game_state.current_room
     if current_room_key != "treasure_room":
-        print("Здесь нет сундука с сокровищами.")
-        return False
+        return [Event(CHEST_MISSING)]
 
-    room = ROOMS.get("treasure_room")
-    if not room or "treasure chest" not in room.get("items", []):
-        print("Сундук с сокровищами уже открыт или отсутствует.")
-        return False
+    if "treasure chest" not in get_room_items(game_state, "treasure_room"):
+        return [Event(CHEST_ALREADY_OPEN)]
 
-    inventory = game_state.get("player_inventory", [])
+    inventory = game_state.inventory
 
     if "rusty key" in inventory:
-        print("Вы применяете ключ, и замок щёлкает. Сундук открыт!")
-        room["items"].remove("treasure chest")
-        print("В сундуке сокровище! Вы победили!")
-        return True
-
-    print("Сундук заперт. У вас нет ключа, но можно попробовать ввести код.")
-    choice = input("Ввести код? (да/нет): ").strip().lower()
-
-    if choice == "да":
-        code = input("Введите код: ").strip()
-        puzzle = room.get("puzzle")
-
-        if puzzle and (code == puzzle[1] or code == "десять"):
-            print("Код принят! Замок щёлкает, и сундук открывается.")
-            room["items"].remove("treasure chest")
-            print("В сундуке сокровище! Вы победили!")
-            return True
-        else:
-            print("Неверный код. Сундук остается запертым.")
-            return False
-    else:
-        print("Вы отступаете от сундука.")
-        return False
+        return _open_treasure(game_state, "key")
 
+    events = [Event(CHEST_LOCKED)]
+    if code is None:
+        game_state.pending_prompt = PROMPT_TREASURE_CONFIRM
+        return events
 
-def show_help() -> None:
+    events.extend(enter_treasure_code(game_state, code))
+    return events
+
+
+def enter_treasure_code(game_state: GameState, code: str) -> list[Event]:
     """
-    Показывает список доступных команд.
+    Проверяет код замка сундука.
+    При верном коде сундук открывается и игра завершается победой.
     """
-    print("\nДоступные команды:")
-    for command, description in COMMANDS.items():
-        print(f"  {command:<16} - {description}")
+    if "treasure chest" not in get_room_items(game_state, "treasure_room"):
+        return [Event(CHEST_ALREADY_OPEN)]
+
+    if not get_room_puzzle(game_state, "treasure_room"):
+        return [Event(WRONG_CODE)]
+
+    if normalize_answer(code) in get_puzzle_answers(game_state, "treasure_room"):
+        return _open_treasure(game_state, "code")
+
+    return [Event(WRONG_CODE)]
+
+
+def _open_treasure(game_state: GameState, method: str) -> list[Event]:
+    """
+    Открывает сундук и завершает игру победой.
+    """
+    remove_room_item(game_state, "treasure_room", "treasure chest")
+    game_state.game_over = True
+    return [Event(CHEST_OPENED, (method,)), Event(GAME_WON, ("treasure",))]
+
+
+def answer_prompt(game_state: GameState, text: str) -> list[Event]:
+    """
+    Передаёт строку ввода вопросу, которого ждёт сессия.
+    """
+    prompt = game_state.pending_prompt
+    game_state.pending_prompt = None
+
+    match prompt:
+        case "puzzle_answer":
+            return check_puzzle_answer(game_state, text)
+        case "treasure_confirm":
+            if text.strip().lower() == "да":
+                game_state.pending_prompt = PROMPT_TREASURE_CODE
+                return []
+            return [Event(CHEST_LEFT)]
+        case "treasure_code":
+            return enter_treasure_code(game_state, text)
+
+    return []
+
+
+def show_help() -> list[Event]:
+    """
+    Возвращает событие со списком доступных команд.
+    """
+    return [Event(HELP_SHOWN)]
+
+
+@lru_cache(maxsize=FRACTION_CACHE_SIZE)
+def pseudo_fraction(seed: int) -> float:
+    """
+    Возвращает дробную часть, из которой строится псевдослучайное число для seed.
+    Значение кешируется: с одним seed обычно запрашивают несколько modulo.
+    """
+    x = math.sin(seed * SIN_MULTIPLIER_1) * SIN_MULTIPLIER_2
+    return x - math.floor(x)
 
 
 def pseudo_random(seed: int, modulo: int) -> int:
     """
     Генерирует псевдослучайное число в диапазоне [0, modulo)
     на основе переданного seed.
+    Случайные события игры берут числа из потоков сессий (RandomStream);
+    для пакетных расчётов есть pseudo_random_batch в random_tables.
     """
-    x = math.sin(seed * SIN_MULTIPLIER_1) * SIN_MULTIPLIER_2
-    fractional_part = x - math.floor(x)
-    return int(fractional_part * modulo)
+    return int(pseudo_fraction(seed) * modulo)
 
 
-def trigger_trap(game_state: dict[str, Any]) -> None:
+def session_stream(game_state: GameState, site: int) -> RandomStream:
+    """
+    Возвращает поток случайных чисел сессии для текущего хода и места
+    розыгрыша (MOVE_STREAM или TRAP_STREAM).
+    """
+    return RandomStream(game_state.seed, game_state.steps_taken, site)
+
+
+def build_event_tables() -> dict[str, tuple[EventRule, ...]]:
+    """
+    Возвращает таблицы случайных событий по текущим значениям констант:
+    - move — события при переходе
+    - trap — исход сработавшей ловушки
+    - damage — урон, когда терять нечего
+    Веса подобраны так, что вероятности совпадают с прежними правилами:
+    событие с шансом 1 / EVENT_PROBABILITY, его вид — один из EVENT_TYPES,
+    провал пола — ловушка с шансом 1 / TRAP_CHANCE, если нет факела;
+    факел спасает от ловушки с шансом 1 / TORCH_SAVE_CHANCE, после потери
+    предмета игрока отбрасывает с шансом 1 / RANDOM_MOVEMENT_CHANCE.
+    """
+    move = [EventRule((EVENT_PROBABILITY - 1) * EVENT_TYPES * TRAP_CHANCE)]
+    kinds = (
+        (EventRule(TRAP_CHANCE, "find_coin"),),
+        (EventRule(TRAP_CHANCE, "rustle"),),
+        (
+            EventRule(TRAP_CHANCE - 1),
+            EventRule(1, "floor_gives_way", forbids=("torch",)),
+            EventRule(1, requires=("torch",)),
+        ),
+    )
+    for kind in range(EVENT_TYPES):
+        move.extend(kinds[kind] if kind < len(kinds) else (EventRule(TRAP_CHANCE),))
+
+    torch = {"requires": ("torch",), "forbids": ("sword",)}
+    unprotected = {"forbids": ("sword", "torch")}
+    stay = RANDOM_MOVEMENT_CHANCE - 1
+    died = min(DAMAGE_THRESHOLD, EVENT_PROBABILITY)
+    return {
+        "move": tuple(move),
+        "trap": (
+            EventRule(1, "sword_saves", requires=("sword",)),
+            EventRule(RANDOM_MOVEMENT_CHANCE, "torch_saves", **torch),
+            EventRule((TORCH_SAVE_CHANCE - 1) * stay, "lose_item", **torch),
+            EventRule(TORCH_SAVE_CHANCE - 1, "lose_item_thrown", **torch),
+            EventRule(stay, "lose_item", **unprotected),
+            EventRule(1, "lose_item_thrown", **unprotected),
+        ),
+        "damage": (
+            EventRule(died, "die"),
+            EventRule(EVENT_PROBABILITY - died, "survive"),
+        ),
+    }
+
+
+_event_tables: dict[str, EventTable] = {}
+
+
+def reset_event_tables(
+    tables: dict[str, Iterable[EventRule]] | None = None,
+) -> None:
+    """
+    Компилирует таблицы случайных событий: переданные или построенные
+    build_event_tables. Нужна после изменения констант (см. simulate).
+    """
+    tables = tables if tables is not None else build_event_tables()
+    _event_tables.clear()
+    _event_tables.update((name, EventTable(rules)) for name, rules in tables.items())
+
+
+def get_event_table(name: str) -> EventTable:
+    """
+    Возвращает скомпилированную таблицу случайных событий по имени.
+    """
+    return _event_tables[name]
+
+
+def play_event_table(
+    game_state: GameState, name: str, stream: RandomStream
+) -> list[Event]:
+    """
+    Разыгрывает строку таблицы случайных событий и выполняет её действие.
+    """
+    rule = _event_tables[name].draw(game_state.inventory, stream)
+    if rule is None or rule.effect is None:
+        return []
+    return EVENT_EFFECTS[rule.effect](game_state, stream)
+
+
+def trigger_trap(
+    game_state: GameState, stream: RandomStream | None = None
+) -> list[Event]:
     """
     Активирует ловушку с негативными последствиями для игрока.
+    Исход берётся из таблицы trap; stream передаётся, когда ловушка
+    срабатывает внутри другого случайного события.
+    """
+    if stream is None:
+        stream = session_stream(game_state, TRAP_STREAM)
+    return [Event(TRAP_TRIGGERED), *play_event_table(game_state, "trap", stream)]
+
+
+def random_event(game_state: GameState) -> list[Event]:
+    """
+    Случайные события, происходящие во время перемещения игрока
+    (таблица move).
     """
-    print("Ловушка активирована! Пол стал дрожать...")
+    return play_event_table(game_state, "move", session_stream(game_state, MOVE_STREAM))
 
-    inventory = game_state.get("player_inventory", [])
 
+def _find_coin(game_state: GameState, stream: RandomStream) -> list[Event]:
+    """
+    Игрок замечает блеск на полу: монетку, если её ещё нет в комнате.
+    """
+    current_room_key = game_state.current_room
+    events = [Event(FLOOR_GLINTS)]
+    if "coin" not in get_room_items(game_state, current_room_key):
+        add_room_item(game_state, current_room_key, "coin")
+        events.append(Event(COIN_FOUND))
+    else:
+        events.append(Event(ONLY_DUST))
+    return events
+
+
+def _rustle(game_state: GameState, stream: RandomStream) -> list[Event]:
+    """
+    Шорох в темноте; чем отпугнуть существо, зависит от инвентаря.
+    """
+    inventory = game_state.inventory
     if "sword" in inventory:
-        print("Благодаря мечу вам удалось удержаться на ногах! Ловушка не сработала.")
-        return
-
-    if "torch" in inventory:
-        torch_save = (
-            pseudo_random(game_state.get("steps_taken", 0), TORCH_SAVE_CHANCE) == 0
-        )
-        if torch_save:
-            print("Свет факла помог вовремя заметить ловушку! Вы успели отпрыгнуть.")
-            return
-
-    if inventory:
-        item_index = pseudo_random(game_state.get("steps_taken", 0), len(inventory))
-        lost_item = inventory.pop(item_index)
-        print(f"Из-за тряски вы потеряли: {lost_item}!")
-
-        if pseudo_random(game_state.get("steps_taken", 0), RANDOM_MOVEMENT_CHANCE) == 0:
-            current_room = game_state["current_room"]
-            exits = ROOMS.get(current_room, {}).get("exits", {})
-            if exits:
-                directions = list(exits.keys())
-                random_dir = pseudo_random(
-                    game_state.get("steps_taken", 0), len(directions)
-                )
-                random_room = exits[directions[random_dir]]
-                print("Вас отбросило в случайном направлении!")
-                game_state["current_room"] = random_room
-                game_state["steps_taken"] = (
-                    game_state.get("steps_taken", 0) + MOVEMENT_STEP
-                )
-                describe_current_room(game_state)
+        protector = "sword"
+    elif "torch" in inventory:
+        protector = "torch"
     else:
-        damage_chance = pseudo_random(
-            game_state.get("steps_taken", 0), EVENT_PROBABILITY
-        )
-        if damage_chance < DAMAGE_THRESHOLD:
-            print("Ловушка нанесла смертельный урон! Игра окончена.")
-            game_state["game_over"] = True
-        else:
-            print("Вам повезло! Вы смогли избежать ловушки, но сильно испугались.")
-
-
-def random_event(game_state: dict[str, Any]) -> None:
-    """
-    Случайные события, происходящие во время перемещения игрока.
-    """
-    event_chance = pseudo_random(game_state.get("steps_taken", 0), EVENT_PROBABILITY)
-    if event_chance != 0:
-        return
-
-    event_type = pseudo_random(game_state.get("steps_taken", 0) + 1, EVENT_TYPES)
-    current_room = ROOMS.get(game_state["current_room"])
-
-    match event_type:
-        case 0:
-            print("Вы заметили что-то блестящее на полу...")
-            if "coin" not in current_room["items"]:
-                current_room["items"].append("coin")
-                print("Вы нашли монетку!")
-            else:
-                print("Но это оказалась всего лишь пыль...")
-
-        case 1:
-            print("Вы слышите странный шорох в темноте...")
-            if "sword" in game_state.get("player_inventory", []):
-                print(
-                    "Благодаря мечу в руках,",
-                    "вы чувствуете себя увереннее и отпугиваете существо.",
-                )
-            elif "torch" in game_state.get("player_inventory", []):
-                print(
-                    "Свет факла помог разглядеть маленького грызуна,",
-                    "который быстро скрылся.",
-                )
-            else:
-                print("Вы замираете от страха, но шорох быстро стихает.")
-
-        case 2:
-            trap_chance = (
-                pseudo_random(game_state.get("steps_taken", 0), TRAP_CHANCE) == 0
-            )
-            if trap_chance and "torch" not in game_state.get("player_inventory", []):
-                print("Внезапно пол под ногами подался! Это ловушка!")
-                trigger_trap(game_state)
+        protector = None
+    return [Event(RUSTLE_HEARD), Event(RUSTLE_ENDED, (protector,))]
+
+
+def _floor_gives_way(game_state: GameState, stream: RandomStream) -> list[Event]:
+    """
+    Пол проваливается, и срабатывает ловушка.
+    """
+    return [Event(FLOOR_GAVE_WAY), *trigger_trap(game_state, stream)]
+
+
+def _lose_item(
+    game_state: GameState, stream: RandomStream, thrown: bool = False
+) -> list[Event]:
+    """
+    Игрок теряет случайный предмет, а с thrown его ещё и отбрасывает
+    в соседнюю комнату. Если терять нечего, ловушка наносит урон
+    (таблица damage).
+    """
+    inventory = game_state.inventory
+    count = len(inventory)
+    if not count:
+        return play_event_table(game_state, "damage", stream)
+
+    lost_item = inventory.pop(stream.below(count))
+    events = [Event(ITEM_LOST, (lost_item,))]
+    if thrown:
+        events.extend(_throw_player(game_state, stream))
+    return events
+
+
+def _throw_player(game_state: GameState, stream: RandomStream) -> list[Event]:
+    """
+    Отбрасывает игрока в соседнюю комнату по случайному выходу.
+    """
+    current_room = game_state.current_room
+    exits = (get_room(game_state, current_room) or {}).get("exits", {})
+    if not exits:
+        return []
+
+    directions = list(exits.keys())
+    random_room = exits[directions[stream.below(len(directions))]]
+    game_state.current_room = random_room
+    game_state.steps_taken = game_state.steps_taken + MOVEMENT_STEP
+    return [
+        Event(PLAYER_THROWN, (current_room, random_room)),
+        *describe_current_room(game_state),
+    ]
+
+
+def _die(game_state: GameState, stream: RandomStream) -> list[Event]:
+    """
+    Ловушка наносит смертельный урон.
+    """
+    game_state.game_over = True
+    return [Event(PLAYER_DIED)]
+
+
+EVENT_EFFECTS: dict[str, Callable[[GameState, RandomStream], list[Event]]] = {
+    "find_coin": _find_coin,
+    "rustle": _rustle,
+    "floor_gives_way": _floor_gives_way,
+    "sword_saves": lambda game_state, stream: [Event(TRAP_AVOIDED, ("sword",))],
+    "torch_saves": lambda game_state, stream: [Event(TRAP_AVOIDED, ("torch",))],
+    "lose_item": _lose_item,
+    "lose_item_thrown": lambda game_state, stream: _lose_item(
+        game_state, stream, thrown=True
+    ),
+    "throw_player": _throw_player,
+    "die": _die,
+    "survive": lambda game_state, stream: [Event(TRAP_SURVIVED)],
+}
+# Строки таблиц, которые только сообщают о событии и не меняют состояние
+# сессии (None — ничего не происходит): такой исход VectorEnv применяет
+# без движка.
+PASSIVE_EFFECTS = frozenset({None, "rustle", "sword_saves", "torch_saves", "survive"})
+
+reset_event_tables()
@@ -0,0 +1,336 @@
+from typing import Any
+
+import numpy as np
+
+from labyrinth_game.commands import get_parser
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.event_tables import EventRule, RandomStream
+from labyrinth_game.events import GAME_WON, PLAYER_DIED, Event
+from labyrinth_game.main import process_command
+from labyrinth_game.random_tables import alias_samples, stream_keys, stream_words
+from labyrinth_game.state import DEFAULT_SEED, GameState, get_registry
+from labyrinth_game.utils import (
+    EVENT_EFFECTS,
+    MOVE_STREAM,
+    PASSIVE_EFFECTS,
+    get_event_table,
+)
+from labyrinth_game.world import DIRECTIONS, build_actions, create_game_state
+from labyrinth_game.world_loader import NO_GATE, get_compiled_world
+
+WIN_REWARD = 1.0
+DEATH_REWARD = -1.0
+# Нет выхода в этом направлении (таблица VectorEnv.exits).
+NO_TARGET = -1
+# Виды действий. Переход, осмотр, взятие и использование предмета и ответ
+# на загадку считаются массивами сразу для всех игр, когда их исход
+# известен без движка; остальное выполняет process_command.
+ACTION_MOVE = 0
+ACTION_LOOK = 1
+ACTION_TAKE = 2
+ACTION_USE = 3
+ACTION_SOLVE = 4
+ACTION_OTHER = 5
+
+
+class VectorEnv:
+    """
+    N независимых игр, которые делают шаг одновременно.
+    Наблюдения, награды и флаги завершения возвращаются массивами NumPy.
+    Состояние игр хранится массивами: комната, число шагов, инвентарь
+    (N × число предметов, bool) и ключ потока случайных событий.
+    Переходы считаются сразу для всех игр: выход — по таблице из CSR-массивов
+    карты (get_compiled_world), событие таблицы move — по первому числу
+    потока хода (random_tables). Действие выпавшей строки, если оно меняет
+    состояние (монетка, провал пола), и команды, исход которых зависит
+    от состояния комнаты или вопроса, выполняет движок на состоянии игры.
+    Розыгрыши берутся из того же потока, поэтому результаты совпадают
+    с игрой по одной команде. Игра номер i начинается с seed + i, каждая
+    следующая после сброса получает следующий свободный seed.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        world: dict[str, Any] | None = None,
+        autoreset: bool = True,
+        seed: int = DEFAULT_SEED,
+    ) -> None:
+        self.num_envs = num_envs
+        self.autoreset = autoreset
+        self.world = world if world is not None else ROOMS
+        self.registry = get_registry(self.world)
+
+        compiled = get_compiled_world(self.world)
+        offsets = np.frombuffer(compiled.exit_offsets, dtype=np.uint32)
+        sources = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        self.exits = np.full((len(offsets) - 1, len(DIRECTIONS)), NO_TARGET)
+        self.exits[
+            sources, np.frombuffer(compiled.exit_directions, np.uint8)
+        ] = np.frombuffer(compiled.exit_targets, dtype=np.uint32)
+        self.gates = np.frombuffer(compiled.gates, dtype=np.int32).astype(np.int64)
+        self.room_items = np.zeros((len(compiled.room_keys), len(compiled.items)), bool)
+        for room, items in enumerate(compiled.room_items):
+            self.room_items[room, list(items)] = True
+        # Где «solve» не просто сообщает, что загадки нет.
+        self.solve_rooms = np.array(
+            [bool(room.get("puzzle")) for room in compiled.rooms.values()]
+        )
+        treasure_room = self.registry.room_ids.get("treasure_room")
+        if treasure_room is not None:
+            self.solve_rooms[treasure_room] = True
+
+        self.actions = build_actions(self.world)
+        self.action_kinds, self.action_args = self._classify(self.actions)
+
+        self.rooms = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.inventory = np.zeros((num_envs, len(self.registry.items)), np.bool_)
+        self.seeds = np.zeros(num_envs, dtype=np.uint64)
+        self.keys = np.zeros(num_envs, dtype=np.uint64)
+        self.dones = np.zeros(num_envs, dtype=np.bool_)
+        # Игра ждёт ответа на вопрос: следующую команду разбирает движок.
+        self.pending = np.zeros(num_envs, dtype=np.bool_)
+        # Комнаты, предметы которых игра изменила, и флаг «такие есть».
+        self.changed_rooms: list[set[int]] = [set() for _ in range(num_envs)]
+        self.room_changes = np.zeros(num_envs, dtype=np.bool_)
+
+        # Комната и число шагов в состояниях игр обновляются только перед
+        # вызовом движка (см. get_session).
+        self.sessions = [create_game_state(self.world) for _ in range(num_envs)]
+        self.next_seed = seed
+        self.reset()
+
+    def reset(self, indices: Any = None) -> np.ndarray:
+        """
+        Начинает игры заново (все или только указанные) и возвращает наблюдения.
+        """
+        if indices is None:
+            indices = range(self.num_envs)
+
+        indices = list(indices)
+        for index in indices:
+            self.seeds[index] = self.next_seed
+            self.sessions[index] = create_game_state(self.world, self.next_seed)
+            self.next_seed += 1
+        self._pull(indices)
+        self.keys[indices] = stream_keys(self.seeds[indices])
+
+        return self.observations()
+
+    def step(self, actions: Any) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Применяет по одному действию к каждой игре.
+        Возвращает наблюдения, награды и флаги завершения.
+        Завершённые игры при autoreset начинаются заново, и в наблюдениях
+        для них уже новое начальное состояние.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(
+                f"Ожидалось {self.num_envs} действий, получено {actions.shape}."
+            )
+
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        kinds = self.action_kinds[actions]
+        args = self.action_args[actions]
+        engine = ~self.dones & (self.pending | (kinds == ACTION_OTHER))
+        ready = ~self.dones & ~engine
+
+        self._move(np.flatnonzero(ready & (kinds == ACTION_MOVE)), args, rewards)
+
+        # Предмета нет среди исходных предметов комнаты, и игра их не меняла:
+        # ответ «здесь такого нет».
+        taking = np.flatnonzero(ready & (kinds == ACTION_TAKE))
+        engine[taking[self.room_items[self.rooms[taking], args[taking]]]] = True
+        for index in taking[self.room_changes[taking]].tolist():
+            if self.rooms[index] in self.changed_rooms[index]:
+                engine[index] = True
+
+        # Предмета нет в инвентаре: ответ «у вас его нет».
+        using = np.flatnonzero(ready & (kinds == ACTION_USE))
+        engine[using[self.inventory[using, args[using]]]] = True
+
+        solving = np.flatnonzero(ready & (kinds == ACTION_SOLVE))
+        engine[solving[self.solve_rooms[self.rooms[solving]]]] = True
+
+        commands = self.actions
+        engine = np.flatnonzero(engine).tolist()
+        for index in engine:
+            game_state = self.get_session(index)
+            events = process_command(game_state, commands[actions[index]])
+            rewards[index] = reward(events)
+        self._pull(engine)
+
+        dones = self.dones.copy()
+        if self.autoreset and dones.any():
+            self.reset(np.flatnonzero(dones).tolist())
+
+        return self.observations(), rewards, dones
+
+    def observations(self) -> np.ndarray:
+        """
+        Возвращает наблюдения формы (N, 2 + число предметов): комната,
+        число шагов и по столбцу на каждый предмет справочника карты
+        (1, если предмет есть в инвентаре).
+        """
+        observations = np.empty((self.num_envs, 2 + self.inventory.shape[1]), np.int64)
+        observations[:, 0] = self.rooms
+        observations[:, 1] = self.steps
+        observations[:, 2:] = self.inventory
+        return observations
+
+    def get_session(self, index: int) -> GameState:
+        """
+        Возвращает состояние игры с текущими комнатой и числом шагов.
+        """
+        game_state = self.sessions[index]
+        game_state.room = int(self.rooms[index])
+        game_state.steps_taken = int(self.steps[index])
+        return game_state
+
+    def _move(self, indices: np.ndarray, args: np.ndarray, rewards: np.ndarray) -> None:
+        """
+        Выполняет переходы игр indices, как move_player. Переход в стену
+        или в запертую комнату ничего не меняет. После перехода в игре
+        разыгрывается таблица move; действие строки, которое меняет
+        состояние, выполняется на состоянии игры тем же потоком.
+        """
+        targets = self.exits[self.rooms[indices], args[indices]]
+        opened = targets != NO_TARGET
+        indices, targets = indices[opened], targets[opened]
+
+        gates = self.gates[targets]
+        locked = (gates != NO_GATE) & ~self.inventory[indices, np.maximum(gates, 0)]
+        indices, targets = indices[~locked], targets[~locked]
+
+        self.rooms[indices] = targets
+        self.steps[indices] += 1
+        rules = self._draw_move_events(
+            indices, stream_words(self.keys[indices], self.steps[indices], MOVE_STREAM)
+        )
+        for index, rule in rules:
+            game_state = self.get_session(index)
+            stream = RandomStream(game_state.seed, game_state.steps_taken, MOVE_STREAM)
+            # Первое число потока уже ушло на выбор строки.
+            stream.next()
+            rewards[index] = reward(EVENT_EFFECTS[rule.effect](game_state, stream))
+        self._pull([index for index, _ in rules])
+
+    def _draw_move_events(
+        self, indices: np.ndarray, words: np.ndarray
+    ) -> list[tuple[int, EventRule]]:
+        """
+        Разыгрывает таблицу move для игр indices по первым числам
+        их потоков и возвращает игры, которым выпала строка, меняющая
+        состояние (не из PASSIVE_EFFECTS), вместе с этой строкой.
+        Выборка таблицы зависит от предметов из её условий, поэтому игры
+        разбиваются по их наборам.
+        """
+        table = get_event_table("move")
+        item_ids = [
+            item_id
+            for item_id in map(self.registry.item_ids.get, table.condition_items)
+            if item_id is not None and item_id < self.inventory.shape[1]
+        ]
+        codes = np.zeros(len(indices), dtype=np.int64)
+        for bit, item_id in enumerate(item_ids):
+            codes |= self.inventory[indices, item_id].astype(np.int64) << bit
+
+        active = []
+        for code in np.unique(codes).tolist():
+            signature = 0
+            for bit, item_id in enumerate(item_ids):
+                if code >> bit & 1:
+                    signature |= 1 << item_id
+            compiled = table.compiled(self.registry, signature)
+            if compiled is None:
+                continue
+            sampler, rules = compiled
+            group = codes == code
+            outcomes = alias_samples(sampler, words[group])
+            passive = np.array([rule.effect in PASSIVE_EFFECTS for rule in rules])
+            drawn = ~passive[outcomes]
+            active.extend(
+                (index, rules[outcome])
+                for index, outcome in zip(
+                    indices[group][drawn].tolist(), outcomes[drawn].tolist()
+                )
+            )
+        return active
+
+    def _pull(self, indices: list[int]) -> None:
+        """
+        Переносит состояние игр indices в массивы.
+        """
+        sessions = [self.sessions[index] for index in indices]
+        self.rooms[indices] = [game_state.room for game_state in sessions]
+        self.steps[indices] = [game_state.steps_taken for game_state in sessions]
+        self.dones[indices] = [game_state.game_over for game_state in sessions]
+        self.pending[indices] = [
+            game_state.pending_prompt is not None for game_state in sessions
+        ]
+
+        room_ids = self.registry.room_ids
+        for index, game_state in zip(indices, sessions):
+            removed = game_state.removed_items or {}
+            added = game_state.added_items or {}
+            changed = self.changed_rooms[index]
+            changed.clear()
+            changed.update(room_ids[key] for key, mask in removed.items() if mask)
+            changed.update(room_ids[key] for key, items in added.items() if items)
+            self.room_changes[index] = bool(changed)
+
+        inventories = [game_state.inventory.ids for game_state in sessions]
+        item_ids = np.frombuffer(
+            b"".join(ids.tobytes() for ids in inventories), dtype=np.uint16
+        )
+        if len(item_ids) and item_ids.max() >= self.inventory.shape[1]:
+            # В справочник карты добавился предмет: нужен ещё столбец.
+            columns = len(self.registry.items) - self.inventory.shape[1]
+            self.inventory = np.pad(self.inventory, ((0, 0), (0, columns)))
+        self.inventory[indices] = False
+        owners = np.repeat(
+            np.asarray(indices, dtype=np.int64), [len(ids) for ids in inventories]
+        )
+        self.inventory[owners, item_ids] = True
+
+    def _classify(self, actions: tuple[str, ...]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Разбирает действия и возвращает их виды и аргументы:
+        номер направления для перехода, номер предмета для взятия
+        и использования.
+        """
+        parser = get_parser(self.world)
+        item_count = self.room_items.shape[1]
+        kinds = np.full(len(actions), ACTION_OTHER, dtype=np.int64)
+        args = np.zeros(len(actions), dtype=np.int64)
+        for index, action in enumerate(actions):
+            parsed = parser.parse(action)
+            if parsed is None:
+                continue
+            command, arg = parsed
+            if command in DIRECTIONS:
+                kinds[index], args[index] = ACTION_MOVE, DIRECTIONS.index(command)
+            elif command == "look":
+                kinds[index] = ACTION_LOOK
+            elif command == "solve":
+                kinds[index] = ACTION_SOLVE
+            elif command in ("take", "use") and arg:
+                item_id = self.registry.item_ids.get(arg)
+                if item_id is not None and item_id < item_count:
+                    kinds[index] = ACTION_TAKE if command == "take" else ACTION_USE
+                    args[index] = item_id
+        return kinds, args
+
+
+def reward(events: list[Event]) -> float:
+    """
+    Возвращает награду за события шага: победа, смерть или 0.
+    """
+    for kind, _ in events:
+        if kind == GAME_WON:
+            return WIN_REWARD
+        if kind == PLAYER_DIED:
+            return DEATH_REWARD
+    return 0.0
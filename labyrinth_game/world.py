@@ -0,0 +1,206 @@
+import hashlib
+import json
+from typing import Any
+
+from labyrinth_game.answers import compile_answers
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.state import DEFAULT_SEED, GameState, get_registry
+
+DIRECTIONS = ("north", "south", "east", "west")
+VERSION_SIZE = 16
+
+
+def create_game_state(
+    world: dict[str, Any] | None = None, seed: int = DEFAULT_SEED
+) -> GameState:
+    """
+    Создаёт состояние новой игровой сессии.
+    Карта мира общая для всех сессий и не изменяется: сессия хранит только
+    свои изменения (взятые и оброненные предметы, решённые загадки).
+    seed выбирает поток случайных событий сессии.
+    """
+    return GameState(world, seed)
+
+
+def get_world(game_state: GameState) -> dict[str, Any]:
+    """
+    Возвращает общую карту мира, с которой работает сессия.
+    """
+    return game_state.world
+
+
+def get_room(game_state: GameState, room_key: str) -> dict[str, Any] | None:
+    """
+    Возвращает неизменяемые данные комнаты из общей карты.
+    """
+    return game_state.world.get(room_key)
+
+
+def get_room_items(game_state: GameState, room_key: str) -> list[str]:
+    """
+    Возвращает предметы комнаты с учётом изменений текущей сессии.
+    """
+    room = game_state.world.get(room_key)
+    base_items = room.get("items", []) if room else []
+    removed = game_state.removed_items and game_state.removed_items.get(room_key)
+    added = game_state.added_items and game_state.added_items.get(room_key)
+
+    if not removed and not added:
+        return list(base_items)
+
+    items = [
+        item
+        for slot, item in enumerate(base_items)
+        if not removed or not removed >> slot & 1
+    ]
+    if added:
+        items.extend(added)
+    return items
+
+
+def remove_room_item(game_state: GameState, room_key: str, item: str) -> bool:
+    """
+    Убирает предмет из комнаты для текущей сессии.
+    Взятые исходные предметы комнаты отмечаются битами по их позициям.
+    Возвращает False, если такого предмета в комнате нет.
+    """
+    added = game_state.added_items and game_state.added_items.get(room_key)
+    if added and item in added:
+        added.remove(item)
+        return True
+
+    room = game_state.world.get(room_key)
+    if game_state.removed_items is None:
+        game_state.removed_items = {}
+    removed = game_state.removed_items.get(room_key, 0)
+
+    for slot, base_item in enumerate(room.get("items", []) if room else []):
+        if base_item == item and not removed >> slot & 1:
+            game_state.removed_items[room_key] = removed | 1 << slot
+            return True
+    return False
+
+
+def add_room_item(game_state: GameState, room_key: str, item: str) -> None:
+    """
+    Кладёт предмет в комнату для текущей сессии.
+    Ранее взятый исходный предмет возвращается на своё место.
+    """
+    removed = game_state.removed_items and game_state.removed_items.get(room_key)
+    if removed:
+        for slot, base_item in enumerate(game_state.world[room_key]["items"]):
+            if base_item == item and removed >> slot & 1:
+                game_state.removed_items[room_key] = removed & ~(1 << slot)
+                return
+
+    if game_state.added_items is None:
+        game_state.added_items = {}
+    game_state.added_items.setdefault(room_key, []).append(item)
+
+
+def room_state_key(game_state: GameState, room_key: str) -> tuple[Any, ...]:
+    """
+    Возвращает ключ состояния комнаты в сессии: номер комнаты, взятые
+    исходные предметы, добавленные предметы и решена ли загадка.
+    Ключ меняется только вместе с предметами или загадкой этой комнаты,
+    а у сессий с одинаковым состоянием комнаты он совпадает.
+    """
+    room_id = game_state.registry.room_ids[room_key]
+    removed = game_state.removed_items and game_state.removed_items.get(room_key)
+    added = game_state.added_items and game_state.added_items.get(room_key)
+    return (
+        room_id,
+        removed or 0,
+        tuple(added) if added else (),
+        room_id in game_state.solved_rooms,
+    )
+
+
+def get_room_gate(game_state: GameState, room_key: str) -> str | None:
+    """
+    Возвращает предмет, без которого в комнату не войти, или None.
+    """
+    room = game_state.world.get(room_key)
+    return room.get("gate") if room else None
+
+
+def get_gates(world: dict[str, Any]) -> dict[str, str]:
+    """
+    Возвращает запертые комнаты карты и нужные для входа предметы.
+    """
+    if isinstance(world, ChunkedWorld):
+        return world.gates
+    return {key: room["gate"] for key, room in world.items() if room.get("gate")}
+
+
+def get_room_puzzle(game_state: GameState, room_key: str) -> tuple[str, ...] | None:
+    """
+    Возвращает загадку комнаты или None, если её нет или она уже решена.
+    """
+    room = game_state.world.get(room_key)
+    if not room:
+        return None
+
+    room_id = game_state.registry.room_ids[room_key]
+    if room_id in game_state.solved_rooms:
+        return None
+    return room.get("puzzle")
+
+
+def get_puzzle_answers(game_state: GameState, room_key: str) -> frozenset[str]:
+    """
+    Возвращает принятые ответы загадки комнаты в каноническом виде
+    (см. normalize_answer). Множество собирается один раз на карту.
+    """
+    answers = game_state.registry.answers.get(room_key)
+    if answers is None:
+        puzzle = game_state.world[room_key].get("puzzle")
+        answers = compile_answers(puzzle) if puzzle else frozenset()
+        game_state.registry.answers[room_key] = answers
+    return answers
+
+
+def mark_puzzle_solved(game_state: GameState, room_key: str) -> None:
+    """
+    Отмечает загадку комнаты решённой для текущей сессии.
+    """
+    room_id = game_state.registry.room_ids[room_key]
+    game_state.solved_rooms = game_state.solved_rooms | {room_id}
+
+
+def world_version(world: dict[str, Any]) -> bytes:
+    """
+    Возвращает отпечаток содержимого карты.
+    Журнал, снимки и подсказки годятся только для той же версии карты.
+    """
+    if isinstance(world, ChunkedWorld):
+        return world.version
+    data = json.dumps(world, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=VERSION_SIZE).digest()
+
+
+def list_items(world: dict[str, Any]) -> tuple[str, ...]:
+    """
+    Возвращает все предметы карты в постоянном порядке, включая предметы,
+    которые появляются по ходу игры.
+    """
+    return tuple(get_registry(world).items)
+
+
+def build_actions(world: dict[str, Any]) -> tuple[str, ...]:
+    """
+    Составляет список действий для карты: переходы, взятие и использование
+    предметов и ответы на все загадки. Каждое действие — обычная команда.
+    """
+    items = list_items(world)
+    answers = sorted(
+        {room["puzzle"][1] for room in world.values() if room.get("puzzle")}
+    )
+    return (
+        *DIRECTIONS,
+        *(f"take {item}" for item in items),
+        *(f"use {item}" for item in items),
+        "solve",
+        *(f"solve {answer}" for answer in answers),
+        "look",
+    )
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import os
+import pickle
+from array import array
+from collections import deque
+from typing import Any, Iterable
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import EXTRA_ITEMS
+from labyrinth_game.state import get_registry
+from labyrinth_game.world import DIRECTIONS
+
+try:
+    import tomllib
+except ImportError:  # Python 3.10
+    tomllib = None
+
+START_ROOM = "entrance"
+FORMAT_VERSION = 1
+# Версия раскладки CompiledWorld в кеше: увеличивается, когда меняется
+# содержимое полей, а не только их состав (состав входит в ключ сам).
+CACHE_VERSION = 2
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "labyrinth_game")
+NO_GATE = -1
+
+
+class CompiledWorld:
+    """
+    Карта в индексированном виде.
+    Комнаты пронумерованы, выходы хранятся в сжатом построчном формате (CSR):
+    выходы комнаты i — позиции exit_offsets[i]..exit_offsets[i + 1] массивов
+    exit_directions (номер в DIRECTIONS) и exit_targets (номер комнаты).
+    Предметы комнат хранятся так же: предмет на месте j комнаты i —
+    slot_items[slot_offsets[i] + j] (номер предмета), room_items — те же
+    предметы комнаты множеством.
+    rooms — та же карта в обычном формате ROOMS для игрового движка.
+    items задаёт порядок номеров предметов (по умолчанию — как в справочнике
+    обычной карты).
+    """
+
+    __slots__ = (
+        "rooms",
+        "room_keys",
+        "room_ids",
+        "items",
+        "room_items",
+        "slot_offsets",
+        "slot_items",
+        "gates",
+        "exit_offsets",
+        "exit_directions",
+        "exit_targets",
+    )
+
+    def __init__(
+        self, rooms: dict[str, Any], items: Iterable[str] | None = None
+    ) -> None:
+        self.rooms = rooms
+        self.room_keys = tuple(rooms)
+        self.room_ids = {key: index for index, key in enumerate(self.room_keys)}
+
+        if items is None:
+            items = dict.fromkeys(
+                item for room in rooms.values() for item in room["items"]
+            )
+            items.update(dict.fromkeys(EXTRA_ITEMS))
+        self.items = tuple(items)
+        item_ids = {item: index for index, item in enumerate(self.items)}
+
+        self.slot_offsets = array("I", [0])
+        self.slot_items = array("I")
+        for room in rooms.values():
+            self.slot_items.extend(item_ids[item] for item in room["items"])
+            self.slot_offsets.append(len(self.slot_items))
+        self.room_items = tuple(
+            frozenset(self.slot_items[start:end])
+            for start, end in zip(self.slot_offsets, self.slot_offsets[1:])
+        )
+        self.gates = array(
+            "i",
+            (
+                item_ids[room["gate"]] if room.get("gate") else NO_GATE
+                for room in rooms.values()
+            ),
+        )
+
+        direction_ids = {direction: index for index, direction in enumerate(DIRECTIONS)}
+        self.exit_offsets = array("I", [0])
+        self.exit_directions = array("B")
+        self.exit_targets = array("I")
+        for room in rooms.values():
+            for direction, target in room["exits"].items():
+                self.exit_directions.append(direction_ids[direction])
+                self.exit_targets.append(self.room_ids[target])
+            self.exit_offsets.append(len(self.exit_targets))
+
+    def exits(self, room_id: int) -> zip:
+        """
+        Возвращает пары (номер направления, номер комнаты) для выходов комнаты.
+        """
+        start, end = self.exit_offsets[room_id], self.exit_offsets[room_id + 1]
+        return zip(self.exit_directions[start:end], self.exit_targets[start:end])
+
+
+def parse_world(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Переводит описание карты из файла в формат ROOMS.
+    Загадка в файле — таблица с полями question и answer и необязательным
+    списком других допустимых ответов alternatives, запертая комната
+    отмечается полем gate с названием нужного предмета.
+    """
+    rooms = data.get("rooms")
+    if not isinstance(rooms, dict) or not rooms:
+        raise ValueError("В файле карты нет таблицы rooms.")
+
+    world = {}
+    for key, room in rooms.items():
+        puzzle = room.get("puzzle")
+        if puzzle is not None:
+            if not isinstance(puzzle, dict) or {"question", "answer"} - set(puzzle):
+                raise ValueError(f"Комната {key}: у загадки нет question или answer.")
+            alternatives = puzzle.get("alternatives", [])
+            if not isinstance(alternatives, list):
+                raise ValueError(f"Комната {key}: alternatives должен быть списком.")
+            puzzle = (
+                str(puzzle["question"]),
+                str(puzzle["answer"]),
+                *(str(answer) for answer in alternatives),
+            )
+
+        world[key] = {
+            "description": room.get("description", ""),
+            "exits": dict(room.get("exits", {})),
+            "items": list(room.get("items", [])),
+            "puzzle": puzzle,
+        }
+        if room.get("gate"):
+            world[key]["gate"] = room["gate"]
+    return world
+
+
+def validate_world(world: dict[str, Any]) -> list[str]:
+    """
+    Проверяет карту и возвращает список найденных ошибок:
+    выходы в несуществующие комнаты, неизвестные направления и предметы-ключи,
+    комнаты, до которых нельзя дойти от входа.
+    """
+    problems = []
+    if START_ROOM not in world:
+        problems.append(f"Нет начальной комнаты {START_ROOM}.")
+
+    items = {item for room in world.values() for item in room["items"]}
+    items.update(EXTRA_ITEMS)
+    for key, room in world.items():
+        for direction, target in room["exits"].items():
+            if direction not in DIRECTIONS:
+                problems.append(f"Комната {key}: неизвестное направление {direction}.")
+            if target not in world:
+                problems.append(f"Комната {key}: выход {direction} ведёт в {target}.")
+        gate = room.get("gate")
+        if gate and gate not in items:
+            problems.append(f"Комната {key}: ключа {gate} нет на карте.")
+
+    if problems:
+        return problems
+
+    reached = {START_ROOM}
+    queue = deque([START_ROOM])
+    while queue:
+        for target in world[queue.popleft()]["exits"].values():
+            if target not in reached:
+                reached.add(target)
+                queue.append(target)
+    problems.extend(
+        f"Комната {key} недостижима от входа." for key in world if key not in reached
+    )
+    return problems
+
+
+def compile_world(world: dict[str, Any]) -> CompiledWorld:
+    """
+    Проверяет карту и строит её индексированный вид.
+    """
+    problems = validate_world(world)
+    if problems:
+        raise ValueError("Карта содержит ошибки:\n" + "\n".join(problems))
+    return CompiledWorld(world)
+
+
+def read_world_file(path: str) -> dict[str, Any]:
+    """
+    Читает описание карты из файла JSON, JSON Lines или TOML.
+    """
+    with open(path, "rb") as world_file:
+        data = world_file.read()
+    return _decode(path, data)
+
+
+def _decode(path: str, data: bytes) -> dict[str, Any]:
+    """
+    Разбирает содержимое файла карты по его расширению.
+    В JSON Lines каждая строка — комната с ключом в поле key.
+    """
+    if path.endswith(".jsonl"):
+        rooms = {}
+        for line in data.splitlines():
+            if line.strip():
+                room = json.loads(line)
+                rooms[room.pop("key")] = room
+        return parse_world({"rooms": rooms})
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError("Для карт в TOML нужен Python 3.11 или новее.")
+        return parse_world(tomllib.loads(data.decode("utf-8")))
+    return parse_world(json.loads(data))
+
+
+def load_world(path: str, cache_dir: str | None = CACHE_DIR) -> CompiledWorld:
+    """
+    Загружает и компилирует карту из файла.
+    Скомпилированная карта кешируется на диске по хешу содержимого файла
+    и раскладки CompiledWorld, поэтому повторная загрузка не разбирает
+    и не проверяет карту заново. Кеш, который не читается (повреждён
+    или записан другой версией кода), считается отсутствующим.
+    """
+    with open(path, "rb") as world_file:
+        data = world_file.read()
+
+    digest = hashlib.blake2b(data, digest_size=16)
+    digest.update(FORMAT_VERSION.to_bytes(2, "little"))
+    digest.update(CACHE_VERSION.to_bytes(2, "little"))
+    digest.update(" ".join(CompiledWorld.__slots__).encode("ascii"))
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, f"{digest.hexdigest()}.pickle")
+        try:
+            with open(cache_path, "rb") as cache_file:
+                cached = pickle.load(cache_file)
+            if isinstance(cached, CompiledWorld):
+                return cached
+        except Exception:
+            pass
+
+    compiled = compile_world(_decode(path, data))
+
+    if cache_path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as cache_file:
+            pickle.dump(compiled, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, cache_path)
+    return compiled
+
+
+def open_world(path: str) -> dict[str, Any]:
+    """
+    Открывает карту для игры: каталог чанков читается лениво,
+    файл карты компилируется (с кешем на диске). Индексированный вид
+    файла карты запоминается для get_compiled_world.
+    """
+    if os.path.isdir(path):
+        return ChunkedWorld(path)
+    compiled = load_world(path)
+    _compiled[id(compiled.rooms)] = (compiled.rooms, compiled)
+    return compiled.rooms
+
+
+_compiled: dict[int, tuple[dict[str, Any], CompiledWorld]] = {}
+
+
+def get_compiled_world(world: dict[str, Any]) -> CompiledWorld:
+    """
+    Возвращает индексированный вид карты: построенный open_world при загрузке
+    файла или построенный при первом обращении (для карты из чанков
+    это чтение всех комнат). Номера комнат и предметов совпадают
+    со справочником карты (get_registry).
+    """
+    entry = _compiled.get(id(world))
+    if entry is None or entry[0] is not world:
+        entry = (world, CompiledWorld(world, get_registry(world).items))
+        _compiled[id(world)] = entry
+    return entry[1]
+
+
+def write_world(path: str, world: dict[str, Any]) -> None:
+    """
+    Сохраняет карту в формате ROOMS в файл JSON.
+    """
+    rooms = {}
+    for key, room in world.items():
+        entry = {
+            "description": room.get("description", ""),
+            "exits": room.get("exits", {}),
+            "items": room.get("items", []),
+        }
+        if room.get("puzzle"):
+            question, answer, *alternatives = room["puzzle"]
+            entry["puzzle"] = {"question": question, "answer": answer}
+            if alternatives:
+                entry["puzzle"]["alternatives"] = alternatives
+        if room.get("gate"):
+            entry["gate"] = room["gate"]
+        rooms[key] = entry
+
+    with open(path, "w", encoding="utf-8") as world_file:
+        json.dump({"rooms": rooms}, world_file, ensure_ascii=False, indent=2)
@@ -0,0 +1,30 @@
+from typing import Iterator
+
+import pytest
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.generator import generate
+
+# Решётка 100 × 100 с тайлами 64 × 64: чанки неполные, а сокровищница
+# лежит в отдельном чанке.
+GRID_SIDE = 100
+
+
+@pytest.fixture(scope="session")
+def chunk_directory(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """
+    Каталог чанков сгенерированной карты, общий для всех тестов.
+    """
+    directory = str(tmp_path_factory.mktemp("chunks"))
+    generate(GRID_SIDE, GRID_SIDE, seed=1).write_chunks(directory)
+    return directory
+
+
+@pytest.fixture
+def chunked_world(chunk_directory: str) -> Iterator[ChunkedWorld]:
+    """
+    Карта из чанков, открытая заново для каждого теста.
+    """
+    world = ChunkedWorld(chunk_directory)
+    yield world
+    world.close()
@@ -0,0 +1,62 @@
+import pytest
+
+from labyrinth_game.answers import compile_answers, normalize_answer, parse_numeral
+
+
+@pytest.mark.parametrize(
+    ("text", "number"),
+    [
+        ("ноль", 0),
+        ("десять", 10),
+        ("одна", 1),
+        ("триста шестьдесят шесть", 366),
+        ("девятнадцать", 19),
+        ("тысяча", 1000),
+        ("две тысячи двадцать пять", 2025),
+        ("сто тысяч один", 100_001),
+        ("миллион тысяча", 1_001_000),
+        ("три миллиарда пять миллионов", 3_005_000_000),
+    ],
+)
+def test_parses_numerals(text: str, number: int) -> None:
+    assert parse_numeral(text) == number
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        "ноль один",
+        "сто сто",
+        "двадцать десять",
+        "пять двадцать",
+        "тысяча миллион",
+        "тысяча тысяч",
+        "десять лет",
+        "10",
+    ],
+)
+def test_rejects_non_numerals(text: str) -> None:
+    assert parse_numeral(text) is None
+
+
+@pytest.mark.parametrize(
+    ("text", "canonical"),
+    [
+        ("  Резонанс ", "резонанс"),
+        ("ЁЖИК  в\tтумане", "ежик в тумане"),
+        ("Двадцать Пять", "25"),
+        ("25", "25"),
+        ("сто лет", "сто лет"),
+    ],
+)
+def test_normalizes_answers(text: str, canonical: str) -> None:
+    assert normalize_answer(text) == canonical
+
+
+def test_compiled_answers_accept_words_and_digits() -> None:
+    answers = compile_answers(("Сколько?", 10, "Десять", "ёлка"))
+
+    assert answers == {"10", "елка"}
+    assert normalize_answer("десять") in answers
+    assert normalize_answer("Елка") in answers
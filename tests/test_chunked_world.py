@@ -0,0 +1,35 @@
+import pytest
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.solver import StateCodec
+from labyrinth_game.state import get_registry
+from labyrinth_game.world import create_game_state
+
+
+def test_room_ids_are_dense(chunked_world: ChunkedWorld) -> None:
+    registry = get_registry(chunked_world)
+    keys = list(registry.room_keys)
+
+    assert len(keys) == len(registry.room_keys) == len(chunked_world)
+    assert [registry.room_ids[key] for key in keys] == list(range(len(keys)))
+    assert registry.room_ids["treasure_room"] == len(keys) - 1
+
+
+def test_room_keys_reject_ids_outside_map(chunked_world: ChunkedWorld) -> None:
+    room_keys = get_registry(chunked_world).room_keys
+
+    with pytest.raises(IndexError):
+        room_keys[len(room_keys)]
+    with pytest.raises(IndexError):
+        room_keys[-1]
+
+
+@pytest.mark.parametrize("room_key", ["entrance", "room_50_50", "treasure_room"])
+def test_codec_round_trip_keeps_room(
+    chunked_world: ChunkedWorld, room_key: str
+) -> None:
+    codec = StateCodec(chunked_world)
+    game_state = create_game_state(chunked_world)
+    game_state.current_room = room_key
+
+    assert codec.decode(codec.encode(game_state)).current_room == room_key
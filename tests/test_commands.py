@@ -0,0 +1,95 @@
+import pytest
+
+from labyrinth_game import commands
+from labyrinth_game.commands import PrefixTrie, get_parser, split_commands
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import (
+    AMBIGUOUS_COMMAND,
+    ITEM_TAKEN,
+    PLAYER_QUIT,
+    PUZZLE_SHOWN,
+    PUZZLE_SOLVED,
+)
+from labyrinth_game.main import process_command
+from labyrinth_game.world import create_game_state
+
+
+def test_prefix_trie_completes_unique_prefixes() -> None:
+    trie = PrefixTrie(["go", "goto", "take"])
+
+    assert trie.complete("t") == "take"
+    assert trie.complete("go") == "go"
+    assert trie.complete("got") == "goto"
+    assert trie.complete("g") is None
+    assert trie.complete("x") is None
+    assert trie.candidates("g") == ["go", "goto"]
+
+
+@pytest.mark.parametrize(
+    ("command", "parsed"),
+    [
+        ("n", ("north", None)),
+        ("NORTH", ("north", None)),
+        ("no", ("north", None)),
+        ("inv", ("inventory", None)),
+        ("hi", ("hint", None)),
+        ("go n", ("go", "north")),
+        ("ta tor", ("take", "torch")),
+        ("take Ancient Book", ("take", "ancient book")),
+        ("u sw", ("use", "sword")),
+        ("goto treas", ("goto", "treasure_room")),
+        ("path lib", ("path", "library")),
+        ("gox", ("gox", None)),
+        ("  ", None),
+    ],
+)
+def test_parses_aliases_and_prefixes(
+    command: str, parsed: tuple[str, str | None] | None
+) -> None:
+    assert get_parser(ROOMS).parse(command) == parsed
+
+
+def test_ambiguous_prefix_lists_candidates() -> None:
+    parser = get_parser(ROOMS)
+
+    assert parser.is_ambiguous("g")
+    assert not parser.is_ambiguous("go")
+    events = process_command(create_game_state(), "g")
+    assert events == [(AMBIGUOUS_COMMAND, ("g", "go, goto"))]
+
+
+def test_parse_cache_is_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(commands, "PARSE_CACHE_SIZE", 4)
+    parser = commands.CommandParser(ROOMS)
+
+    for command in ("n", "s", "e", "w", "take torch", "n"):
+        parser.parse(command)
+
+    assert len(parser.parsed) == 4
+    assert parser.parse("take torch") == ("take", "torch")
+
+
+def test_split_commands_skips_empty_parts() -> None:
+    assert split_commands("n; ;take torch;") == ["n", "take torch"]
+    assert split_commands("look") == ["look"]
+
+
+def test_batch_runs_in_order_and_answers_prompts() -> None:
+    game_state = create_game_state()
+    game_state.current_room = "library"
+
+    events = process_command(game_state, "solve; Резонанс; take ancient book")
+
+    kinds = [kind for kind, _ in events]
+    assert kinds[:2] == [PUZZLE_SHOWN, PUZZLE_SOLVED]
+    assert ITEM_TAKEN in kinds
+    assert game_state.pending_prompt is None
+
+
+def test_batch_stops_at_game_over() -> None:
+    game_state = create_game_state()
+
+    events = process_command(game_state, "quit; north; north")
+
+    assert [kind for kind, _ in events] == [PLAYER_QUIT]
+    assert game_state.steps_taken == 0
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from labyrinth_game.event_tables import (
+    ALIAS_BITS,
+    AliasSampler,
+    RandomStream,
+    stream_key,
+)
+from labyrinth_game.random_tables import (
+    alias_samples,
+    first_samples,
+    stream_keys,
+    stream_words,
+)
+
+WEIGHTS = [
+    [1],
+    [1, 1],
+    [0, 3, 1],
+    [48, 8, 8, 7, 1, 0],
+    [1, 3, 2, 1, 2, 1],
+]
+
+
+def word_for(column: int, coin: int, sampler: AliasSampler) -> int:
+    """
+    Наименьшее 64-битное число, которое выбирает столбец column
+    и монетку coin (из range(sampler.total)).
+    """
+    low = -(-(column << ALIAS_BITS) // sampler.size)
+    high = -(-(coin << ALIAS_BITS) // sampler.total)
+    return high << ALIAS_BITS | low
+
+
+def outcome_masses(sampler: AliasSampler) -> list[int]:
+    """
+    Доля каждого исхода в таблице: сумма его частей по всем столбцам
+    (в каждом столбце total частей).
+    """
+    masses = [0] * sampler.size
+    for column, (threshold, alias) in enumerate(
+        zip(sampler.thresholds, sampler.aliases)
+    ):
+        masses[column] += threshold
+        masses[alias] += sampler.total - threshold
+    return masses
+
+
+@pytest.mark.parametrize("weights", WEIGHTS)
+def test_alias_frequencies_match_weights(weights: list[int]) -> None:
+    sampler = AliasSampler(weights)
+    total = sum(weights)
+    counts = [0] * len(weights)
+    for column in range(len(weights)):
+        for coin in range(total):
+            counts[sampler.sample(word_for(column, coin, sampler))] += 1
+
+    assert counts == [weight * len(weights) for weight in weights]
+
+
+def test_stream_draws_follow_weights() -> None:
+    weights = [48, 8, 8, 7, 1]
+    sampler = AliasSampler(weights)
+    draws = 50_000
+    counts = [0] * len(weights)
+    for steps in range(draws):
+        counts[sampler.sample(RandomStream(7, steps, 0).next())] += 1
+
+    total = sum(weights)
+    for count, weight in zip(counts, weights):
+        expected = draws * weight / total
+        assert abs(count - expected) < 5 * (expected**0.5) + 1
+
+
+def test_large_heavily_weighted_table() -> None:
+    # Тысяча строк, одна из которых весит как все остальные вместе
+    # взятые в десять раз: сумма весов на число строк далеко за 2**16.
+    weights = [1, 7, 250, 3_000] * 250
+    weights[500] = 10 * sum(weights)
+    sampler = AliasSampler(weights)
+
+    assert outcome_masses(sampler) == [weight * len(weights) for weight in weights]
+
+    draws = 20_000
+    heavy = sum(
+        sampler.sample(RandomStream(3, steps, 0).next()) == 500
+        for steps in range(draws)
+    )
+    expected = draws * weights[500] / sum(weights)
+    assert abs(heavy - expected) < 5 * expected**0.5
+
+
+def test_alias_rejects_too_large_weights() -> None:
+    with pytest.raises(ValueError):
+        AliasSampler([1 << ALIAS_BITS, 1])
+
+
+def test_batch_matches_stream() -> None:
+    seeds = np.array([0, 1, 7, 2**63, 2**64 - 1], dtype=np.uint64)
+    steps = np.array([0, 5, 1000, 3, 1 << 20], dtype=np.uint64)
+    keys = stream_keys(seeds)
+
+    assert keys.tolist() == [stream_key(int(seed)) for seed in seeds]
+    for index in (1, 2):
+        expected = []
+        for seed, step in zip(seeds.tolist(), steps.tolist()):
+            stream = RandomStream(seed, step, 1)
+            for _ in range(index):
+                word = stream.next()
+            expected.append(word)
+        assert stream_words(keys, steps, 1, index).tolist() == expected
+
+    assert first_samples(keys, steps, 0).tolist() == [
+        RandomStream(seed, step, 0).sample()
+        for seed, step in zip(seeds.tolist(), steps.tolist())
+    ]
+    for weights in (*WEIGHTS, [5_000_000, 1, 2, 3] * 300):
+        sampler = AliasSampler(weights)
+        words = stream_words(keys, steps, 0)
+        assert alias_samples(sampler, words).tolist() == [
+            sampler.sample(word) for word in words.tolist()
+        ]
@@ -0,0 +1,74 @@
+from collections import deque
+from pathlib import Path
+
+import pytest
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.generator import generate
+from labyrinth_game.world_loader import load_world
+
+OPPOSITE = {"north": "south", "south": "north", "east": "west", "west": "east"}
+
+
+def reachable(rooms: dict, start: str = "entrance") -> set[str]:
+    """
+    Комнаты, до которых можно дойти от start (без учёта замков).
+    """
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        for target in rooms[queue.popleft()]["exits"].values():
+            if target not in seen:
+                seen.add(target)
+                queue.append(target)
+    return seen
+
+
+def test_same_seed_builds_same_labyrinth() -> None:
+    first, second = generate(30, 20, seed=5), generate(30, 20, seed=5)
+
+    assert first.exits == second.exits
+    assert first.items == second.items
+    assert first.puzzles == second.puzzles
+    assert first.key_room == second.key_room
+    assert generate(30, 20, seed=6).exits != first.exits
+
+
+@pytest.mark.parametrize(("width", "height"), [(1, 1), (1, 7), (7, 1), (25, 40)])
+def test_every_room_is_reachable(width: int, height: int) -> None:
+    labyrinth = generate(width, height, seed=3)
+    rooms = labyrinth.to_rooms()
+
+    assert len(rooms) == width * height + 1
+    assert reachable(rooms) == set(rooms)
+    assert "rusty key" in rooms[labyrinth.room_key(labyrinth.key_room)]["items"]
+    assert rooms["treasure_room"]["gate"] == "rusty key"
+    for room_key, room in rooms.items():
+        for direction, target in room["exits"].items():
+            assert rooms[target]["exits"][OPPOSITE[direction]] == room_key
+
+
+def test_rejects_empty_grid() -> None:
+    with pytest.raises(ValueError):
+        generate(0, 5)
+
+
+def test_written_maps_match_generated_rooms(tmp_path: Path) -> None:
+    labyrinth = generate(70, 9, seed=11)
+    rooms = labyrinth.to_rooms()
+    path = str(tmp_path / "world.jsonl")
+    labyrinth.write(path)
+    labyrinth.write_chunks(str(tmp_path / "chunks"), tile=8)
+
+    loaded = load_world(path, cache_dir=None).rooms
+    chunked = ChunkedWorld(str(tmp_path / "chunks"))
+    try:
+        assert list(loaded) == list(rooms)
+        assert len(chunked) == len(rooms)
+        for room_key, room in rooms.items():
+            for written in (loaded[room_key], chunked[room_key]):
+                assert written["exits"] == room["exits"]
+                assert list(written["items"]) == room["items"]
+                assert written.get("puzzle") == room["puzzle"]
+    finally:
+        chunked.close()
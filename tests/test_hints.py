@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.events import HINT_SHOWN, HINTS_UNAVAILABLE
+from labyrinth_game.hints import HintModel, load_hints, prepare_hints, write_hints
+from labyrinth_game.main import process_command
+from labyrinth_game.multiplayer import SharedWorld
+from labyrinth_game.state import get_registry
+from labyrinth_game.world import create_game_state
+
+
+def test_hint_needs_prepared_table(chunked_world: ChunkedWorld) -> None:
+    game_state = create_game_state(chunked_world)
+
+    assert process_command(game_state, "hint")[0].kind == HINTS_UNAVAILABLE
+
+    prepare_hints(chunked_world)
+    assert process_command(game_state, "hint")[0].kind == HINT_SHOWN
+
+
+def test_table_covers_every_room_of_chunked_map(chunked_world: ChunkedWorld) -> None:
+    model = HintModel(chunked_world)
+    table = model.build()
+
+    assert len(table) == len(get_registry(chunked_world).room_keys) << (
+        model.flag_bits + model.puzzle_bits
+    )
+    assert prepare_hints(chunked_world).hint(create_game_state(chunked_world))
+
+
+def test_loaded_table_matches_built(
+    tmp_path: Path, chunked_world: ChunkedWorld
+) -> None:
+    path = str(tmp_path / "hints.bin")
+    model = write_hints(path, chunked_world)
+
+    assert bytes(load_hints(path, chunked_world).table) == bytes(model.build())
+
+
+def test_shards_without_hints_read_no_map(chunk_directory: str) -> None:
+    shared = SharedWorld(chunk_directory, shards=2, processes=False)
+    try:
+        assert shared.world.resident_chunks <= 1
+
+        game_state = create_game_state(shared.world)
+        assert process_command(game_state, "hint")[0].kind == HINTS_UNAVAILABLE
+    finally:
+        shared.close()
+        shared.world.close()
+
+
+def test_model_places_only_single_items(chunked_world: ChunkedWorld) -> None:
+    model = HintModel(chunked_world)
+
+    for room_key, slot, item in model.placed:
+        assert chunked_world[room_key]["items"][slot] == item
+        assert item not in model.copied
+    for room_key, item in model.gates.items():
+        assert chunked_world[room_key]["gate"] == item
@@ -0,0 +1,206 @@
+import os
+import random
+import threading
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from labyrinth_game import journal as journal_module
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.journal import (
+    JOURNAL_HEADER_SIZE,
+    RECORD_COMMAND,
+    RECORD_HEADER,
+    Journal,
+    recover,
+    replay,
+    write_snapshot,
+)
+from labyrinth_game.main import process_command
+from labyrinth_game.state import GameState
+from labyrinth_game.world import create_game_state
+
+COMMANDS = ("take torch", "go north", "go west", "take ancient book", "look")
+# Команды для случайных сессий: сокращения, вопросы, пакеты через ";",
+# команды только для чтения и неизвестные слова.
+RANDOM_COMMANDS = (
+    "n",
+    "s",
+    "e",
+    "w",
+    "go north",
+    "go south",
+    "take torch",
+    "take rusty_key",
+    "drop torch",
+    "use torch",
+    "i",
+    "look",
+    "help",
+    "path treasure_room",
+    "solve",
+    "Резонанс",
+    "да",
+    "нет",
+    "десять",
+    "look; north; take ancient book",
+    "xyzzy",
+    "",
+)
+
+
+def snapshot(game_state: GameState) -> tuple[Any, ...]:
+    """
+    Состояние сессии в сравнимом виде.
+    """
+    return (
+        game_state.current_room,
+        game_state.steps_taken,
+        game_state.seed,
+        game_state.solved_rooms,
+        game_state.pending_prompt,
+        game_state.game_over,
+        game_state.removed_items or {},
+        list(game_state.inventory),
+    )
+
+
+def played(session_id: int, commands: tuple[str, ...]) -> GameState:
+    """
+    Сессия, сыгранная напрямую, без журнала.
+    """
+    game_state = create_game_state(ROOMS, session_id)
+    for command in commands:
+        process_command(game_state, command)
+    return game_state
+
+
+def test_reopen_truncates_torn_tail(tmp_path: Path) -> None:
+    path = str(tmp_path / "journal.bin")
+    journal = Journal(path)
+    for command in COMMANDS[:3]:
+        journal.append(5, command)
+    journal.close()
+    size = os.path.getsize(path)
+
+    # Сбой посреди записи: заголовок есть, данных меньше, чем обещано.
+    with open(path, "ab") as journal_file:
+        journal_file.write(RECORD_HEADER.pack(RECORD_COMMAND, 5, 100) + b"go")
+    assert snapshot(recover(path)[5]) == snapshot(played(5, COMMANDS[:3]))
+
+    journal = Journal(path)
+    assert os.path.getsize(path) == size
+    for command in COMMANDS[3:]:
+        journal.append(5, command)
+    journal.close()
+
+    assert snapshot(recover(path)[5]) == snapshot(played(5, COMMANDS))
+
+
+def test_reopen_rewrites_torn_header(tmp_path: Path) -> None:
+    path = str(tmp_path / "journal.bin")
+    with open(path, "wb") as journal_file:
+        journal_file.write(b"LB")
+
+    Journal(path).close()
+    assert os.path.getsize(path) == JOURNAL_HEADER_SIZE
+
+
+def test_saved_state_replays_without_snapshot(tmp_path: Path) -> None:
+    path = str(tmp_path / "journal.bin")
+    loaded = played(40, COMMANDS[:3])
+    loaded.seed = 7
+
+    journal = Journal(path)
+    journal.save_state(7, loaded)
+    for command in COMMANDS[3:]:
+        journal.append(7, command)
+        process_command(loaded, command)
+    journal.close()
+
+    assert snapshot(recover(path)[7]) == snapshot(loaded)
+
+
+def test_snapshot_round_trip(tmp_path: Path) -> None:
+    journal_path = str(tmp_path / "journal.bin")
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    game_state = played(3, COMMANDS)
+    game_state.steps_taken = 1 << 31
+
+    journal = Journal(journal_path)
+    write_snapshot(snapshot_path, {3: game_state}, journal.offset())
+    journal.close()
+
+    assert snapshot(recover(journal_path, snapshot_path)[3]) == snapshot(game_state)
+
+
+def random_sessions(count: int, length: int) -> list[tuple[int, str]]:
+    """
+    Случайный поток команд нескольких сессий вперемешку.
+    """
+    generator = random.Random(count)
+    return [
+        (generator.randrange(count), generator.choice(RANDOM_COMMANDS))
+        for _ in range(count * length)
+    ]
+
+
+def test_replay_matches_played_sessions(tmp_path: Path) -> None:
+    path = str(tmp_path / "journal.bin")
+    stream = random_sessions(20, 60)
+
+    journal = Journal(path)
+    played_sessions: dict[int, GameState] = {}
+    for session_id, command in stream:
+        journal.append(session_id, command)
+        game_state = played_sessions.setdefault(
+            session_id, create_game_state(ROOMS, session_id)
+        )
+        process_command(game_state, command)
+    journal.close()
+
+    replayed = replay(path)
+    assert replayed.keys() == played_sessions.keys()
+    for session_id, game_state in played_sessions.items():
+        assert snapshot(replayed[session_id]) == snapshot(game_state)
+
+
+def test_parallel_replay_matches_single_process(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    path = str(tmp_path / "journal.bin")
+    journal = Journal(path)
+    for session_id, command in random_sessions(12, 40):
+        journal.append(session_id, command)
+    journal.close_session(3)
+    journal.close()
+
+    expected = replay(path, sessions={50: played(50, COMMANDS)})
+    monkeypatch.setattr(journal_module, "PARALLEL_REPLAY_BYTES", 0)
+    parallel = replay(path, sessions={50: played(50, COMMANDS)}, workers=3)
+
+    assert 3 not in parallel
+    assert parallel.keys() == expected.keys()
+    for session_id, game_state in expected.items():
+        assert snapshot(parallel[session_id]) == snapshot(game_state)
+
+
+def test_durable_callbacks_run_after_commit(tmp_path: Path) -> None:
+    journal = Journal(str(tmp_path / "journal.bin"), commit_interval=60.0)
+    fired = threading.Event()
+
+    record = journal.append(1, "look")
+    journal.on_durable(record, fired.set)
+    assert fired.wait(5.0)
+    assert journal.position()[0] == record
+
+    # Уже записанная запись: обратный вызов сразу, в этом же потоке.
+    calls = []
+    journal.on_durable(record, lambda: calls.append(record))
+    assert calls == [record]
+
+    # При закрытии журнала вызываются все оставшиеся ожидания.
+    journal.on_durable(record + 10, lambda: calls.append(record + 10))
+    journal.close()
+    assert calls == [record, record + 10]
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import COMMAND_FAILED, ITEM_NOT_HERE, ITEM_TAKEN, Event
+from labyrinth_game.multiplayer import (
+    RoomPartition,
+    ShardError,
+    SharedWorld,
+    export_player,
+)
+from labyrinth_game.server import NOTICE_BUFFER_LIMIT, GameServer
+from labyrinth_game.world import create_game_state
+
+
+async def survive_failed_call(shared: SharedWorld) -> list[Event]:
+    """
+    Вызывает шард с испорченным состоянием игрока, затем выполняет
+    обычную команду на том же шарде.
+    """
+    game_state = create_game_state(shared.world, 1)
+    broken = ("no_such_room", *export_player(game_state)[1:])
+    shard = shared.partition.owner(game_state.current_room)
+    with pytest.raises(ShardError):
+        await shared._call(shard, "describe", 1, broken)
+
+    await shared.join(1, game_state)
+    events, _ = await shared.run_command(1, game_state, "look")
+    return events
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_shard_survives_failed_call(processes: bool) -> None:
+    shared = SharedWorld(shards=2, processes=processes)
+    try:
+        events = asyncio.run(survive_failed_call(shared))
+    finally:
+        shared.close()
+
+    assert events and events[0].kind != COMMAND_FAILED
+
+
+async def race_for_torch(shared: SharedWorld, players: int) -> list[list[Event]]:
+    """
+    Все игроки во входе одновременно пытаются взять один факел.
+    """
+    states = [create_game_state(shared.world, player) for player in range(players)]
+    for player, game_state in enumerate(states):
+        await shared.join(player, game_state)
+    replies = await asyncio.gather(
+        *(
+            shared.run_command(player, game_state, "take torch")
+            for player, game_state in enumerate(states)
+        )
+    )
+    assert sum("torch" in game_state.inventory for game_state in states) == 1
+    return [events for events, _ in replies]
+
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_concurrent_take_has_one_winner(processes: bool) -> None:
+    shared = SharedWorld(shards=2, processes=processes)
+    try:
+        replies = asyncio.run(race_for_torch(shared, 8))
+    finally:
+        shared.close()
+
+    kinds = [events[0].kind for events in replies]
+    assert kinds.count(ITEM_TAKEN) == 1
+    assert kinds.count(ITEM_NOT_HERE) == len(replies) - 1
+
+
+@pytest.mark.parametrize("shards", [1, 2, 3, 4, len(ROOMS)])
+def test_every_shard_owns_rooms(shards: int) -> None:
+    partition = RoomPartition(ROOMS, shards)
+    owners = [partition.owner(room_key) for room_key in ROOMS]
+
+    assert set(owners) == set(range(shards))
+    assert owners == sorted(owners)
+    assert max(map(owners.count, owners)) - min(map(owners.count, owners)) <= 1
+
+
+class FakeTransport:
+    def __init__(self, buffered: int) -> None:
+        self.buffered = buffered
+
+    def get_write_buffer_size(self) -> int:
+        return self.buffered
+
+
+class FakeWriter:
+    def __init__(self, buffered: int) -> None:
+        self.transport = FakeTransport(buffered)
+        self.written: list[bytes] = []
+
+    def is_closing(self) -> bool:
+        return False
+
+    def write(self, data: bytes) -> None:
+        self.written.append(data)
+
+
+def test_notices_skip_slow_players() -> None:
+    server = GameServer()
+    writers: dict[int, Any] = {
+        1: FakeWriter(0),
+        2: FakeWriter(NOTICE_BUFFER_LIMIT + 1),
+    }
+    server.writers = writers
+    notice = Event("player_entered", (3,))
+
+    server._notify([(1, notice), (2, notice)])
+
+    assert len(writers[1].written) == 1
+    assert writers[2].written == []
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from labyrinth_game.random_tables import pseudo_random_batch
+from labyrinth_game.utils import pseudo_random
+
+
+@pytest.mark.parametrize("modulo", [2, 3, 8, 1000, 10**12])
+def test_batch_matches_pseudo_random(modulo: int) -> None:
+    rng = np.random.default_rng(9)
+    seeds = np.concatenate(
+        [
+            np.arange(-500, 5000),
+            rng.integers(-(10**12), 10**12, size=5000),
+            rng.integers(0, 10**6, size=5000),
+        ]
+    )
+
+    expected = [pseudo_random(seed, modulo) for seed in seeds.tolist()]
+
+    # При modulo = 10**12 все числа пересчитываются через math.sin.
+    assert pseudo_random_batch(seeds, modulo).tolist() == expected
+
+
+def test_batch_broadcasts_seeds_against_moduli() -> None:
+    seeds = np.array([5, 7, 0, -3])
+    moduli = np.array([2, 10, 3, 1000, 10**12])
+
+    result = pseudo_random_batch(seeds[:, None], moduli)
+
+    assert result.tolist() == [
+        [pseudo_random(seed, modulo) for modulo in moduli.tolist()]
+        for seed in seeds.tolist()
+    ]
@@ -0,0 +1,55 @@
+import pytest
+
+from labyrinth_game import events as event_kinds
+from labyrinth_game.events import (
+    ITEM_NOT_HERE,
+    ITEM_TAKEN,
+    ROOM_DESCRIBED,
+    Event,
+)
+from labyrinth_game.main import process_command
+from labyrinth_game.render import (
+    KEYED_MESSAGES,
+    MESSAGES,
+    encode_events,
+    render_events,
+)
+from labyrinth_game.world import create_game_state
+
+# События, текст которых строится отдельной функцией render_event.
+RENDERED_KINDS = {
+    event_kinds.ROOM_DESCRIBED,
+    event_kinds.INVENTORY_SHOWN,
+    event_kinds.HELP_SHOWN,
+    event_kinds.PLAYERS_HERE,
+    event_kinds.ROUTE_SHOWN,
+    event_kinds.PUZZLE_SOLVED,
+}
+
+
+def test_engine_returns_events_and_prints_nothing(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    game_state = create_game_state()
+
+    events = process_command(game_state, "look; take torch; take torch")
+
+    assert all(isinstance(event, Event) for event in events)
+    assert [kind for kind, _ in events] == [ROOM_DESCRIBED, ITEM_TAKEN, ITEM_NOT_HERE]
+    assert events[1].args == ("torch",)
+    assert capsys.readouterr().out == ""
+
+    text = render_events(events)
+    assert text.startswith("== ENTRANCE ==")
+    assert text.endswith("Вы подняли: torch\nТакого предмета здесь нет.")
+    assert encode_events(events) == text.encode("utf-8")
+
+
+def test_every_event_kind_has_text() -> None:
+    kinds = {
+        value
+        for name, value in vars(event_kinds).items()
+        if name.isupper() and isinstance(value, str)
+    }
+
+    assert kinds <= set(MESSAGES) | set(KEYED_MESSAGES) | RENDERED_KINDS
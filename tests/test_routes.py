@@ -0,0 +1,25 @@
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.routes import RouteIndex
+
+
+def test_routes_survive_eviction() -> None:
+    unbounded = RouteIndex(ROOMS)
+    bounded = RouteIndex(ROOMS, max_entries=len(ROOMS) + 1)
+
+    for source in ROOMS:
+        for target in ROOMS:
+            assert bounded.route(source, target) == unbounded.route(source, target)
+            assert bounded.entries <= len(ROOMS) + 1 or len(bounded._rows) == 1
+
+
+def test_recently_used_row_is_kept(chunked_world: ChunkedWorld) -> None:
+    index = RouteIndex(chunked_world, max_entries=2 * len(chunked_world))
+
+    index.route("entrance", "room_1_1")
+    index.route("room_2_2", "room_1_1")
+    index.route("entrance", "room_1_1")
+    index.route("room_3_3", "room_1_1")
+
+    assert [source for source, _ in index._rows] == ["entrance", "room_3_3"]
+    assert index.entries <= 2 * len(chunked_world)
@@ -0,0 +1,57 @@
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from labyrinth_game.events import TRAP_SURVIVED, Event
+from labyrinth_game.journal import Journal, read_snapshot
+from labyrinth_game.main import process_command
+from labyrinth_game.metrics import Metrics
+from labyrinth_game.server import GameServer
+from labyrinth_game.world import create_game_state
+
+
+@pytest.mark.parametrize(
+    ("admin_token", "command"),
+    [(None, "stats"), (None, "stats "), ("secret", "stats"), ("secret", "stats x")],
+)
+def test_stats_hidden_without_admin_token(
+    admin_token: str | None, command: str
+) -> None:
+    server = GameServer(metrics=Metrics(), admin_token=admin_token)
+    server.sessions[0] = create_game_state()
+
+    assert server.server_command(0, command) is None
+
+
+def test_stats_shown_to_admin() -> None:
+    metrics = Metrics()
+    metrics.observe("go", 1000, [Event(TRAP_SURVIVED)])
+    server = GameServer(metrics=metrics, admin_token="secret")
+    server.sessions[0] = create_game_state()
+
+    session_id, text = server.server_command(0, "stats secret")
+
+    assert session_id == 0
+    assert metrics.events[TRAP_SURVIVED] == 1
+    assert TRAP_SURVIVED in text
+
+
+def test_snapshot_waits_for_journal_and_writes_off_loop(tmp_path: Path) -> None:
+    journal = Journal(str(tmp_path / "journal.bin"), commit_interval=60.0)
+    snapshot_path = str(tmp_path / "snapshot.bin")
+    server = GameServer(journal=journal, snapshot_path=snapshot_path)
+    game_state = create_game_state(seed=4)
+    server.sessions[4] = game_state
+    for command in ("take torch", "go north"):
+        journal.append(4, command)
+        process_command(game_state, command)
+
+    asyncio.run(server.snapshot())
+    sessions, offset = read_snapshot(snapshot_path)
+    journal.close()
+
+    assert offset == os.path.getsize(journal.path)
+    assert sessions[4].current_room == game_state.current_room
+    assert list(sessions[4].inventory) == ["torch"]
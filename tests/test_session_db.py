@@ -0,0 +1,96 @@
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.main import process_command
+from labyrinth_game.session_db import SessionRepository
+from labyrinth_game.state import GameState
+from labyrinth_game.world import create_game_state
+
+
+def snapshot(game_state: GameState) -> tuple[Any, ...]:
+    """
+    Состояние сессии в сравнимом виде.
+    """
+    return (
+        game_state.current_room,
+        game_state.steps_taken,
+        game_state.game_over,
+        game_state.seed,
+        game_state.removed_items or {},
+        list(game_state.inventory),
+    )
+
+
+def played(seed: int) -> GameState:
+    """
+    Сессия с взятыми предметами и пройденными шагами.
+    """
+    game_state = create_game_state(ROOMS, seed)
+    for command in ("take torch", "go north", "go west", "take ancient book"):
+        process_command(game_state, command)
+    return game_state
+
+
+def test_save_load_after_reopen(tmp_path: Path) -> None:
+    path = str(tmp_path / "sessions.db")
+    sessions = {key: played(key) for key in range(3)}
+    repository = SessionRepository(path)
+    for key, game_state in sessions.items():
+        repository.save(key, game_state)
+    repository.record_victory(1, 12)
+    repository.delete(2)
+    repository.close()
+
+    repository = SessionRepository(path)
+    assert sorted(repository) == [0, 1]
+    for key in (0, 1):
+        assert snapshot(repository.load(key)) == snapshot(sessions[key])
+    assert repository.leaderboard() == [(1, 12)]
+    repository.close()
+
+
+def test_failed_write_is_reported_and_retried(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    repository = SessionRepository(str(tmp_path / "sessions.db"))
+    write = repository._write
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def failing_write(*args: Any) -> None:
+        if failures:
+            raise failures.pop()
+        write(*args)
+
+    monkeypatch.setattr(repository, "_write", failing_write)
+    game_state = played(4)
+    repository.save(4, game_state)
+
+    with pytest.raises(RuntimeError):
+        repository.flush()
+    assert snapshot(repository.load(4)) == snapshot(game_state)
+
+    repository.flush()
+    repository.close()
+    repository = SessionRepository(str(tmp_path / "sessions.db"))
+    assert snapshot(repository.load(4)) == snapshot(game_state)
+    repository.close()
+
+
+def test_close_reports_lost_writes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    repository = SessionRepository(str(tmp_path / "sessions.db"))
+
+    def failing_write(*args: Any) -> None:
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(repository, "_write", failing_write)
+    repository.save(1, played(1))
+
+    with pytest.raises(RuntimeError):
+        repository.close()
+    assert not repository._writer.is_alive()
@@ -0,0 +1,102 @@
+from pathlib import Path
+from typing import Any
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.session_store import (
+    INVENTORY_CAPACITY,
+    TOUCHED_CAPACITY,
+    SessionStore,
+)
+from labyrinth_game.state import GameState, get_registry
+from labyrinth_game.world import (
+    add_room_item,
+    create_game_state,
+    mark_puzzle_solved,
+    remove_room_item,
+)
+
+
+def snapshot(game_state: GameState) -> tuple[Any, ...]:
+    """
+    Всё, что хранилище обязано сохранить, в сравнимом виде.
+    """
+    return (
+        game_state.current_room,
+        game_state.steps_taken,
+        game_state.pending_prompt,
+        game_state.game_over,
+        game_state.seed,
+        game_state.solved_rooms,
+        game_state.removed_items or {},
+        game_state.added_items or {},
+        list(game_state.inventory),
+    )
+
+
+def touched_state(world: dict[str, Any], rooms: int, seed: int) -> GameState:
+    """
+    Сессия, изменившая rooms комнат карты: в каждой взят первый предмет,
+    брошена монета и решена загадка.
+    """
+    game_state = create_game_state(world, seed)
+    game_state.steps_taken = 77
+    game_state.pending_prompt = "treasure_code"
+    room_keys = [key for key in get_registry(world).room_keys if world[key]["items"]]
+    for room_key in room_keys[:rooms]:
+        item = world[room_key]["items"][0]
+        assert remove_room_item(game_state, room_key, item)
+        game_state.inventory.append(item)
+        add_room_item(game_state, room_key, "coin")
+        mark_puzzle_solved(game_state, room_key)
+    game_state.current_room = room_keys[rooms - 1]
+    return game_state
+
+
+def test_record_size_does_not_depend_on_map(
+    tmp_path: Path, chunked_world: ChunkedWorld
+) -> None:
+    small = SessionStore(str(tmp_path / "small.bin"))
+    large = SessionStore(str(tmp_path / "large.bin"), chunked_world)
+
+    assert small.record.size == large.record.size
+    small.close()
+    large.close()
+
+
+def test_save_load_on_builtin_map(tmp_path: Path) -> None:
+    path = str(tmp_path / "store.bin")
+    game_state = touched_state(ROOMS, 5, seed=3)
+    store = SessionStore(path)
+    store.save(1, game_state)
+    store.close()
+
+    store = SessionStore(path)
+    assert snapshot(store.load(1)) == snapshot(game_state)
+    store.close()
+
+
+def test_save_load_on_chunked_map_with_overflow(
+    tmp_path: Path, chunked_world: ChunkedWorld
+) -> None:
+    path = str(tmp_path / "store.bin")
+    rooms = 3 * TOUCHED_CAPACITY + 1
+    assert rooms > INVENTORY_CAPACITY
+    sessions = {key: touched_state(chunked_world, rooms, key) for key in range(3)}
+    sessions[3] = touched_state(chunked_world, 1, 3)
+
+    store = SessionStore(path, chunked_world, capacity=2)
+    for key, game_state in sessions.items():
+        store.save(key, game_state)
+    store.delete(0)
+    # Короткая запись на месте длинной освобождает её продолжения.
+    sessions[1] = touched_state(chunked_world, 2, 1)
+    store.save(1, sessions[1])
+    store.compact()
+    store.close()
+
+    store = SessionStore(path, chunked_world)
+    assert sorted(store) == [1, 2, 3]
+    for key in (1, 2, 3):
+        assert snapshot(store.load(key)) == snapshot(sessions[key])
+    store.close()
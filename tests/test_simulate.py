@@ -0,0 +1,28 @@
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.simulate import simulate
+
+
+def test_solver_plays_each_seed() -> None:
+    stats = simulate(50, policy="solver", workers=1, seed=100)
+
+    assert stats.games == 50
+    assert stats.outcomes["won"] + stats.outcomes["died"] == 50
+    assert stats.outcomes["won"] > 40
+
+
+def test_pool_opens_chunked_map_by_path(chunked_world: ChunkedWorld) -> None:
+    in_process = simulate(20, workers=1, max_commands=30, world=chunked_world)
+    pooled = simulate(20, workers=2, max_commands=30, world=chunked_world)
+
+    assert pooled.summary() == in_process.summary()
+
+
+def test_certain_events_and_traps() -> None:
+    stats = simulate(
+        20,
+        workers=1,
+        max_commands=30,
+        overrides={"EVENT_PROBABILITY": 100, "TRAP_CHANCE": 100},
+    )
+
+    assert stats.games == 20
@@ -0,0 +1,112 @@
+from typing import Any
+
+import pytest
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.solver import STEP_BITS, StateCodec
+from labyrinth_game.state import GameState
+from labyrinth_game.world import (
+    add_room_item,
+    create_game_state,
+    mark_puzzle_solved,
+    remove_room_item,
+)
+
+
+def snapshot(game_state: GameState) -> tuple[Any, ...]:
+    """
+    Всё, что кодек обязан сохранить, в сравнимом виде.
+    """
+    return (
+        game_state.current_room,
+        game_state.steps_taken,
+        game_state.pending_prompt,
+        game_state.seed,
+        game_state.solved_rooms,
+        game_state.removed_items or {},
+        game_state.added_items or {},
+        list(game_state.inventory),
+    )
+
+
+def played_state(world: dict[str, Any], room_key: str, seed: int) -> GameState:
+    """
+    Сессия с непустым состоянием: шаги, инвентарь, взятые и брошенные
+    предметы, решённая загадка и ожидаемый ответ.
+    """
+    game_state = create_game_state(world, seed)
+    game_state.current_room = room_key
+    game_state.steps_taken = 1234
+    game_state.pending_prompt = "puzzle_answer"
+    source = next(key for key in world if world[key]["items"])
+    item = world[source]["items"][0]
+    assert remove_room_item(game_state, source, item)
+    game_state.inventory.append(item)
+    add_room_item(game_state, room_key, "coin")
+    mark_puzzle_solved(game_state, room_key)
+    return game_state
+
+
+@pytest.mark.parametrize("seed", [0, 7, (1 << 64) - 1])
+def test_round_trip_on_builtin_map(seed: int) -> None:
+    codec = StateCodec(ROOMS)
+    game_state = played_state(ROOMS, "library", seed)
+    game_state.inventory.append("sword")
+    assert remove_room_item(game_state, "armory", "sword")
+
+    assert snapshot(codec.decode(codec.encode(game_state))) == snapshot(game_state)
+
+
+def test_round_trip_on_chunked_map(chunked_world: ChunkedWorld) -> None:
+    codec = StateCodec(chunked_world)
+    game_state = played_state(chunked_world, "treasure_room", 42)
+
+    assert snapshot(codec.decode(codec.encode(game_state))) == snapshot(game_state)
+
+
+def test_codec_reads_no_rooms_of_chunked_map(chunk_directory: str) -> None:
+    world = ChunkedWorld(chunk_directory, prefetch=False)
+    try:
+        codec = StateCodec(world)
+        assert world.resident_chunks == 0
+
+        game_state = create_game_state(world, 9)
+        assert snapshot(codec.decode(codec.encode(game_state))) == snapshot(game_state)
+        assert world.resident_chunks == 1
+    finally:
+        world.close()
+
+
+def test_code_grows_with_state_not_map(chunked_world: ChunkedWorld) -> None:
+    codec = StateCodec(chunked_world)
+    game_state = played_state(chunked_world, "treasure_room", 42)
+
+    assert codec.encode(game_state).bit_length() < 512
+
+
+def test_rejects_seed_outside_field() -> None:
+    codec = StateCodec(ROOMS)
+
+    with pytest.raises(ValueError):
+        codec.encode(create_game_state(ROOMS, 1 << 64))
+
+
+def test_steps_at_field_boundary() -> None:
+    codec = StateCodec(ROOMS)
+    game_state = played_state(ROOMS, "library", 3)
+    game_state.steps_taken = (1 << STEP_BITS) - 1
+
+    assert snapshot(codec.decode(codec.encode(game_state))) == snapshot(game_state)
+
+    game_state.steps_taken = 1 << STEP_BITS
+    with pytest.raises(ValueError):
+        codec.encode(game_state)
+
+
+def test_rejects_code_of_other_version() -> None:
+    codec = StateCodec(ROOMS)
+    code = codec.encode(create_game_state(ROOMS))
+
+    with pytest.raises(ValueError):
+        codec.decode(code + 1)
@@ -0,0 +1,59 @@
+from labyrinth_game.events import (
+    CHEST_LEFT,
+    CHEST_LOCKED,
+    GAME_WON,
+    PUZZLE_FAILED,
+    PUZZLE_SHOWN,
+    PUZZLE_SOLVED,
+)
+from labyrinth_game.main import get_prompt, process_command
+from labyrinth_game.utils import (
+    PROMPT_PUZZLE_ANSWER,
+    PROMPT_TREASURE_CODE,
+    PROMPT_TREASURE_CONFIRM,
+)
+from labyrinth_game.world import create_game_state
+
+
+def kinds(events: list) -> list[str]:
+    """
+    Возвращает виды событий по порядку.
+    """
+    return [kind for kind, _ in events]
+
+
+def test_solve_waits_for_the_next_line() -> None:
+    game_state = create_game_state()
+    game_state.current_room = "library"
+
+    assert kinds(process_command(game_state, "solve")) == [PUZZLE_SHOWN]
+    assert game_state.pending_prompt == PROMPT_PUZZLE_ANSWER
+    assert get_prompt(game_state) == "Ваш ответ: "
+
+    # Ответ — любая строка, даже похожая на команду.
+    assert kinds(process_command(game_state, "north")) == [PUZZLE_FAILED]
+    assert game_state.pending_prompt is None
+    assert game_state.current_room == "library"
+
+    process_command(game_state, "solve")
+    assert kinds(process_command(game_state, "Резонанс")) == [PUZZLE_SOLVED]
+    assert get_prompt(game_state) == "> "
+
+
+def test_treasure_prompts_ask_confirmation_then_code() -> None:
+    game_state = create_game_state()
+    game_state.current_room = "treasure_room"
+
+    assert kinds(process_command(game_state, "solve")) == [CHEST_LOCKED]
+    assert game_state.pending_prompt == PROMPT_TREASURE_CONFIRM
+    assert kinds(process_command(game_state, "нет")) == [CHEST_LEFT]
+    assert game_state.pending_prompt is None
+
+    process_command(game_state, "solve")
+    assert process_command(game_state, "да") == []
+    assert game_state.pending_prompt == PROMPT_TREASURE_CODE
+
+    events = process_command(game_state, "десять")
+    assert GAME_WON in kinds(events)
+    assert game_state.game_over
+    assert game_state.pending_prompt is None
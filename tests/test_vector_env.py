@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.events import GAME_WON, PLAYER_DIED
+from labyrinth_game.main import process_command
+from labyrinth_game.vector_env import DEATH_REWARD, WIN_REWARD, VectorEnv
+from labyrinth_game.world import create_game_state
+
+
+def reference_step(world: dict, sessions: list, commands: list[str], seed: list[int]):
+    """
+    Делает тот же шаг по одной игре через process_command.
+    """
+    rewards, dones = [], []
+    for index, command in enumerate(commands):
+        game_state = sessions[index]
+        reward = 0.0
+        if not game_state.game_over:
+            for kind, _ in process_command(game_state, command):
+                if kind == GAME_WON:
+                    reward = WIN_REWARD
+                elif kind == PLAYER_DIED:
+                    reward = DEATH_REWARD
+        rewards.append(reward)
+        dones.append(game_state.game_over)
+        if game_state.game_over:
+            sessions[index] = create_game_state(world, seed[0])
+            seed[0] += 1
+    return rewards, dones
+
+
+@pytest.mark.parametrize("source", ["builtin", "chunked"])
+def test_matches_process_command(source: str, chunked_world: ChunkedWorld) -> None:
+    world = ROOMS if source == "builtin" else chunked_world
+    env = VectorEnv(32, world=world, seed=100)
+    sessions = [create_game_state(world, 100 + index) for index in range(32)]
+    next_seed = [132]
+    rng = np.random.default_rng(0)
+    moves = np.arange(4)
+
+    for step in range(300):
+        # Переходы чаще прочих действий: игры уходят вглубь карты.
+        if step % 3:
+            actions = rng.choice(moves, size=32)
+        else:
+            actions = rng.integers(len(env.actions), size=32)
+        commands = [env.actions[action] for action in actions]
+
+        observations, rewards, dones = env.step(actions)
+        expected_rewards, expected_dones = reference_step(
+            world, sessions, commands, next_seed
+        )
+
+        assert rewards.tolist() == expected_rewards
+        assert dones.tolist() == expected_dones
+        assert observations[:, 0].tolist() == [gs.room for gs in sessions]
+        assert observations[:, 1].tolist() == [gs.steps_taken for gs in sessions]
+        for index, game_state in enumerate(sessions):
+            owned = np.flatnonzero(observations[index, 2:]).tolist()
+            assert owned == sorted(set(game_state.inventory.ids))
+
+
+def test_inventory_columns_past_63_items() -> None:
+    world = {
+        "entrance": {
+            "description": "",
+            "exits": {},
+            "items": [f"item {index}" for index in range(80)],
+            "puzzle": None,
+        }
+    }
+    env = VectorEnv(2, world=world)
+    take = env.actions.index("take item 70")
+
+    observations, _, _ = env.step([take, take])
+
+    item_id = env.registry.item_ids["item 70"]
+    assert observations[:, 2 + item_id].tolist() == [1, 1]
+    assert observations[:, 2:].sum() == 2
@@ -0,0 +1,61 @@
+import copy
+import sys
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.main import process_command
+from labyrinth_game.world import (
+    add_room_item,
+    create_game_state,
+    get_room_items,
+    get_room_puzzle,
+    mark_puzzle_solved,
+    remove_room_item,
+)
+
+
+def test_sessions_do_not_change_shared_map() -> None:
+    original = copy.deepcopy(ROOMS)
+    first = create_game_state()
+    second = create_game_state()
+
+    process_command(first, "take torch")
+
+    assert list(first.inventory) == ["torch"]
+    assert get_room_items(first, "entrance") == []
+    assert get_room_items(second, "entrance") == ["torch"]
+    assert ROOMS == original
+
+
+def test_overlay_keeps_base_slots_and_added_items() -> None:
+    game_state = create_game_state()
+
+    assert remove_room_item(game_state, "armory", "bronze box")
+    assert not remove_room_item(game_state, "armory", "bronze box")
+    add_room_item(game_state, "armory", "coin")
+    add_room_item(game_state, "armory", "bronze box")
+
+    assert get_room_items(game_state, "armory") == ["sword", "bronze box", "coin"]
+    assert game_state.removed_items == {"armory": 0}
+
+    assert remove_room_item(game_state, "armory", "coin")
+    assert get_room_items(game_state, "armory") == ["sword", "bronze box"]
+    assert not remove_room_item(game_state, "armory", "coin")
+
+
+def test_solved_puzzles_do_not_grow_with_room_ids(
+    chunked_world: ChunkedWorld,
+) -> None:
+    game_state = create_game_state(chunked_world)
+    room_key = next(
+        key
+        for key in reversed(chunked_world.room_keys)
+        if chunked_world[key].get("puzzle")
+    )
+
+    assert game_state.solved_rooms is create_game_state().solved_rooms
+    mark_puzzle_solved(game_state, room_key)
+
+    assert get_room_puzzle(game_state, room_key) is None
+    assert game_state.solved_puzzles == {room_key}
+    assert sys.getsizeof(game_state.solved_rooms) < 1024
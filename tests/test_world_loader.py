@@ -0,0 +1,80 @@
+import os
+import pickle
+from pathlib import Path
+
+import pytest
+
+from labyrinth_game.chunked_world import ChunkedWorld
+from labyrinth_game.constants import ROOMS
+from labyrinth_game.state import get_registry
+from labyrinth_game.world import DIRECTIONS
+from labyrinth_game.world_loader import (
+    NO_GATE,
+    get_compiled_world,
+    load_world,
+    open_world,
+    write_world,
+)
+
+
+@pytest.fixture(params=["builtin", "chunked"])
+def world(request: pytest.FixtureRequest, chunked_world: ChunkedWorld) -> dict:
+    return ROOMS if request.param == "builtin" else chunked_world
+
+
+def test_compiled_world_matches_registry(world: dict) -> None:
+    compiled = get_compiled_world(world)
+    registry = get_registry(world)
+
+    assert compiled.room_keys == tuple(registry.room_keys)
+    assert list(compiled.items) == registry.items[: len(compiled.items)]
+    for room, room_key in enumerate(compiled.room_keys):
+        exits = {
+            DIRECTIONS[direction]: compiled.room_keys[target]
+            for direction, target in compiled.exits(room)
+        }
+        assert exits == world[room_key]["exits"]
+        gate = compiled.gates[room]
+        assert (compiled.items[gate] if gate != NO_GATE else None) == world[
+            room_key
+        ].get("gate")
+        slots = compiled.slot_items[
+            compiled.slot_offsets[room] : compiled.slot_offsets[room + 1]
+        ]
+        assert [compiled.items[item] for item in slots] == world[room_key]["items"]
+        assert compiled.room_items[room] == frozenset(slots)
+
+
+def test_open_world_keeps_compiled_world(tmp_path: Path) -> None:
+    path = str(tmp_path / "world.json")
+    write_world(path, ROOMS)
+
+    world = open_world(path)
+
+    assert get_compiled_world(world).rooms is world
+
+
+@pytest.mark.parametrize(
+    "stale",
+    [
+        b"not a pickle",
+        # Класс, которого больше нет в коде (AttributeError при загрузке).
+        b"clabyrinth_game.world_loader\nRemovedWorld\n.",
+        pickle.dumps({"rooms": {}}),
+        pickle.dumps(object.__new__(ChunkedWorld)),
+    ],
+)
+def test_unreadable_cache_is_a_miss(tmp_path: Path, stale: bytes) -> None:
+    path = str(tmp_path / "world.json")
+    cache_dir = tmp_path / "cache"
+    write_world(path, ROOMS)
+    load_world(path, str(cache_dir))
+    (cache_path,) = cache_dir.iterdir()
+    cache_path.write_bytes(stale)
+
+    compiled = load_world(path, str(cache_dir))
+
+    assert compiled.room_keys == tuple(ROOMS)
+    with open(cache_path, "rb") as cache_file:
+        assert pickle.load(cache_file).room_keys == tuple(ROOMS)
+    assert os.listdir(cache_dir) == [cache_path.name]